@@ -0,0 +1,450 @@
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+# Mesmo layout de importação dos testes
+sys.path.insert(0, os.path.join(ROOT_DIR, "src"))
+sys.path.insert(0, os.path.join(ROOT_DIR, "utils"))
+
+os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+
+import boto3  # noqa: E402
+from boto3.dynamodb.types import TypeDeserializer, TypeSerializer  # noqa: E402
+from moto import mock_aws  # noqa: E402
+from app_release import AppRelease  # noqa: E402
+from attribute_values import serialize_map  # noqa: E402
+from aws_clients import CLIENT_REGISTRY, TABLE_DESCRIPTION_CACHE  # noqa: E402
+from dynamo_db_utils import DynamoDBUtils as utils  # noqa: E402
+from test_dynamo_db_utils import create_table  # noqa: E402
+from dynamo_db_helper import DEFAULT_MAX_ITEM_SIZE  # noqa: E402
+from query_planner import QueryPlanner  # noqa: E402
+from app_release_repository import (  # noqa: E402
+    AppReleaseRepository,
+    GSI_KEY_SCHEMAS,
+    RANGE_KEY_ITENS,
+    STAGE_PILOT,
+    STAGE_PRODUCTION,
+    STATUS_APPROVED,
+    STATUS_CANCELED,
+    STATUS_PENDING,
+    STATUS_PREVIOUS,
+    STATUS_ROLLOUT,
+)
+from release_replica import LocalChangeSource, ReleaseReplica  # noqa: E402
+
+TABLE_NAME = "benchmark_app_release"
+
+DEFAULT_RELEASES = 100_000
+DEFAULT_PACKAGES = 1_000
+DEFAULT_PREVIOUS_VERSIONS = 1_000
+DEFAULT_MICRO_ITERATIONS = 10_000
+DEFAULT_MICRO_REPEAT = 5
+DEFAULT_CAPACITY_UNITS = 1_000
+DEFAULT_THRESHOLD = 0.2
+
+ROLLOUT_PACKAGE_NAME = "benchmark rollout app"
+
+RESULT_PER_CALL = "per_call"
+RESULT_TOTAL = "total"
+
+
+def measure_micro(
+    function: Callable[[], Any], iterations: int, repeat: int
+) -> Dict[str, Any]:
+    # O melhor tempo entre as repetições é o menos afetado por ruído
+    best = None
+
+    for _ in range(repeat):
+        started_at = time.perf_counter()
+
+        for _ in range(iterations):
+            function()
+
+        elapsed = (time.perf_counter() - started_at) / iterations
+        best = elapsed if best is None else min(best, elapsed)
+
+    return {"seconds": best, "unit": RESULT_PER_CALL, "iterations": iterations}
+
+
+def measure_macro(function: Callable[[], Any]) -> Dict[str, Any]:
+    started_at = time.perf_counter()
+    count = function()
+    elapsed = time.perf_counter() - started_at
+
+    return {"seconds": elapsed, "unit": RESULT_TOTAL, "items": count}
+
+
+def run_micro(iterations: int, repeat: int) -> Dict[str, Dict[str, Any]]:
+    release = {
+        "id": "benchmark app",
+        "mdm": "SF01",
+        "mdm_key": {"release_id": 1, "channels": ["a", "b"]},
+        "version_name": "1.0.0",
+        "stage": STAGE_PRODUCTION,
+        "status": STATUS_ROLLOUT,
+    }
+    key_condition = {"id": "benchmark app", "mdm": "SF01"}
+    filter_condition = {
+        "version_name#ne": "1.0.0",
+        "stage": STAGE_PRODUCTION,
+        "status#in": [STATUS_ROLLOUT, STATUS_APPROVED],
+    }
+    projection_expression = ["id", "mdm", "version_name", "stage", "status"]
+    # O mesmo item no formato do client, como chega numa página de consulta
+    attributes = serialize_map(
+        utils.build_put_item_params(release, RANGE_KEY_ITENS)["Item"]
+    )
+    type_serializer = TypeSerializer()
+    type_deserializer = TypeDeserializer()
+    query_planner = QueryPlanner(
+        True,
+        RANGE_KEY_ITENS,
+        GSI_KEY_SCHEMAS,
+        DEFAULT_MAX_ITEM_SIZE,
+        attribute_cardinality=AppReleaseRepository.attribute_cardinality,
+    )
+
+    scenarios: Dict[str, Callable[[], Any]] = {
+        "micro.build_put_item_params": lambda: utils.build_put_item_params(
+            release, RANGE_KEY_ITENS, False, GSI_KEY_SCHEMAS
+        ),
+        "micro.build_filter_expression": lambda: utils.build_filter_expression(
+            {}, filter_condition
+        ),
+        "micro.build_get_item_params_gsi_key_schema": (
+            lambda: utils.build_get_item_params_gsi_key_schema(
+                GSI_KEY_SCHEMAS,
+                key_condition,
+                filter_condition,
+                projection_expression,
+                None,
+                100,
+            )
+        ),
+        "micro.plan_query": lambda: query_planner.plan(
+            key_condition, filter_condition, projection_expression
+        ),
+        "micro.encode_version": lambda: utils.encode_version("1.10.0-rc.2"),
+        "micro.build_update_item_params": lambda: utils.build_update_item_params(
+            {"id": "benchmark app", "id_range": "SF01#1.0.0"},
+            {"stage": STAGE_PILOT, "status": STATUS_APPROVED},
+            {"stage": STAGE_PRODUCTION, "status": STATUS_ROLLOUT},
+        ),
+        "micro.type_deserializer_item": lambda: {
+            key: type_deserializer.deserialize(value)
+            for key, value in attributes.items()
+        },
+        "micro.app_release_from_attribute_map": lambda: AppRelease.from_attribute_map(
+            attributes
+        ),
+        "micro.type_serializer_item": lambda: {
+            key: type_serializer.serialize(value) for key, value in release.items()
+        },
+        "micro.serialize_map": lambda: serialize_map(release),
+        "micro.build_transact_update_item": lambda: utils.build_transact_update_item(
+            TABLE_NAME,
+            {"id": "benchmark app", "id_range": "SF01#1.0.0"},
+            {"stage": STAGE_PILOT, "status": STATUS_APPROVED},
+            {"stage": STAGE_PRODUCTION, "status": STATUS_ROLLOUT},
+        ),
+    }
+
+    return {
+        name: measure_micro(function, iterations, repeat)
+        for name, function in scenarios.items()
+    }
+
+
+def build_releases(releases: int, packages: int) -> List[Dict[str, Any]]:
+    items = []
+
+    for idx in range(releases):
+        package = idx % packages
+        version = idx // packages
+        # A versão mais recente de cada pacote está em produção
+        latest = version == (releases - 1 - package) // packages
+
+        items.append(
+            {
+                "id": f"benchmark app {package}",
+                "mdm": "SF01",
+                "mdm_key": {"release_id": idx},
+                "version_name": f"1.{version}.0",
+                "stage": STAGE_PRODUCTION if latest or version % 2 else STAGE_PILOT,
+                "status": STATUS_ROLLOUT if latest else STATUS_PREVIOUS,
+            }
+        )
+
+    return items
+
+
+def build_rollout_releases(previous_versions: int) -> List[Dict[str, Any]]:
+    items = [
+        {
+            "id": ROLLOUT_PACKAGE_NAME,
+            "mdm": "SF01",
+            "mdm_key": {"release_id": idx},
+            "version_name": f"0.{idx}.0",
+            "stage": STAGE_PRODUCTION,
+            "status": STATUS_PREVIOUS,
+        }
+        for idx in range(previous_versions)
+    ]
+    items.append(
+        {
+            "id": ROLLOUT_PACKAGE_NAME,
+            "mdm": "SF01",
+            "mdm_key": {"release_id": previous_versions},
+            "version_name": "1.0.0",
+            "stage": STAGE_PRODUCTION,
+            "status": STATUS_ROLLOUT,
+        }
+    )
+    items.append(
+        {
+            "id": ROLLOUT_PACKAGE_NAME,
+            "mdm": "SF01",
+            "mdm_key": {"release_id": previous_versions + 1},
+            "version_name": "2.0.0",
+            "stage": STAGE_PILOT,
+            "status": STATUS_APPROVED,
+        }
+    )
+
+    return items
+
+
+def create_benchmark_table(capacity_units: int) -> None:
+    resource = boto3.resource("dynamodb")
+    create_table(
+        TABLE_NAME,
+        resource,
+        {"HASH": "id", "RANGE": "id_range"},
+        GSI_KEY_SCHEMAS,
+    )
+
+    # A capacidade define o tamanho das páginas usadas pelo repositório
+    resource.meta.client.update_table(
+        TableName=TABLE_NAME,
+        ProvisionedThroughput={
+            "ReadCapacityUnits": capacity_units,
+            "WriteCapacityUnits": capacity_units,
+        },
+    )
+    TABLE_DESCRIPTION_CACHE.invalidate(TABLE_NAME)
+
+
+def run_macro(
+    releases: int, packages: int, previous_versions: int, capacity_units: int
+) -> Dict[str, Dict[str, Any]]:
+    results: Dict[str, Dict[str, Any]] = {}
+
+    with mock_aws():
+        # Os clients precisam ser criados dentro do mock
+        CLIENT_REGISTRY.reset()
+        create_benchmark_table(capacity_units)
+        repo = AppReleaseRepository(TABLE_NAME)
+
+        items = build_releases(releases, packages)
+        results["macro.load_releases"] = measure_macro(
+            lambda: len(repo.insert_many(items, overwrite=True))
+        )
+
+        results["macro.get_all_apps"] = measure_macro(lambda: len(repo.get_all_apps()))
+
+        # O mesmo get_all_apps pelo client de baixo nível, sem o resource
+        client_repo = AppReleaseRepository(TABLE_NAME, low_level_client=True)
+        results["macro.get_all_apps_low_level_client"] = measure_macro(
+            lambda: len(client_repo.get_all_apps())
+        )
+
+        # A varredura segmentada é a base do backup e do bootstrap da réplica
+        results["macro.scan"] = measure_macro(lambda: sum(1 for _ in repo.iter_scan()))
+        results["macro.parallel_scan"] = measure_macro(
+            lambda: sum(1 for _ in repo.iter_parallel_scan())
+        )
+
+        # A réplica lê a tabela uma vez e responde às consultas da memória
+        replica = ReleaseReplica(repo, LocalChangeSource())
+        results["macro.replica_bootstrap"] = measure_macro(replica.bootstrap)
+        results["macro.replica_get_all_apps"] = measure_macro(
+            lambda: len(replica.get_all_apps())
+        )
+
+        results["macro.update_fan_out"] = measure_macro(
+            lambda: len(
+                repo.update(
+                    key_condition={"stage": STAGE_PILOT},
+                    filter_condition={"status": STATUS_PREVIOUS},
+                    update_items={"status": STATUS_CANCELED},
+                )
+            )
+        )
+
+        results["macro.update_fan_out_parallel"] = measure_macro(
+            lambda: len(
+                repo.update(
+                    key_condition={"stage": STAGE_PRODUCTION},
+                    filter_condition={"status": STATUS_PREVIOUS},
+                    update_items={"status": STATUS_CANCELED},
+                    parallel=True,
+                )
+            )
+        )
+
+        repo.insert_many(build_rollout_releases(previous_versions), overwrite=True)
+        results["macro.rollout_app"] = measure_macro(
+            lambda: repo.rollout_app(ROLLOUT_PACKAGE_NAME, "SF01", "2.0.0") or 1
+        )
+
+        results["macro.get_app"] = measure_macro(
+            lambda: len(
+                repo.get_app(
+                    ROLLOUT_PACKAGE_NAME,
+                    [STATUS_PENDING, STATUS_APPROVED, STATUS_ROLLOUT],
+                )
+            )
+        )
+
+        # Compara a leitura da maior versão com o get_app após migrar as chaves
+        sortable_repo = AppReleaseRepository(TABLE_NAME, sortable_versions=True)
+        results["macro.migrate_range_keys"] = measure_macro(
+            lambda: len(sortable_repo.migrate_range_keys({"id": ROLLOUT_PACKAGE_NAME}))
+        )
+        results["macro.get_latest_release"] = measure_macro(
+            lambda: int(
+                sortable_repo.get_latest_release(
+                    ROLLOUT_PACKAGE_NAME, "SF01", STAGE_PRODUCTION
+                )
+                is not None
+            )
+        )
+
+    CLIENT_REGISTRY.reset()
+
+    return results
+
+
+def compare(
+    results: Dict[str, Dict[str, Any]],
+    baseline: Dict[str, Dict[str, Any]],
+    threshold: float,
+) -> List[Dict[str, Any]]:
+    comparisons = []
+
+    for name, result in sorted(results.items()):
+        baseline_result = baseline.get(name)
+
+        if not baseline_result or not baseline_result["seconds"]:
+            continue
+
+        ratio = result["seconds"] / baseline_result["seconds"]
+        comparisons.append(
+            {
+                "name": name,
+                "baseline": baseline_result["seconds"],
+                "current": result["seconds"],
+                "ratio": ratio,
+                "regression": ratio > 1 + threshold,
+            }
+        )
+
+    return comparisons
+
+
+def print_results(results: Dict[str, Dict[str, Any]]) -> None:
+    for name, result in sorted(results.items()):
+        if result["unit"] == RESULT_PER_CALL:
+            print(f"{name:<50} {result['seconds'] * 1e6:>12.2f} us/call")
+        else:
+            print(f"{name:<50} {result['seconds']:>12.3f} s ({result['items']} items)")
+
+
+def print_comparisons(comparisons: List[Dict[str, Any]]) -> None:
+    for comparison in comparisons:
+        flag = "SLOWER" if comparison["regression"] else "ok"
+        print(
+            f"{comparison['name']:<50} {comparison['ratio']:>8.2f}x "
+            f"(baseline {comparison['baseline']:.6f}s, "
+            f"current {comparison['current']:.6f}s) {flag}"
+        )
+
+
+def parse_args(argv: Optional[List[str]]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Benchmarks of the repository layer against moto"
+    )
+    parser.add_argument("--only", choices=["micro", "macro"])
+    parser.add_argument("--releases", type=int, default=DEFAULT_RELEASES)
+    parser.add_argument("--packages", type=int, default=DEFAULT_PACKAGES)
+    parser.add_argument(
+        "--previous-versions", type=int, default=DEFAULT_PREVIOUS_VERSIONS
+    )
+    parser.add_argument("--capacity-units", type=int, default=DEFAULT_CAPACITY_UNITS)
+    parser.add_argument("--iterations", type=int, default=DEFAULT_MICRO_ITERATIONS)
+    parser.add_argument("--repeat", type=int, default=DEFAULT_MICRO_REPEAT)
+    parser.add_argument("--output", help="Write the results as a JSON baseline")
+    parser.add_argument("--baseline", help="Compare the results with a baseline")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    results: Dict[str, Dict[str, Any]] = {}
+
+    if args.only in (None, "micro"):
+        results.update(run_micro(args.iterations, args.repeat))
+
+    if args.only in (None, "macro"):
+        results.update(
+            run_macro(
+                args.releases,
+                args.packages,
+                args.previous_versions,
+                args.capacity_units,
+            )
+        )
+
+    print_results(results)
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(
+                {
+                    "metadata": {
+                        "python": platform.python_version(),
+                        "releases": args.releases,
+                        "packages": args.packages,
+                        "previous_versions": args.previous_versions,
+                        "capacity_units": args.capacity_units,
+                    },
+                    "results": results,
+                },
+                file,
+                indent=2,
+                sort_keys=True,
+            )
+
+    if args.baseline:
+        with open(args.baseline) as file:
+            baseline = json.load(file)["results"]
+
+        comparisons = compare(results, baseline, args.threshold)
+        print_comparisons(comparisons)
+
+        if any(comparison["regression"] for comparison in comparisons):
+            return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,5 +1,29 @@
 from .dynamo_db_helper import DynamoDBHelper
 from .base_repository import BaseRepository
+from .app_release import AppRelease
 from .app_release_repository import AppReleaseRepository
+from .release_cache import ReleaseCache
+from .cursor_codec import CursorCodec, InvalidCursorError
+from .instrumentation import MetricsAggregator
+from .release_replica import ReleaseReplica, DynamoDBStreamSource, LocalChangeSource
+from .table_backup import export_table, import_table
+from .async_base_repository import AsyncBaseRepository
+from .async_app_release_repository import AsyncAppReleaseRepository
 
-__all__ = ["BaseRepository", "AppReleaseRepository", "DynamoDBHelper"]
+__all__ = [
+    "BaseRepository",
+    "AppReleaseRepository",
+    "AppRelease",
+    "DynamoDBHelper",
+    "ReleaseCache",
+    "CursorCodec",
+    "InvalidCursorError",
+    "MetricsAggregator",
+    "ReleaseReplica",
+    "DynamoDBStreamSource",
+    "LocalChangeSource",
+    "export_table",
+    "import_table",
+    "AsyncBaseRepository",
+    "AsyncAppReleaseRepository",
+]
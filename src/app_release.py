@@ -0,0 +1,122 @@
+from typing import Any, Collection, Dict, Optional
+from attribute_values import (
+    AttributeMap,
+    deserialize_map,
+    deserialize_value,
+    serialize_map,
+    serialize_value,
+)
+
+APP_RELEASE_FIELDS = (
+    "id",
+    "id_range",
+    "mdm",
+    "mdm_key",
+    "version_name",
+    "stage",
+    "status",
+    "created_at",
+    "updated_at",
+)
+
+
+class AppRelease:
+    # Atributos fora dos campos conhecidos (shards, períodos de índices) ficam
+    # em `extra`, para que a conversão de ida e volta não perca nada
+    __slots__ = APP_RELEASE_FIELDS + ("extra",)
+
+    def __init__(
+        self,
+        id: str,
+        id_range: Optional[str] = None,
+        mdm: Optional[str] = None,
+        mdm_key: Optional[Dict[str, Any]] = None,
+        version_name: Optional[str] = None,
+        stage: Optional[str] = None,
+        status: Optional[str] = None,
+        created_at: Optional[str] = None,
+        updated_at: Optional[str] = None,
+        extra: Optional[Dict[str, Any]] = None,
+    ):
+        self.id = id
+        self.id_range = id_range
+        self.mdm = mdm
+        self.mdm_key = mdm_key
+        self.version_name = version_name
+        self.stage = stage
+        self.status = status
+        self.created_at = created_at
+        self.updated_at = updated_at
+        self.extra = extra
+
+    def __eq__(self, other: Any) -> bool:
+        if not isinstance(other, AppRelease):
+            return NotImplemented
+
+        return self.to_item() == other.to_item()
+
+    def __repr__(self) -> str:
+        return f"AppRelease({self.to_item()!r})"
+
+    @classmethod
+    def from_item(cls, item: Dict[str, Any]) -> "AppRelease":
+        release = cls.__new__(cls)
+
+        for field in APP_RELEASE_FIELDS:
+            setattr(release, field, item.get(field))
+
+        release.extra = {
+            key: value for key, value in item.items() if key not in APP_RELEASE_FIELDS
+        } or None
+
+        return release
+
+    @classmethod
+    def from_attribute_map(
+        cls, attributes: AttributeMap, exclude: Collection[str] = ()
+    ) -> "AppRelease":
+        # Converte direto do formato do client, sem montar um dict intermediário;
+        # atributos em `exclude` (como os de shard) são descartados
+        release = cls.__new__(cls)
+
+        for field in APP_RELEASE_FIELDS:
+            value = attributes.get(field)
+            setattr(release, field, None if value is None else deserialize_value(value))
+
+        extra = {
+            key: value
+            for key, value in attributes.items()
+            if key not in APP_RELEASE_FIELDS and key not in exclude
+        }
+        release.extra = deserialize_map(extra) if extra else None
+
+        return release
+
+    def to_item(self) -> Dict[str, Any]:
+        # Campos vazios não são gravados, como nos itens montados pelos builders
+        item = {}
+
+        for field in APP_RELEASE_FIELDS:
+            value = getattr(self, field)
+
+            if value is not None:
+                item[field] = value
+
+        if self.extra:
+            item.update(self.extra)
+
+        return item
+
+    def to_attribute_map(self) -> AttributeMap:
+        attributes = {}
+
+        for field in APP_RELEASE_FIELDS:
+            value = getattr(self, field)
+
+            if value is not None:
+                attributes[field] = serialize_value(value)
+
+        if self.extra:
+            attributes.update(serialize_map(self.extra))
+
+        return attributes
@@ -1,8 +1,29 @@
-from base_repository import BaseRepository
-from typing import Optional, Dict, Any, List
+import functools
+from app_release import AppRelease
+from base_repository import BaseRepository, DEFAULT_PAGE_SIZE
+from client_table import ClientTable
+from cursor_codec import CursorCodec
+from dynamo_db_utils import (
+    DynamoDBUtils as utils,
+    VERSION_NUMBER_MAX_DIGITS,
+    VERSION_NUMBER_PATTERN,
+)
+from query_planner import QueryPlan
+from rate_limiter import READ_CAPACITY
+from release_cache import ReleaseCache
+from instrumentation import Instrumentation
+from retry_policy import RetryPolicy
+from typing import Optional, Dict, Any, List, Iterator, Tuple, Callable, Union
 
 RANGE_KEY_ITENS = ["mdm", "version_name"]
 
+# Com as_records, as leituras devolvem AppRelease em vez de dicts
+Release = Union[Dict[str, Any], AppRelease]
+
+# Com versões ordenáveis, o id_range guarda a versão codificada e a ordem da
+# chave de ordenação passa a ser a ordem das versões
+SORTABLE_RANGE_KEY_ENCODERS = {"version_name": utils.encode_version}
+
 GSI_KEY_SCHEMAS = [
     {
         "index_name": "mdm-version_name-index",
@@ -13,6 +34,58 @@ GSI_KEY_SCHEMAS = [
     {"index_name": "stage-index", "HASH": "stage"},
 ]
 
+# O índice por estágio concentra toda a produção numa única partição; com
+# shards, a chave vira "stage#<shard>" (atributo stage_shard), derivada do id
+STAGE_SHARD_INDEX_NAME = "stage_shard-index"
+
+
+# Índice das mudanças: o hash é a hora do updated_at (atributo updated_bucket)
+CHANGES_INDEX_NAME = "updated_bucket-updated_at-index"
+CHANGES_TIME_BUCKET = "hour"
+# Sem shards, todas as escritas da hora cairiam numa única partição do índice
+DEFAULT_CHANGE_SHARDS = 4
+
+
+def build_changes_gsi_key_schema(
+    change_shards: int = DEFAULT_CHANGE_SHARDS,
+) -> Dict[str, Any]:
+    if change_shards < 1:
+        raise ValueError("Change tracking requires at least one change shard")
+
+    # As escritas de uma mesma hora se dividem entre as partições dos shards
+    return {
+        "index_name": CHANGES_INDEX_NAME,
+        "HASH": "updated_bucket",
+        "RANGE": "updated_at",
+        "TIME_BUCKET": CHANGES_TIME_BUCKET,
+        "SHARDS": change_shards,
+    }
+
+
+def build_gsi_key_schemas(
+    stage_shards: int = 0,
+    track_changes: bool = False,
+    change_shards: int = DEFAULT_CHANGE_SHARDS,
+) -> List[Dict[str, Any]]:
+    gsi_key_schemas = GSI_KEY_SCHEMAS
+
+    if stage_shards:
+        gsi_key_schemas = GSI_KEY_SCHEMAS[:-1] + [
+            {
+                "index_name": STAGE_SHARD_INDEX_NAME,
+                "HASH": "stage",
+                "SHARDS": stage_shards,
+            }
+        ]
+
+    if track_changes:
+        gsi_key_schemas = gsi_key_schemas + [
+            build_changes_gsi_key_schema(change_shards)
+        ]
+
+    return gsi_key_schemas
+
+
 STAGE_PILOT = "pilot"
 STAGE_PRODUCTION = "production"
 
@@ -28,142 +101,446 @@ APPS_DEFAULT_STAGE = STAGE_PRODUCTION
 APPS_DEFAULT_STATUS = [STATUS_ROLLOUT]
 APP_DEFAULT_STATUS = [STATUS_PENDING, STATUS_APPROVED, STATUS_ROLLOUT]
 
+APPS_PROJECTION_EXPRESSION = ["id", "mdm", "version_name", "stage", "status"]
+
+
+CacheEntry = Tuple[Tuple[Any, ...], Tuple[str, str]]
+
+
+def build_cancel_previous_versions(
+    package_name: str,
+    mdm: str,
+    version_name: str,
+    stage: str,
+    old_status: str,
+    new_status: str,
+) -> Dict[str, Any]:
+    return {
+        "key_condition": {"id": package_name, "mdm": mdm},
+        "filter_condition": {
+            "version_name#ne": version_name,
+            "stage": stage,
+            "status": old_status,
+        },
+        "update_items": {"status": new_status},
+    }
+
+
+def build_transition(
+    package_name: str,
+    mdm: str,
+    version_name: str,
+    stage: str,
+    old_status: str,
+    new_status: str,
+    id_range: str,
+    filter_condition: Dict[str, Any],
+    update_items: Dict[str, Any],
+) -> List[Dict[str, Any]]:
+    # Rebaixa as versões anteriores e promove a versão alvo na mesma transação
+    return [
+        build_cancel_previous_versions(
+            package_name, mdm, version_name, stage, old_status, new_status
+        ),
+        {
+            "key_condition": {"id": package_name, "id_range": id_range},
+            "filter_condition": filter_condition,
+            "update_items": update_items,
+        },
+    ]
+
+
+# As operações abaixo são compartilhadas pelos repositórios síncrono e assíncrono
+def build_pilot_cancel(
+    package_name: str, mdm: str, version_name: str
+) -> Dict[str, Any]:
+    return build_cancel_previous_versions(
+        package_name, mdm, version_name, STAGE_PILOT, STATUS_PENDING, STATUS_CANCELED
+    )
+
+
+def build_pilot_item(
+    package_name: str, mdm: str, mdm_key: Dict[str, Any], version_name: str
+) -> Dict[str, Any]:
+    return {
+        "id": package_name,
+        "mdm": mdm,
+        "mdm_key": mdm_key,
+        "version_name": version_name,
+        "stage": STAGE_PILOT,
+        "status": STATUS_PENDING,
+    }
+
+
+def build_pilot_approve_transition(
+    package_name: str, mdm: str, version_name: str, id_range: str
+) -> List[Dict[str, Any]]:
+    return build_transition(
+        package_name,
+        mdm,
+        version_name,
+        STAGE_PILOT,
+        STATUS_APPROVED,
+        STATUS_CANCELED,
+        id_range,
+        filter_condition={"stage": STAGE_PILOT, "status": STATUS_PENDING},
+        update_items={"status": STATUS_APPROVED},
+    )
+
+
+def build_pilot_reprove(package_name: str, id_range: str) -> Dict[str, Any]:
+    return {
+        "key_condition": {"id": package_name, "id_range": id_range},
+        "filter_condition": {"stage": STAGE_PILOT, "status": STATUS_PENDING},
+        "update_items": {"status": STATUS_REPROVED},
+    }
+
+
+def build_rollout_transition(
+    package_name: str, mdm: str, version_name: str, id_range: str
+) -> List[Dict[str, Any]]:
+    return build_transition(
+        package_name,
+        mdm,
+        version_name,
+        STAGE_PRODUCTION,
+        STATUS_ROLLOUT,
+        STATUS_PREVIOUS,
+        id_range,
+        filter_condition={"stage": STAGE_PILOT, "status": STATUS_APPROVED},
+        update_items={"stage": STAGE_PRODUCTION, "status": STATUS_ROLLOUT},
+    )
+
+
+def build_app_query(package_name: str, status: List[str]) -> Dict[str, Any]:
+    return {
+        "key_condition": {"id": package_name},
+        "filter_condition": {"status#in": status},
+    }
+
+
+def build_all_apps_query(stage: str, status: List[str]) -> Dict[str, Any]:
+    return {
+        "key_condition": {"stage": stage},
+        "filter_condition": {"status#in": status},
+        "projection_expression": APPS_PROJECTION_EXPRESSION,
+    }
+
+
+def build_latest_release_plan(
+    package_name: str, mdm: str, stage: str, status: Optional[List[str]]
+) -> QueryPlan:
+    # A consulta vai direto à tabela: só o id_range segue a ordem das versões
+    filter_condition = {"stage": stage}
+
+    if status:
+        filter_condition["status#in"] = status
+
+    return QueryPlan(
+        None,
+        None,
+        {"id": package_name, "id_range#begins_with": f"{mdm}#"},
+        filter_condition,
+    )
+
+
+def build_app_cache_entry(package_name: str, status: List[str]) -> CacheEntry:
+    return ("app", package_name, tuple(status)), ("package", package_name)
+
+
+def build_all_apps_cache_entry(stage: str, status: List[str]) -> CacheEntry:
+    return ("apps", stage, tuple(status)), ("stage", stage)
+
 
 class AppReleaseRepository(BaseRepository):
-    def __init__(self, table_name: str):
+    # Poucos estágios e status: índices com esses hashes leem partições grandes
+    attribute_cardinality = {"stage": 2, "status": 6, "mdm": 10}
+
+    def __init__(
+        self,
+        table_name: str,
+        rate_limited: bool = False,
+        retry_policy: Optional[RetryPolicy] = None,
+        instrumentation: Optional[Instrumentation] = None,
+        cache: Optional[ReleaseCache] = None,
+        stage_shards: int = 0,
+        sortable_versions: bool = False,
+        cursor_codec: Optional[CursorCodec] = None,
+        single_flight: bool = False,
+        track_changes: bool = False,
+        change_shards: int = DEFAULT_CHANGE_SHARDS,
+        as_records: bool = False,
+        low_level_client: bool = False,
+    ):
         super().__init__(
             table_name,
             range_key_items=RANGE_KEY_ITENS,
-            gsi_key_schemas=GSI_KEY_SCHEMAS,
+            gsi_key_schemas=build_gsi_key_schemas(
+                stage_shards, track_changes, change_shards
+            ),
+            rate_limited=rate_limited,
+            retry_policy=retry_policy,
+            instrumentation=instrumentation,
+            range_key_encoders=(
+                SORTABLE_RANGE_KEY_ENCODERS if sortable_versions else {}
+            ),
+            cursor_codec=cursor_codec,
+            single_flight=single_flight,
+            low_level_client=low_level_client,
         )
 
-    def __cancel_previous_versions(
+        self.cache = cache
+        self.sortable_versions = sortable_versions
+        self.as_records = as_records
+
+        # Pelo client de baixo nível, as leituras de releases montam o AppRelease
+        # direto do formato do client, sem o dict intermediário
+        if as_records and low_level_client:
+            shard_attributes = {
+                utils.get_shard_attribute(gsi_key_schema)
+                for gsi_key_schema in self.gsi_key_schemas
+            } - {None}
+            self.record_table = ClientTable(
+                table_name,
+                deserialize=functools.partial(
+                    AppRelease.from_attribute_map, exclude=shard_attributes
+                ),
+            )
+
+    @property
+    def converts_to_records(self) -> bool:
+        # Sem a tabela de registros, os dicts lidos são convertidos depois
+        return self.as_records and self.record_table is None
+
+    def build_release(self, item: Dict[str, Any]) -> Release:
+        return AppRelease.from_item(item) if self.converts_to_records else item
+
+    def build_releases(self, items: List[Dict[str, Any]]) -> List[Release]:
+        if not self.converts_to_records:
+            return items
+
+        return [AppRelease.from_item(item) for item in items]
+
+    def iter_releases(self, items: Iterator[Dict[str, Any]]) -> Iterator[Release]:
+        return map(AppRelease.from_item, items) if self.converts_to_records else items
+
+    def validate_version_name(self, version_name: str) -> None:
+        # A codificação ordenável prefixa cada número com o comprimento em um
+        # único dígito; a versão é rejeitada antes de qualquer escrita
+        if self.sortable_versions and any(
+            len(number) > VERSION_NUMBER_MAX_DIGITS
+            for number in VERSION_NUMBER_PATTERN.findall(str(version_name))
+        ):
+            raise ValueError(
+                f"Invalid version name {version_name!r}: sortable versions support "
+                f"numbers up to {VERSION_NUMBER_MAX_DIGITS} digits"
+            )
+
+    def build_release_range_key(self, mdm: str, version_name: str) -> str:
+        return self.build_range_key({"mdm": mdm, "version_name": version_name})
+
+    def build_latest_release_params(
         self,
         package_name: str,
         mdm: str,
-        version_name: str,
         stage: str,
-        old_status: str,
-        new_status: str,
-    ) -> None:
-        self.update(
-            key_condition={"id": package_name, "mdm": mdm},
-            filter_condition={
-                "version_name#ne": version_name,
-                "stage": stage,
-                "status": old_status,
-            },
-            update_items={"status": new_status},
+        status: Optional[List[str]],
+        last_evaluated_key: Optional[Dict[str, Any]],
+    ) -> Dict[str, Any]:
+        if not self.sortable_versions:
+            raise ValueError("Latest release lookup requires sortable versions")
+
+        # A primeira leitura traz só a maior versão; se o filtro a descartar,
+        # as seguintes leem páginas cheias em vez de um item por vez
+        limit = None if last_evaluated_key else 1
+        params = self.build_query_params(
+            build_latest_release_plan(package_name, mdm, stage, status),
+            None,
+            last_evaluated_key,
+            limit,
         )
+        params["ScanIndexForward"] = False
+
+        return params
+
+    def invalidate_cache(self, package_name: str, *stages: str) -> None:
+        if self.cache is not None:
+            self.cache.invalidate(
+                ("package", package_name), *[("stage", stage) for stage in stages]
+            )
 
     def pilot_app(
         self, package_name: str, mdm: str, mdm_key: Dict[str, Any], version_name: str
     ) -> Optional[str]:
-        # Cancela todas as versões pendentes do pacote
-        self.__cancel_previous_versions(
-            package_name,
-            mdm,
-            version_name,
-            STAGE_PILOT,
-            STATUS_PENDING,
-            STATUS_CANCELED,
-        )
+        self.validate_version_name(version_name)
 
-        # Insere a versão piloto
-        item = {
-            "id": package_name,
-            "mdm": mdm,
-            "mdm_key": mdm_key,
-            "version_name": version_name,
-            "stage": STAGE_PILOT,
-            "status": STATUS_PENDING,
-        }
+        try:
+            # Cancela todas as versões pendentes do pacote
+            self.update(**build_pilot_cancel(package_name, mdm, version_name))
 
-        return self.insert(item)
+            # Insere a versão piloto
+            return self.insert(
+                build_pilot_item(package_name, mdm, mdm_key, version_name)
+            )
+        finally:
+            self.invalidate_cache(package_name, STAGE_PILOT)
 
     def pilot_approve_app(
         self, package_name: str, mdm: str, version_name: str
     ) -> Optional[str]:
-        self.__cancel_previous_versions(
-            package_name,
-            mdm,
-            version_name,
-            STAGE_PILOT,
-            STATUS_APPROVED,
-            STATUS_CANCELED,
-        )
+        self.validate_version_name(version_name)
 
-        self.update(
-            key_condition={"id": package_name, "id_range": f"{mdm}#{version_name}"},
-            filter_condition={"stage": STAGE_PILOT, "status": STATUS_PENDING},
-            update_items={"status": STATUS_APPROVED},
-        )
+        try:
+            self.transact_update(
+                build_pilot_approve_transition(
+                    package_name,
+                    mdm,
+                    version_name,
+                    self.build_release_range_key(mdm, version_name),
+                )
+            )
+        finally:
+            self.invalidate_cache(package_name, STAGE_PILOT)
 
     def pilot_reprove_app(
         self, package_name: str, mdm: str, version_name: str
     ) -> Optional[str]:
-        self.update(
-            key_condition={"id": package_name, "id_range": f"{mdm}#{version_name}"},
-            filter_condition={"stage": STAGE_PILOT, "status": STATUS_PENDING},
-            update_items={"status": STATUS_REPROVED},
-        )
+        self.validate_version_name(version_name)
+
+        try:
+            self.update(
+                **build_pilot_reprove(
+                    package_name, self.build_release_range_key(mdm, version_name)
+                )
+            )
+        finally:
+            self.invalidate_cache(package_name, STAGE_PILOT)
 
     def rollout_app(self, package_name: str, mdm: str, version_name: str) -> None:
-        self.__cancel_previous_versions(
-            package_name,
-            mdm,
-            version_name,
-            STAGE_PRODUCTION,
-            STATUS_ROLLOUT,
-            STATUS_PREVIOUS,
+        self.validate_version_name(version_name)
+
+        try:
+            self.transact_update(
+                build_rollout_transition(
+                    package_name,
+                    mdm,
+                    version_name,
+                    self.build_release_range_key(mdm, version_name),
+                )
+            )
+        finally:
+            self.invalidate_cache(package_name, STAGE_PILOT, STAGE_PRODUCTION)
+
+    def iter_app(
+        self,
+        package_name: str,
+        status: List[str] = APP_DEFAULT_STATUS,
+        prefetch: int = 0,
+    ) -> Iterator[Release]:
+        return self.iter_releases(
+            self.iter_query(
+                **build_app_query(package_name, status),
+                prefetch=prefetch,
+                as_records=self.as_records,
+            )
         )
-        self.update(
-            key_condition={"id": package_name, "id_range": f"{mdm}#{version_name}"},
-            filter_condition={"stage": STAGE_PILOT, "status": STATUS_APPROVED},
-            update_items={"stage": STAGE_PRODUCTION, "status": STATUS_ROLLOUT},
+
+    def iter_all_apps(
+        self,
+        stage: str = APPS_DEFAULT_STAGE,
+        status: List[str] = APPS_DEFAULT_STATUS,
+        prefetch: int = 0,
+    ) -> Iterator[Release]:
+        return self.iter_releases(
+            self.iter_query(
+                **build_all_apps_query(stage, status),
+                prefetch=prefetch,
+                as_records=self.as_records,
+            )
         )
 
+    def __get_cached(
+        self,
+        cache_entry: CacheEntry,
+        loader: Callable[[], List[Release]],
+    ) -> List[Release]:
+        if self.cache is None:
+            return loader()
+
+        key, tag = cache_entry
+
+        # A lista é copiada, mas os itens são compartilhados com o cache
+        return list(self.cache.get_or_load(key, [tag], loader))
+
     def get_app(
         self, package_name: str, status: List[str] = APP_DEFAULT_STATUS
-    ) -> List[Dict[str, Any]]:
-        last_evaluated_key = None
-        items = []
+    ) -> List[Release]:
+        return self.__get_cached(
+            build_app_cache_entry(package_name, status),
+            lambda: list(self.iter_app(package_name, status)),
+        )
 
-        while True:
-            query_items, last_evaluated_key = self.query(
-                key_condition={"id": package_name},
-                filter_condition={"status#in": status},
-                last_evaluated_key=last_evaluated_key,
-            )
+    def get_all_apps(
+        self, stage: str = APPS_DEFAULT_STAGE, status: List[str] = APPS_DEFAULT_STATUS
+    ) -> List[Release]:
+        return self.__get_cached(
+            build_all_apps_cache_entry(stage, status),
+            lambda: list(self.iter_all_apps(stage, status)),
+        )
+
+    def get_app_page(
+        self,
+        package_name: str,
+        status: List[str] = APP_DEFAULT_STATUS,
+        cursor: Optional[str] = None,
+        page_size: int = DEFAULT_PAGE_SIZE,
+    ) -> Tuple[List[Release], Optional[str]]:
+        items, cursor = self.query_page(
+            **build_app_query(package_name, status),
+            cursor=cursor,
+            page_size=page_size,
+            as_records=self.as_records,
+        )
 
-            if query_items:
-                items.extend(query_items)
+        return self.build_releases(items), cursor
 
-            if not last_evaluated_key:
-                break
+    def get_all_apps_page(
+        self,
+        stage: str = APPS_DEFAULT_STAGE,
+        status: List[str] = APPS_DEFAULT_STATUS,
+        cursor: Optional[str] = None,
+        page_size: int = DEFAULT_PAGE_SIZE,
+    ) -> Tuple[List[Release], Optional[str]]:
+        items, cursor = self.query_page(
+            **build_all_apps_query(stage, status),
+            cursor=cursor,
+            page_size=page_size,
+            as_records=self.as_records,
+        )
 
-        return items
+        return self.build_releases(items), cursor
 
-    def get_all_apps(
-        self, stage: str = APPS_DEFAULT_STAGE, status: List[str] = APPS_DEFAULT_STATUS
-    ) -> List[Dict[str, Any]]:
+    def get_latest_release(
+        self,
+        package_name: str,
+        mdm: str,
+        stage: str,
+        status: Optional[List[str]] = None,
+    ) -> Optional[Release]:
         last_evaluated_key = None
-        items = []
-
-        projection_expression = ["id", "mdm", "version_name", "stage", "status"]
 
         while True:
-            query_items, last_evaluated_key = self.query(
-                key_condition={"stage": stage},
-                filter_condition={"status#in": status},
-                projection_expression=projection_expression,
-                last_evaluated_key=last_evaluated_key,
+            params = self.build_latest_release_params(
+                package_name, mdm, stage, status, last_evaluated_key
             )
+            response = self.execute(
+                self.get_read_table(self.as_records).query,
+                params,
+                READ_CAPACITY,
+                "query",
+            )
+            items = response.get("Items", [])
+            last_evaluated_key = response.get("LastEvaluatedKey")
 
-            if query_items:
-                items.extend(query_items)
-
-            if not last_evaluated_key:
-                break
-
-        return items
+            if items or not last_evaluated_key:
+                return self.build_release(items[0]) if items else None
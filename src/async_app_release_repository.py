@@ -0,0 +1,272 @@
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Dict,
+    List,
+    Optional,
+    Tuple,
+)
+from app_release_repository import (
+    AppReleaseRepository,
+    APP_DEFAULT_STATUS,
+    APPS_DEFAULT_STAGE,
+    APPS_DEFAULT_STATUS,
+    DEFAULT_CHANGE_SHARDS,
+    STAGE_PILOT,
+    STAGE_PRODUCTION,
+    CacheEntry,
+    Release,
+    build_all_apps_cache_entry,
+    build_all_apps_query,
+    build_app_cache_entry,
+    build_app_query,
+    build_pilot_approve_transition,
+    build_pilot_cancel,
+    build_pilot_item,
+    build_pilot_reprove,
+    build_rollout_transition,
+)
+from async_base_repository import AsyncBaseRepository, DEFAULT_MAX_CONCURRENCY
+from base_repository import DEFAULT_PAGE_SIZE
+from cursor_codec import CursorCodec
+from instrumentation import Instrumentation
+from release_cache import ReleaseCache
+from retry_policy import RetryPolicy
+
+
+class AsyncAppReleaseRepository(AsyncBaseRepository):
+    def __init__(
+        self,
+        table_name: str,
+        rate_limited: bool = False,
+        retry_policy: Optional[RetryPolicy] = None,
+        instrumentation: Optional[Instrumentation] = None,
+        cache: Optional[ReleaseCache] = None,
+        stage_shards: int = 0,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        sortable_versions: bool = False,
+        cursor_codec: Optional[CursorCodec] = None,
+        single_flight: bool = False,
+        track_changes: bool = False,
+        change_shards: int = DEFAULT_CHANGE_SHARDS,
+        as_records: bool = False,
+        low_level_client: bool = False,
+    ):
+        super().__init__(
+            table_name,
+            max_concurrency=max_concurrency,
+            repository=AppReleaseRepository(
+                table_name,
+                rate_limited=rate_limited,
+                retry_policy=retry_policy,
+                instrumentation=instrumentation,
+                cache=cache,
+                stage_shards=stage_shards,
+                sortable_versions=sortable_versions,
+                cursor_codec=cursor_codec,
+                track_changes=track_changes,
+                change_shards=change_shards,
+                as_records=as_records,
+                low_level_client=low_level_client,
+            ),
+            single_flight=single_flight,
+        )
+
+    @property
+    def cache(self) -> Optional[ReleaseCache]:
+        return self.repository.cache
+
+    async def pilot_app(
+        self, package_name: str, mdm: str, mdm_key: Dict[str, Any], version_name: str
+    ) -> Optional[Dict[str, Any]]:
+        self.repository.validate_version_name(version_name)
+
+        try:
+            # Cancela todas as versões pendentes do pacote
+            await self.update(**build_pilot_cancel(package_name, mdm, version_name))
+
+            # Insere a versão piloto
+            return await self.insert(
+                build_pilot_item(package_name, mdm, mdm_key, version_name)
+            )
+        finally:
+            self.repository.invalidate_cache(package_name, STAGE_PILOT)
+
+    async def pilot_approve_app(
+        self, package_name: str, mdm: str, version_name: str
+    ) -> None:
+        self.repository.validate_version_name(version_name)
+
+        try:
+            await self.transact_update(
+                build_pilot_approve_transition(
+                    package_name,
+                    mdm,
+                    version_name,
+                    self.repository.build_release_range_key(mdm, version_name),
+                )
+            )
+        finally:
+            self.repository.invalidate_cache(package_name, STAGE_PILOT)
+
+    async def pilot_reprove_app(
+        self, package_name: str, mdm: str, version_name: str
+    ) -> None:
+        self.repository.validate_version_name(version_name)
+
+        try:
+            await self.update(
+                **build_pilot_reprove(
+                    package_name,
+                    self.repository.build_release_range_key(mdm, version_name),
+                )
+            )
+        finally:
+            self.repository.invalidate_cache(package_name, STAGE_PILOT)
+
+    async def rollout_app(self, package_name: str, mdm: str, version_name: str) -> None:
+        self.repository.validate_version_name(version_name)
+
+        try:
+            await self.transact_update(
+                build_rollout_transition(
+                    package_name,
+                    mdm,
+                    version_name,
+                    self.repository.build_release_range_key(mdm, version_name),
+                )
+            )
+        finally:
+            self.repository.invalidate_cache(
+                package_name, STAGE_PILOT, STAGE_PRODUCTION
+            )
+
+    async def __iter_releases(
+        self, items: AsyncIterator[Dict[str, Any]]
+    ) -> AsyncIterator[Release]:
+        build_release = self.repository.build_release
+
+        async for item in items:
+            yield build_release(item)
+
+    def iter_releases(
+        self, items: AsyncIterator[Dict[str, Any]]
+    ) -> AsyncIterator[Release]:
+        return (
+            self.__iter_releases(items)
+            if self.repository.converts_to_records
+            else items
+        )
+
+    def iter_app(
+        self, package_name: str, status: List[str] = APP_DEFAULT_STATUS
+    ) -> AsyncIterator[Release]:
+        return self.iter_releases(
+            self.iter_query(
+                **build_app_query(package_name, status),
+                as_records=self.repository.as_records,
+            )
+        )
+
+    def iter_all_apps(
+        self, stage: str = APPS_DEFAULT_STAGE, status: List[str] = APPS_DEFAULT_STATUS
+    ) -> AsyncIterator[Release]:
+        return self.iter_releases(
+            self.iter_query(
+                **build_all_apps_query(stage, status),
+                as_records=self.repository.as_records,
+            )
+        )
+
+    async def __get_cached(
+        self,
+        cache_entry: CacheEntry,
+        loader: Callable[[], Awaitable[List[Release]]],
+    ) -> List[Release]:
+        cache = self.cache
+
+        if cache is None:
+            return await loader()
+
+        key, tag = cache_entry
+        value = cache.get(key)
+
+        if value is None:
+            generations = cache.snapshot_generations([tag])
+            value = await loader()
+            cache.put(key, value, [tag], generations)
+
+        # A lista é copiada, mas os itens são compartilhados com o cache
+        return list(value)
+
+    async def get_app(
+        self, package_name: str, status: List[str] = APP_DEFAULT_STATUS
+    ) -> List[Release]:
+        async def load() -> List[Release]:
+            return [item async for item in self.iter_app(package_name, status)]
+
+        return await self.__get_cached(
+            build_app_cache_entry(package_name, status), load
+        )
+
+    async def get_all_apps(
+        self, stage: str = APPS_DEFAULT_STAGE, status: List[str] = APPS_DEFAULT_STATUS
+    ) -> List[Release]:
+        async def load() -> List[Release]:
+            return [item async for item in self.iter_all_apps(stage, status)]
+
+        return await self.__get_cached(build_all_apps_cache_entry(stage, status), load)
+
+    async def get_app_page(
+        self,
+        package_name: str,
+        status: List[str] = APP_DEFAULT_STATUS,
+        cursor: Optional[str] = None,
+        page_size: int = DEFAULT_PAGE_SIZE,
+    ) -> Tuple[List[Release], Optional[str]]:
+        items, cursor = await self.query_page(
+            **build_app_query(package_name, status),
+            cursor=cursor,
+            page_size=page_size,
+            as_records=self.repository.as_records,
+        )
+
+        return self.repository.build_releases(items), cursor
+
+    async def get_all_apps_page(
+        self,
+        stage: str = APPS_DEFAULT_STAGE,
+        status: List[str] = APPS_DEFAULT_STATUS,
+        cursor: Optional[str] = None,
+        page_size: int = DEFAULT_PAGE_SIZE,
+    ) -> Tuple[List[Release], Optional[str]]:
+        items, cursor = await self.query_page(
+            **build_all_apps_query(stage, status),
+            cursor=cursor,
+            page_size=page_size,
+            as_records=self.repository.as_records,
+        )
+
+        return self.repository.build_releases(items), cursor
+
+    async def get_latest_release(
+        self,
+        package_name: str,
+        mdm: str,
+        stage: str,
+        status: Optional[List[str]] = None,
+    ) -> Optional[Release]:
+        last_evaluated_key = None
+
+        while True:
+            params = self.repository.build_latest_release_params(
+                package_name, mdm, stage, status, last_evaluated_key
+            )
+            response = await self.execute_query(params, self.repository.as_records)
+            items = response.get("Items", [])
+            last_evaluated_key = response.get("LastEvaluatedKey")
+
+            if items or not last_evaluated_key:
+                return self.repository.build_release(items[0]) if items else None
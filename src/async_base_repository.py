@@ -0,0 +1,429 @@
+import asyncio
+import functools
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple
+from botocore.exceptions import BotoCoreError, ClientError
+from aws_clients import get_dynamo_db_client
+from base_repository import BaseRepository, DEFAULT_PAGE_SIZE
+from cursor_codec import CursorCodec
+from dynamo_db_helper import DEFAULT_MAX_ITEM_SIZE, map_transaction_error
+from dynamo_db_utils import DynamoDBUtils as utils
+from instrumentation import Instrumentation
+from rate_limiter import CapacityRateLimiter, READ_CAPACITY, WRITE_CAPACITY
+from retry_policy import RetryPolicy, error_code
+from single_flight import AsyncSingleFlight, build_call_key
+
+DEFAULT_MAX_CONCURRENCY = 16
+
+
+class AsyncBaseRepository:
+    def __init__(
+        self,
+        table_name: str,
+        max_item_size: int = DEFAULT_MAX_ITEM_SIZE,
+        has_range_key: bool = False,
+        range_key_items: List[str] = [],
+        gsi_key_schemas: List[Dict[str, str]] = [],
+        rate_limited: bool = False,
+        retry_policy: Optional[RetryPolicy] = None,
+        instrumentation: Optional[Instrumentation] = None,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        repository: Optional[BaseRepository] = None,
+        cursor_codec: Optional[CursorCodec] = None,
+        single_flight: bool = False,
+        low_level_client: bool = False,
+    ):
+        if max_concurrency < 1:
+            raise ValueError("Max concurrency must be greater than zero")
+
+        # O repositório síncrono fornece o estado da tabela e os mesmos builders
+        # de expressões; aqui só muda a forma de executar as chamadas
+        self.repository = repository or BaseRepository(
+            table_name,
+            max_item_size,
+            has_range_key,
+            range_key_items,
+            gsi_key_schemas,
+            rate_limited,
+            retry_policy,
+            instrumentation,
+            cursor_codec=cursor_codec,
+            single_flight=single_flight,
+            low_level_client=low_level_client,
+        )
+        self.max_concurrency = max_concurrency
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_concurrency, thread_name_prefix="dynamodb"
+        )
+        self.single_flight = AsyncSingleFlight() if single_flight else None
+
+    async def __aenter__(self) -> "AsyncBaseRepository":
+        return self
+
+    async def __aexit__(self, *args) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self.executor.shutdown(wait=True)
+
+    def __table_function(
+        self, method: str, as_records: bool = False
+    ) -> Callable[..., Any]:
+        # A Table é resolvida dentro da thread do executor, que tem a sua própria
+        def call(**params) -> Any:
+            return getattr(self.repository.get_read_table(as_records), method)(**params)
+
+        return call
+
+    async def __call(self, function: Callable[..., Any], params: Dict[str, Any]) -> Any:
+        async with self.semaphore:
+            return await asyncio.get_running_loop().run_in_executor(
+                self.executor, functools.partial(function, **params)
+            )
+
+    async def execute(
+        self,
+        function: Callable[..., Any],
+        params: Dict[str, Any],
+        capacity: str,
+        operation: str,
+        item_count: int = 1,
+    ) -> Dict[str, Any]:
+        repository = self.repository
+        retry_policy = repository.retry_policy
+        rate_limiter = repository.rate_limiter
+        measured = rate_limiter is not None or repository.instrumentation.enabled
+        call_params = (
+            dict(params, ReturnConsumedCapacity="TOTAL") if measured else params
+        )
+        retry_errors: List[str] = []
+        started_at = time.monotonic()
+        perf_started_at = time.perf_counter()
+        estimate = 0.0
+        attempt = 0
+
+        while True:
+            attempt += 1
+
+            if rate_limiter is not None:
+                estimate, wait_time = rate_limiter.reserve(
+                    capacity, operation, item_count
+                )
+
+                if wait_time > 0:
+                    await asyncio.sleep(wait_time)
+
+            try:
+                response = await self.__call(function, call_params)
+            except (ClientError, BotoCoreError) as e:
+                delay = retry_policy.next_delay(e, attempt, started_at)
+
+                if delay is None:
+                    if measured:
+                        repository.record_operation(
+                            operation,
+                            params,
+                            capacity,
+                            perf_started_at,
+                            None,
+                            None,
+                            retry_errors,
+                            error_code(e),
+                        )
+
+                    raise
+
+                # O backoff não ocupa nenhuma thread enquanto aguarda
+                retry_errors.append(error_code(e))
+                await asyncio.sleep(delay)
+                continue
+
+            retry_policy.record_success()
+            break
+
+        if measured:
+            consumed_units = CapacityRateLimiter.consumed_capacity_units(
+                (response or {}).get("ConsumedCapacity")
+            )
+
+            if rate_limiter is not None:
+                rate_limiter.settle(
+                    capacity, operation, estimate, consumed_units, item_count
+                )
+
+            repository.record_operation(
+                operation,
+                params,
+                capacity,
+                perf_started_at,
+                response,
+                consumed_units,
+                retry_errors,
+            )
+
+        return response
+
+    async def insert(
+        self, item: Dict[str, Any], overwrite: bool = False
+    ) -> Optional[Dict[str, Any]]:
+        repository = self.repository
+        params = repository.build_put_item_params(item, overwrite)
+
+        await self.execute(
+            self.__table_function("put_item"), params, WRITE_CAPACITY, "put_item"
+        )
+
+        return repository.build_primary_key(params["Item"])
+
+    async def execute_query(
+        self, params: Dict[str, Any], as_records: bool = False
+    ) -> Dict[str, Any]:
+        return await self.execute(
+            self.__table_function("query", as_records), params, READ_CAPACITY, "query"
+        )
+
+    async def query(
+        self,
+        key_condition: Dict[str, str] = None,
+        filter_condition: Optional[Dict[str, str]] = {},
+        projection_expression: Optional[List[str]] = None,
+        last_evaluated_key: Dict[str, Any] = None,
+        limit: Optional[int] = None,
+        as_records: bool = False,
+    ) -> Tuple[List[Dict[str, Any]], Optional[Dict[str, Any]]]:
+        if self.single_flight is None:
+            return await self.__query(
+                key_condition,
+                filter_condition,
+                projection_expression,
+                last_evaluated_key,
+                limit,
+                as_records,
+            )
+
+        items, last_evaluated_key = await self.single_flight.do(
+            build_call_key(
+                key_condition,
+                filter_condition,
+                projection_expression,
+                last_evaluated_key,
+                limit,
+                as_records,
+            ),
+            lambda: self.__query(
+                key_condition,
+                filter_condition,
+                projection_expression,
+                last_evaluated_key,
+                limit,
+                as_records,
+            ),
+        )
+
+        return list(items), last_evaluated_key
+
+    async def __query(
+        self,
+        key_condition: Dict[str, str],
+        filter_condition: Optional[Dict[str, str]],
+        projection_expression: Optional[List[str]],
+        last_evaluated_key: Optional[Dict[str, Any]],
+        limit: Optional[int],
+        as_records: bool = False,
+    ) -> Tuple[List[Dict[str, Any]], Optional[Dict[str, Any]]]:
+        repository = self.repository
+        as_records = as_records and repository.record_table is not None
+        query = self.__table_function("query", as_records)
+        plan = repository.plan_query(
+            key_condition, filter_condition, projection_expression
+        )
+
+        if plan.shards:
+            shard_params = repository.build_shard_query_params(
+                plan, projection_expression, last_evaluated_key, limit
+            )
+            responses = await asyncio.gather(
+                *[
+                    self.execute(query, params, READ_CAPACITY, "query")
+                    for _, params in shard_params
+                ]
+            )
+
+            return repository.merge_shard_pages(
+                plan.gsi_key_schema,
+                [shard for shard, _ in shard_params],
+                responses,
+                as_records,
+            )
+
+        params = repository.build_query_params(
+            plan, projection_expression, last_evaluated_key, limit
+        )
+        response = await self.execute(query, params, READ_CAPACITY, "query")
+
+        return response.get("Items", []), response.get("LastEvaluatedKey")
+
+    async def query_page(
+        self,
+        key_condition: Dict[str, str] = None,
+        filter_condition: Optional[Dict[str, str]] = {},
+        projection_expression: Optional[List[str]] = None,
+        cursor: Optional[str] = None,
+        page_size: int = DEFAULT_PAGE_SIZE,
+        as_records: bool = False,
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        if page_size < 1:
+            raise ValueError("Page size must be greater than zero")
+
+        cursor_codec = self.repository.cursor_codec
+        scope = CursorCodec.build_scope(
+            key_condition, filter_condition, projection_expression
+        )
+        items, last_evaluated_key = await self.query(
+            key_condition,
+            filter_condition,
+            projection_expression,
+            cursor_codec.decode(cursor, scope),
+            page_size,
+            as_records,
+        )
+
+        return items, cursor_codec.encode(last_evaluated_key, scope)
+
+    async def iter_pages(
+        self,
+        key_condition: Dict[str, str] = None,
+        filter_condition: Optional[Dict[str, str]] = {},
+        projection_expression: Optional[List[str]] = None,
+        last_evaluated_key: Dict[str, Any] = None,
+        limit: Optional[int] = None,
+        as_records: bool = False,
+    ) -> AsyncIterator[List[Dict[str, Any]]]:
+        while True:
+            items, last_evaluated_key = await self.query(
+                key_condition,
+                filter_condition,
+                projection_expression,
+                last_evaluated_key,
+                limit,
+                as_records,
+            )
+
+            if items:
+                yield items
+
+            if not last_evaluated_key:
+                break
+
+    async def iter_query(
+        self,
+        key_condition: Dict[str, str] = None,
+        filter_condition: Optional[Dict[str, str]] = {},
+        projection_expression: Optional[List[str]] = None,
+        last_evaluated_key: Dict[str, Any] = None,
+        limit: Optional[int] = None,
+        as_records: bool = False,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        async for items in self.iter_pages(
+            key_condition,
+            filter_condition,
+            projection_expression,
+            last_evaluated_key,
+            limit,
+            as_records,
+        ):
+            for item in items:
+                yield item
+
+    async def update_item(
+        self,
+        key: Dict[str, Any],
+        filter_condition: Optional[Dict[str, Any]],
+        update_items: Dict[str, Any],
+    ) -> Dict[str, Any]:
+        params = utils.build_update_item_params(
+            key, filter_condition, update_items, self.repository.gsi_key_schemas
+        )
+
+        await self.execute(
+            self.__table_function("update_item"),
+            params,
+            WRITE_CAPACITY,
+            "update_item",
+        )
+
+        return key
+
+    async def update(
+        self,
+        key_condition: Dict[str, str],
+        filter_condition: Optional[Dict[str, str]] = {},
+        update_items: Dict[str, Any] = {},
+    ) -> List[Dict[str, Any]]:
+        repository = self.repository
+
+        if repository.is_primary_key(key_condition):
+            return [
+                await self.update_item(key_condition, filter_condition, update_items)
+            ]
+
+        updated_ids: List[Dict[str, Any]] = []
+
+        # As chaves de cada página são atualizadas em paralelo, limitadas pelo
+        # semáforo; o gather preserva a ordem em que foram lidas
+        async for keys in self.iter_pages(
+            key_condition,
+            filter_condition,
+            projection_expression=repository.primary_keys,
+            limit=repository.max_query_id_items,
+        ):
+            updated_ids += await asyncio.gather(
+                *[self.update_item(key, None, update_items) for key in keys]
+            )
+
+        return updated_ids
+
+    async def transact_update(
+        self, updates: List[Dict[str, Any]]
+    ) -> List[Dict[str, Any]]:
+        repository = self.repository
+        transact_updates = []
+
+        for update in updates:
+            key_condition = update["key_condition"]
+            filter_condition = update.get("filter_condition") or {}
+            update_items = update.get("update_items") or {}
+
+            if repository.is_primary_key(key_condition):
+                keys = [repository.build_primary_key(key_condition)]
+            else:
+                keys = [
+                    key
+                    async for key in self.iter_query(
+                        key_condition,
+                        filter_condition,
+                        projection_expression=repository.primary_keys,
+                        limit=repository.max_query_id_items,
+                    )
+                ]
+
+            # O filtro é reavaliado como condição dentro da transação
+            for key in keys:
+                transact_updates.append((key, filter_condition, update_items))
+
+        transact_items = repository.build_transact_items(transact_updates)
+
+        try:
+            await self.execute(
+                get_dynamo_db_client().transact_write_items,
+                {"TransactItems": transact_items},
+                WRITE_CAPACITY,
+                "transact_write_items",
+                len(transact_items),
+            )
+        except ClientError as e:
+            raise map_transaction_error(e) from e
+
+        return [key for key, _, _ in transact_updates]
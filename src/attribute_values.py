@@ -0,0 +1,112 @@
+from decimal import Decimal
+from typing import Any, Callable, Dict
+from boto3.dynamodb.types import Binary, TypeDeserializer, TypeSerializer
+
+AttributeValue = Dict[str, Any]
+AttributeMap = Dict[str, AttributeValue]
+
+TYPE_SERIALIZER = TypeSerializer()
+TYPE_DESERIALIZER = TypeDeserializer()
+
+
+def deserialize_number(value: str) -> Any:
+    # Inteiros viram int; os demais números mantêm a precisão em Decimal
+    if value.isdigit() or (value[:1] == "-" and value[1:].isdigit()):
+        return int(value)
+
+    return Decimal(value)
+
+
+def serialize_number(value: Any) -> str:
+    if isinstance(value, float):
+        raise TypeError("Float types are not supported. Use Decimal types instead.")
+
+    return str(value)
+
+
+def serialize_set(value: Any) -> AttributeValue:
+    if not value:
+        raise ValueError("Empty sets are not supported by DynamoDB")
+
+    sample = next(iter(value))
+
+    if isinstance(sample, str):
+        return {"SS": list(value)}
+
+    if isinstance(sample, (bytes, bytearray, Binary)):
+        return {"BS": [v.value if isinstance(v, Binary) else bytes(v) for v in value]}
+
+    return {"NS": [serialize_number(v) for v in value]}
+
+
+def serialize_value(value: Any) -> AttributeValue:
+    # Os tipos mais comuns são testados primeiro; bool antes de int
+    if isinstance(value, str):
+        return {"S": value}
+
+    if isinstance(value, bool):
+        return {"BOOL": value}
+
+    if isinstance(value, (int, Decimal, float)):
+        return {"N": serialize_number(value)}
+
+    if value is None:
+        return {"NULL": True}
+
+    if isinstance(value, dict):
+        return {"M": serialize_map(value)}
+
+    if isinstance(value, (list, tuple)):
+        return {"L": [serialize_value(v) for v in value]}
+
+    if isinstance(value, (set, frozenset)):
+        return serialize_set(value)
+
+    if isinstance(value, Binary):
+        return {"B": value.value}
+
+    if isinstance(value, (bytes, bytearray)):
+        return {"B": bytes(value)}
+
+    raise TypeError(f"Unsupported type {type(value).__name__} for value {value!r}")
+
+
+def serialize_map(item: Dict[str, Any]) -> AttributeMap:
+    return {key: serialize_value(value) for key, value in item.items()}
+
+
+DESERIALIZERS: Dict[str, Callable[[Any], Any]] = {
+    "S": lambda value: value,
+    "N": deserialize_number,
+    "BOOL": lambda value: value,
+    "NULL": lambda value: None,
+    "M": lambda value: deserialize_map(value),
+    "L": lambda value: [deserialize_value(v) for v in value],
+    "SS": set,
+    "NS": lambda value: {deserialize_number(v) for v in value},
+    "B": bytes,
+    "BS": lambda value: {bytes(v) for v in value},
+}
+
+
+def deserialize_value(value: AttributeValue) -> Any:
+    # Produz tipos Python simples, sem passar pelo TypeDeserializer do boto3
+    for tag, data in value.items():
+        return DESERIALIZERS[tag](data)
+
+    raise ValueError("Empty attribute value")
+
+
+def deserialize_map(attributes: AttributeMap) -> Dict[str, Any]:
+    return {key: deserialize_value(value) for key, value in attributes.items()}
+
+
+def serialize_typed_map(item: Dict[str, Any]) -> AttributeMap:
+    # Mesmos tipos do resource do boto3: números vão e voltam como Decimal
+    return {key: TYPE_SERIALIZER.serialize(value) for key, value in item.items()}
+
+
+def deserialize_typed_map(attributes: AttributeMap) -> Dict[str, Any]:
+    return {
+        key: TYPE_DESERIALIZER.deserialize(value) for key, value in attributes.items()
+    }
@@ -0,0 +1,167 @@
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+import boto3
+from botocore.config import Config
+
+DYNAMO_DB_SERVICE = "dynamodb"
+DYNAMO_DB_STREAMS_SERVICE = "dynamodbstreams"
+
+DEFAULT_MAX_POOL_CONNECTIONS = 50
+DEFAULT_CONNECT_TIMEOUT = 2
+DEFAULT_READ_TIMEOUT = 10
+DEFAULT_TABLE_DESCRIPTION_TTL = 300
+
+
+def build_client_config(
+    max_pool_connections: int = DEFAULT_MAX_POOL_CONNECTIONS,
+    connect_timeout: float = DEFAULT_CONNECT_TIMEOUT,
+    read_timeout: float = DEFAULT_READ_TIMEOUT,
+    tcp_keepalive: bool = True,
+) -> Config:
+    # As repetições ficam a cargo da RetryPolicy, então o botocore tenta uma vez só;
+    # erros de conexão e de timeout também são repetidos por ela
+    return Config(
+        max_pool_connections=max_pool_connections,
+        connect_timeout=connect_timeout,
+        read_timeout=read_timeout,
+        tcp_keepalive=tcp_keepalive,
+        retries={"mode": "standard", "total_max_attempts": 1},
+    )
+
+
+class ClientRegistry:
+    def __init__(
+        self, config: Optional[Config] = None, region_name: Optional[str] = None
+    ):
+        self.config = config or build_client_config()
+        self.region_name = region_name
+        self.lock = threading.Lock()
+        self.local = threading.local()
+        self.session: Optional[boto3.session.Session] = None
+        self.client: Optional[Any] = None
+        self.streams_client: Optional[Any] = None
+
+    def configure(
+        self, config: Optional[Config] = None, region_name: Optional[str] = None
+    ) -> None:
+        with self.lock:
+            self.config = config or build_client_config()
+            self.region_name = region_name
+            self.__reset()
+
+    def reset(self) -> None:
+        with self.lock:
+            self.__reset()
+
+    def __reset(self) -> None:
+        self.session = None
+        self.client = None
+        self.streams_client = None
+        self.local = threading.local()
+
+    def __get_session(self) -> boto3.session.Session:
+        if self.session is None:
+            self.session = boto3.session.Session(region_name=self.region_name)
+
+        return self.session
+
+    def get_client(self) -> Any:
+        # Clients de baixo nível são thread-safe e compartilhados pelo processo
+        client = self.client
+
+        if client is None:
+            with self.lock:
+                if self.client is None:
+                    self.client = self.__get_session().client(
+                        DYNAMO_DB_SERVICE, config=self.config
+                    )
+
+                client = self.client
+
+        return client
+
+    def get_streams_client(self) -> Any:
+        client = self.streams_client
+
+        if client is None:
+            with self.lock:
+                if self.streams_client is None:
+                    self.streams_client = self.__get_session().client(
+                        DYNAMO_DB_STREAMS_SERVICE, config=self.config
+                    )
+
+                client = self.streams_client
+
+        return client
+
+    def get_resource(self) -> Any:
+        # Resources não são thread-safe, então cada thread tem o seu
+        resource = getattr(self.local, "resource", None)
+
+        if resource is None:
+            with self.lock:
+                resource = self.__get_session().resource(
+                    DYNAMO_DB_SERVICE, config=self.config
+                )
+                self.local.resource = resource
+
+        return resource
+
+
+class TableDescriptionCache:
+    def __init__(
+        self,
+        ttl: float = DEFAULT_TABLE_DESCRIPTION_TTL,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.ttl = ttl
+        self.clock = clock
+        self.descriptions: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+        self.lock = threading.Lock()
+
+    def get(
+        self, table_name: str, loader: Callable[[str], Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        with self.lock:
+            cached = self.descriptions.get(table_name)
+
+        if cached is not None and self.clock() < cached[0]:
+            return cached[1]
+
+        description = loader(table_name)
+
+        with self.lock:
+            self.descriptions[table_name] = (self.clock() + self.ttl, description)
+
+        return description
+
+    def invalidate(self, table_name: Optional[str] = None) -> None:
+        with self.lock:
+            if table_name is None:
+                self.descriptions.clear()
+            else:
+                self.descriptions.pop(table_name, None)
+
+
+CLIENT_REGISTRY = ClientRegistry()
+TABLE_DESCRIPTION_CACHE = TableDescriptionCache()
+
+
+def get_dynamo_db_client() -> Any:
+    return CLIENT_REGISTRY.get_client()
+
+
+def get_dynamo_db_streams_client() -> Any:
+    return CLIENT_REGISTRY.get_streams_client()
+
+
+def get_dynamo_db_resource() -> Any:
+    return CLIENT_REGISTRY.get_resource()
+
+
+def describe_table(table_name: str) -> Dict[str, Any]:
+    return TABLE_DESCRIPTION_CACHE.get(
+        table_name,
+        lambda table_name: get_dynamo_db_client().describe_table(TableName=table_name),
+    )
@@ -1,8 +1,32 @@
-from typing import List, Dict, Any, Optional, Tuple
-from dynamo_db_helper import DynamoDBHelper, DEFAULT_MAX_ITEM_SIZE
-from dynamo_db_utils import DynamoDBUtils as utils
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from itertools import islice
+from typing import List, Dict, Any, Optional, Tuple, Iterator, Union
+from botocore.exceptions import ClientError
+from cursor_codec import CursorCodec, DEFAULT_CURSOR_CODEC
+from dynamo_db_helper import (
+    DynamoDBHelper,
+    DEFAULT_MAX_ITEM_SIZE,
+    GSI_HASH_KEY,
+    GSI_RANGE_KEY,
+    GSI_TIME_BUCKET_KEY,
+    PartialUpdateError,
+    RESULT_ERROR,
+    RESULT_KEY,
+)
+from instrumentation import Instrumentation
+from retry_policy import RetryPolicy
+from dynamo_db_utils import DynamoDBUtils as utils, RangeKeyEncoders
+from page_prefetcher import PagePrefetcher, ParallelPagePrefetcher
+from rate_limiter import WRITE_CAPACITY
+from single_flight import SingleFlight, build_call_key
 
 EXECUTION_TRIES = 5
+UPDATE_MAX_WORKERS = 16
+DEFAULT_PAGE_SIZE = 50
+DEFAULT_SCAN_SEGMENTS = 4
+# Uma semana de períodos por hora; janelas maiores ficam para a varredura
+DEFAULT_CHANGES_MAX_BUCKETS = 7 * 24
 
 
 class BaseRepository(DynamoDBHelper):
@@ -13,16 +37,47 @@ class BaseRepository(DynamoDBHelper):
         has_range_key: bool = False,
         range_key_items: List[str] = [],
         gsi_key_schemas: List[Dict[str, str]] = [],
+        rate_limited: bool = False,
+        retry_policy: Optional[RetryPolicy] = None,
+        instrumentation: Optional[Instrumentation] = None,
+        range_key_encoders: RangeKeyEncoders = {},
+        cursor_codec: Optional[CursorCodec] = None,
+        single_flight: bool = False,
+        low_level_client: bool = False,
     ):
         super().__init__(
-            table_name, max_item_size, has_range_key, range_key_items, gsi_key_schemas
+            table_name,
+            max_item_size,
+            has_range_key,
+            range_key_items,
+            gsi_key_schemas,
+            rate_limited,
+            retry_policy,
+            instrumentation,
+            range_key_encoders,
+            low_level_client,
         )
 
+        self.cursor_codec = cursor_codec or DEFAULT_CURSOR_CODEC
+        self.single_flight = SingleFlight() if single_flight else None
+
     def insert(
         self, item: Dict[str, Any] = [], overwrite: bool = False
     ) -> Optional[str]:
         return self.put_item(self.table.put_item, item, overwrite)
 
+    def insert_many(
+        self, items: List[Dict[str, Any]], overwrite: bool = False
+    ) -> List[Dict[str, Any]]:
+        # Como no insert, o padrão não sobrescreve: cada item segue pelo put_item
+        # condicional, um por chamada. Com overwrite=True, os itens são gravados
+        # em lotes via BatchWriteItem, que não aceita ConditionExpression. Os
+        # resultados vêm na ordem de `items`.
+        if overwrite:
+            return self.batch_put_items(items)
+
+        return self.put_items(self.table.put_item, items, False)
+
     def query(
         self,
         key_condition: Dict[str, str] = None,
@@ -30,7 +85,31 @@ class BaseRepository(DynamoDBHelper):
         projection_expression: Optional[List[str]] = None,
         last_evaluated_key: Dict[str, Any] = None,
         limit: Optional[int] = None,
+        as_records: bool = False,
     ) -> Tuple[List[Dict[str, Any]], str]:
+        if self.single_flight is not None:
+            # Leituras idênticas simultâneas compartilham a mesma chamada; a
+            # lista é copiada, mas os itens são compartilhados entre elas
+            items, last_evaluated_key = self.single_flight.do(
+                build_call_key(
+                    key_condition,
+                    filter_condition,
+                    projection_expression,
+                    last_evaluated_key,
+                    limit,
+                    as_records,
+                ),
+                lambda: self.get(
+                    key_condition,
+                    filter_condition,
+                    projection_expression,
+                    last_evaluated_key,
+                    limit,
+                    as_records,
+                ),
+            )
+
+            return list(items), last_evaluated_key
 
         items, last_evaluated_key = self.get(
             key_condition,
@@ -38,15 +117,341 @@ class BaseRepository(DynamoDBHelper):
             projection_expression,
             last_evaluated_key,
             limit,
+            as_records,
         )
 
         return items, last_evaluated_key
 
+    def query_page(
+        self,
+        key_condition: Dict[str, str] = None,
+        filter_condition: Optional[Dict[str, str]] = {},
+        projection_expression: Optional[List[str]] = None,
+        cursor: Optional[str] = None,
+        page_size: int = DEFAULT_PAGE_SIZE,
+        as_records: bool = False,
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        if page_size < 1:
+            raise ValueError("Page size must be greater than zero")
+
+        # Uma única leitura por página: com filtro, a página pode vir com menos
+        # itens (ou vazia) e ainda assim ter um próximo cursor
+        scope = CursorCodec.build_scope(
+            key_condition, filter_condition, projection_expression
+        )
+        items, last_evaluated_key = self.query(
+            key_condition,
+            filter_condition,
+            projection_expression,
+            self.cursor_codec.decode(cursor, scope),
+            page_size,
+            as_records,
+        )
+
+        return items, self.cursor_codec.encode(last_evaluated_key, scope)
+
+    def iter_pages(
+        self,
+        key_condition: Dict[str, str] = None,
+        filter_condition: Optional[Dict[str, str]] = {},
+        projection_expression: Optional[List[str]] = None,
+        last_evaluated_key: Dict[str, Any] = None,
+        limit: Optional[int] = None,
+        prefetch: int = 0,
+        as_records: bool = False,
+    ) -> Iterator[List[Dict[str, Any]]]:
+        def fetch_page(
+            last_evaluated_key: Optional[Dict[str, Any]]
+        ) -> Tuple[List[Dict[str, Any]], Optional[Dict[str, Any]]]:
+            return self.query(
+                key_condition,
+                filter_condition,
+                projection_expression,
+                last_evaluated_key,
+                limit,
+                as_records,
+            )
+
+        if prefetch:
+            # A próxima página é buscada em background enquanto a atual é consumida
+            with PagePrefetcher(fetch_page, last_evaluated_key, prefetch) as pages:
+                yield from pages
+
+            return
+
+        while True:
+            items, last_evaluated_key = fetch_page(last_evaluated_key)
+
+            if items:
+                yield items
+
+            if not last_evaluated_key:
+                break
+
+    def iter_query(
+        self,
+        key_condition: Dict[str, str] = None,
+        filter_condition: Optional[Dict[str, str]] = {},
+        projection_expression: Optional[List[str]] = None,
+        last_evaluated_key: Dict[str, Any] = None,
+        limit: Optional[int] = None,
+        prefetch: int = 0,
+        as_records: bool = False,
+    ) -> Iterator[Dict[str, Any]]:
+        for items in self.iter_pages(
+            key_condition,
+            filter_condition,
+            projection_expression,
+            last_evaluated_key,
+            limit,
+            prefetch,
+            as_records,
+        ):
+            yield from items
+
+    def iter_scan(
+        self,
+        projection_expression: Optional[List[str]] = None,
+        last_evaluated_key: Dict[str, Any] = None,
+        limit: Optional[int] = None,
+    ) -> Iterator[Dict[str, Any]]:
+        while True:
+            items, last_evaluated_key = self.scan(
+                projection_expression, last_evaluated_key, limit
+            )
+
+            yield from items
+
+            if not last_evaluated_key:
+                break
+
+    def iter_parallel_scan_pages(
+        self,
+        total_segments: int = DEFAULT_SCAN_SEGMENTS,
+        projection_expression: Optional[List[str]] = None,
+        limit: Optional[int] = None,
+    ) -> Iterator[List[Dict[str, Any]]]:
+        if total_segments < 1:
+            raise ValueError("Total segments must be greater than zero")
+
+        def build_fetch_page(segment: int):
+            def fetch_page(last_evaluated_key: Optional[Dict[str, Any]]):
+                return self.scan(
+                    projection_expression,
+                    last_evaluated_key,
+                    limit,
+                    segment,
+                    total_segments,
+                )
+
+            return fetch_page
+
+        # Cada segmento é lido por uma thread; a fila limita as páginas em memória
+        with ParallelPagePrefetcher(
+            [build_fetch_page(segment) for segment in range(total_segments)],
+            total_segments * 2,
+        ) as pages:
+            yield from pages
+
+    def iter_parallel_scan(
+        self,
+        total_segments: int = DEFAULT_SCAN_SEGMENTS,
+        projection_expression: Optional[List[str]] = None,
+        limit: Optional[int] = None,
+    ) -> Iterator[Dict[str, Any]]:
+        for items in self.iter_parallel_scan_pages(
+            total_segments, projection_expression, limit
+        ):
+            yield from items
+
+    def migrate_range_keys(
+        self, key_condition: Optional[Dict[str, str]] = None
+    ) -> List[Dict[str, Any]]:
+        # Regrava com a chave atual os itens cujo id_range foi montado com outra
+        # codificação; itens já migrados são ignorados, então pode ser repetido
+        if key_condition:
+            items = self.iter_query(key_condition)
+        else:
+            items = self.iter_scan()
+
+        migrated_ids = []
+
+        for item in items:
+            migrated_id = self.migrate_range_key(item)
+
+            if migrated_id is not None:
+                migrated_ids.append(migrated_id)
+
+        return migrated_ids
+
+    def changes_since(
+        self,
+        since: Union[str, datetime],
+        cursor: Optional[str] = None,
+        page_size: int = DEFAULT_PAGE_SIZE,
+        max_buckets: int = DEFAULT_CHANGES_MAX_BUCKETS,
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        if page_size < 1:
+            raise ValueError("Page size must be greater than zero")
+
+        gsi_key_schema = self.get_time_bucket_key_schema()
+        hash_key = gsi_key_schema[GSI_HASH_KEY]
+        range_key = gsi_key_schema[GSI_RANGE_KEY]
+        time_bucket = gsi_key_schema[GSI_TIME_BUCKET_KEY]
+        since = utils.format_timestamp(since)
+        scope = CursorCodec.build_scope("changes_since", since)
+        position = self.cursor_codec.decode(cursor, scope) or {}
+
+        # Percorre os períodos do since até o atual; o cursor guarda o período
+        # e a posição dentro dele. Cada período custa ao menos uma query, então
+        # janelas longas demais são recusadas
+        buckets = list(
+            islice(
+                utils.iter_time_buckets(
+                    utils.get_time_bucket(since, time_bucket),
+                    utils.get_time_bucket(datetime.utcnow(), time_bucket),
+                    time_bucket,
+                ),
+                max_buckets + 1,
+            )
+        )
+
+        if len(buckets) > max_buckets:
+            raise ValueError(
+                f"Changes since {since} span more than {max_buckets} {time_bucket} "
+                "buckets; use iter_parallel_scan for longer windows"
+            )
+
+        if position.get("bucket"):
+            buckets = buckets[buckets.index(position["bucket"]) :]
+        last_evaluated_key = position.get("key")
+        items: List[Dict[str, Any]] = []
+
+        for idx, bucket in enumerate(buckets):
+            while True:
+                page, last_evaluated_key = self.query(
+                    {hash_key: bucket, f"{range_key}#gte": since},
+                    None,
+                    None,
+                    last_evaluated_key,
+                    page_size - len(items),
+                )
+                items += page
+
+                if not last_evaluated_key:
+                    break
+
+                if len(items) >= page_size:
+                    next_position = {"bucket": bucket, "key": last_evaluated_key}
+
+                    return items, self.cursor_codec.encode(next_position, scope)
+
+            if len(items) >= page_size and idx + 1 < len(buckets):
+                next_position = {"bucket": buckets[idx + 1]}
+
+                return items, self.cursor_codec.encode(next_position, scope)
+
+        return items, None
+
+    def backfill_time_buckets(self) -> int:
+        # Itens gravados antes do índice existir não têm o período preenchido
+        gsi_key_schema = self.get_time_bucket_key_schema()
+        hash_key = gsi_key_schema[GSI_HASH_KEY]
+        range_key = gsi_key_schema[GSI_RANGE_KEY]
+        count = 0
+
+        for item in self.iter_scan(self.primary_keys + [hash_key, range_key]):
+            if hash_key in item or range_key not in item:
+                continue
+
+            attributes = utils.add_shard_keys(
+                utils.add_time_bucket_keys(
+                    {range_key: item[range_key]}, [gsi_key_schema]
+                ),
+                [gsi_key_schema],
+                item[self.primary_keys[0]],
+            )
+            del attributes[range_key]
+
+            self.execute(
+                self.table.update_item,
+                utils.build_backfill_item_params(
+                    self.build_primary_key(item), attributes
+                ),
+                WRITE_CAPACITY,
+                "update_item",
+            )
+            count += 1
+
+        return count
+
+    def backfill_shard_keys(self) -> int:
+        # Itens gravados antes de o índice ser particionado não têm o atributo do
+        # shard e ficariam fora das consultas até serem regravados
+        gsi_key_schemas = [
+            gsi_key_schema
+            for gsi_key_schema in self.gsi_key_schemas
+            if utils.get_shard_attribute(gsi_key_schema)
+        ]
+        projection = list(self.primary_keys)
+
+        for gsi_key_schema in gsi_key_schemas:
+            projection += [
+                gsi_key_schema[GSI_HASH_KEY],
+                utils.get_shard_attribute(gsi_key_schema),
+            ]
+
+        count = 0
+
+        for item in self.iter_scan(list(dict.fromkeys(projection))):
+            missing = [
+                gsi_key_schema
+                for gsi_key_schema in gsi_key_schemas
+                if gsi_key_schema[GSI_HASH_KEY] in item
+                and utils.get_shard_attribute(gsi_key_schema) not in item
+            ]
+
+            if not missing:
+                continue
+
+            attributes = utils.add_shard_keys(
+                {
+                    gsi_key_schema[GSI_HASH_KEY]: item[gsi_key_schema[GSI_HASH_KEY]]
+                    for gsi_key_schema in missing
+                },
+                missing,
+                item[self.primary_keys[0]],
+            )
+
+            for gsi_key_schema in missing:
+                attributes.pop(gsi_key_schema[GSI_HASH_KEY], None)
+
+            self.execute(
+                self.table.update_item,
+                utils.build_backfill_item_params(
+                    self.build_primary_key(item), attributes
+                ),
+                WRITE_CAPACITY,
+                "update_item",
+            )
+            count += 1
+
+        return count
+
+    def get_many(
+        self,
+        keys: List[Dict[str, Any]],
+        projection_expression: Optional[List[str]] = None,
+    ) -> Dict[Tuple[Any, ...], Dict[str, Any]]:
+        return self.batch_get_items(keys, projection_expression)
+
     def update(
         self,
         key_condition: Dict[str, str],
         filter_condition: Optional[Dict[str, str]] = {},
         update_items: Dict[str, Any] = {},
+        parallel: bool = False,
+        max_workers: Optional[int] = None,
     ) -> List[Dict[str, Any]]:
         updated_ids = []
 
@@ -57,18 +462,17 @@ class BaseRepository(DynamoDBHelper):
                 update_items,
                 updated_ids=updated_ids,
             )
+        elif parallel:
+            updated_ids = self.__update_parallel(
+                key_condition, filter_condition, update_items, max_workers
+            )
         else:
-            last_evaluated_key = None
-
-            while True:
-                keys, last_evaluated_key = self.query(
-                    key_condition,
-                    filter_condition,
-                    projection_expression=self.primary_keys,
-                    last_evaluated_key=last_evaluated_key,
-                    limit=self.max_query_id_items,
-                )
-
+            for keys in self.iter_pages(
+                key_condition,
+                filter_condition,
+                projection_expression=self.primary_keys,
+                limit=self.max_query_id_items,
+            ):
                 for key in keys:
                     self.update_item(
                         key,
@@ -77,7 +481,75 @@ class BaseRepository(DynamoDBHelper):
                         updated_ids=updated_ids,
                     )
 
-                if not last_evaluated_key:
-                    break
+        return updated_ids
+
+    def __update_parallel(
+        self,
+        key_condition: Dict[str, str],
+        filter_condition: Dict[str, str],
+        update_items: Dict[str, Any],
+        max_workers: Optional[int],
+    ) -> List[Dict[str, Any]]:
+        # Não há motivo para mais escritas simultâneas do que a capacidade
+        # de escrita da tabela comporta
+        max_workers = min(max_workers or UPDATE_MAX_WORKERS, self.max_write_items)
+
+        if max_workers < 1:
+            raise ValueError("Max workers must be greater than zero")
+
+        def update_key(key: Dict[str, Any]) -> Optional[str]:
+            try:
+                self.update_item(key, None, update_items)
+            except ClientError as e:
+                return e.response["Error"]["Code"]
+
+            return None
+
+        updated_ids: List[Dict[str, Any]] = []
+        errors: List[Dict[str, Any]] = []
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            # A próxima página de chaves é lida enquanto a atual é atualizada
+            for keys in self.iter_pages(
+                key_condition,
+                filter_condition,
+                projection_expression=self.primary_keys,
+                limit=self.max_query_id_items,
+                prefetch=1,
+            ):
+                # O map devolve os resultados na ordem em que as chaves foram lidas
+                for key, error in zip(keys, executor.map(update_key, keys)):
+                    if error is None:
+                        updated_ids.append(key)
+                    else:
+                        errors.append({RESULT_KEY: key, RESULT_ERROR: error})
+
+                # As páginas seguintes não são atualizadas após uma falha
+                if errors:
+                    raise PartialUpdateError(updated_ids, errors)
 
         return updated_ids
+
+    def transact_update(self, updates: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        transact_updates = []
+
+        for update in updates:
+            key_condition = update["key_condition"]
+            filter_condition = update.get("filter_condition") or {}
+            update_items = update.get("update_items") or {}
+
+            if self.is_primary_key(key_condition):
+                keys = [self.build_primary_key(key_condition)]
+            else:
+                keys = self.iter_query(
+                    key_condition,
+                    filter_condition,
+                    projection_expression=self.primary_keys,
+                    limit=self.max_query_id_items,
+                )
+
+            # O filtro é reavaliado como condição dentro da transação
+            for key in keys:
+                transact_updates.append((key, filter_condition, update_items))
+
+        return self.transact_update_items(transact_updates)
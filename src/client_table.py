@@ -0,0 +1,169 @@
+from typing import Any, Callable, Dict, List
+from boto3.dynamodb.conditions import ConditionBase, ConditionExpressionBuilder
+from attribute_values import AttributeMap, deserialize_map, serialize_map
+from aws_clients import get_dynamo_db_client
+
+# Parâmetros que carregam valores de atributos e precisam do formato do client
+SERIALIZED_PARAMS = ["Key", "Item", "ExclusiveStartKey", "ExpressionAttributeValues"]
+CONDITION_PARAMS = {
+    "KeyConditionExpression": True,
+    "ConditionExpression": False,
+    "FilterExpression": False,
+}
+
+
+SerializeMap = Callable[[Dict[str, Any]], AttributeMap]
+DeserializeMap = Callable[[AttributeMap], Any]
+
+
+def build_client_params(
+    table_name: str,
+    params: Dict[str, Any],
+    serialize: SerializeMap = serialize_map,
+) -> Dict[str, Any]:
+    client_params = dict(params, TableName=table_name)
+
+    for name, is_key_condition in CONDITION_PARAMS.items():
+        condition = client_params.get(name)
+
+        # Condições do boto3 (como a do insert) viram texto, como no resource
+        if isinstance(condition, ConditionBase):
+            expression = ConditionExpressionBuilder().build_expression(
+                condition, is_key_condition
+            )
+            client_params[name] = expression.condition_expression
+            client_params["ExpressionAttributeNames"] = dict(
+                client_params.get("ExpressionAttributeNames", {}),
+                **expression.attribute_name_placeholders,
+            )
+
+            if expression.attribute_value_placeholders:
+                client_params["ExpressionAttributeValues"] = dict(
+                    client_params.get("ExpressionAttributeValues", {}),
+                    **expression.attribute_value_placeholders,
+                )
+
+    for name in SERIALIZED_PARAMS:
+        if name in client_params:
+            client_params[name] = serialize(client_params[name])
+
+    return client_params
+
+
+def convert_write_requests(
+    request_items: Dict[str, List[Dict[str, Any]]],
+    convert: Callable[[Dict[str, Any]], Dict[str, Any]],
+) -> Dict[str, List[Dict[str, Any]]]:
+    # O PutRequest leva um Item e o DeleteRequest uma Key
+    return {
+        table_name: [
+            {
+                operation: {name: convert(value) for name, value in request.items()}
+                for operation, request in write_request.items()
+            }
+            for write_request in write_requests
+        ]
+        for table_name, write_requests in request_items.items()
+    }
+
+
+def convert_key_requests(
+    request_items: Dict[str, Dict[str, Any]],
+    convert: Callable[[Dict[str, Any]], Dict[str, Any]],
+) -> Dict[str, Dict[str, Any]]:
+    return {
+        table_name: dict(request, Keys=[convert(key) for key in request["Keys"]])
+        for table_name, request in request_items.items()
+    }
+
+
+def deserialize_response(
+    response: Dict[str, Any], deserialize: DeserializeMap = deserialize_map
+) -> Dict[str, Any]:
+    if "Items" in response:
+        response["Items"] = [deserialize(item) for item in response["Items"]]
+
+    for name in ["Item", "Attributes"]:
+        if name in response:
+            response[name] = deserialize(response[name])
+
+    # A chave de paginação volta sempre como dict, mesmo que os itens não
+    if "LastEvaluatedKey" in response:
+        response["LastEvaluatedKey"] = deserialize_map(response["LastEvaluatedKey"])
+
+    return response
+
+
+class ClientTable:
+    # Mesma interface da Table do resource, mas direto no client de baixo nível:
+    # os valores passam pelo attribute_values em vez do TypeSerializer e do
+    # TypeDeserializer, e os números inteiros voltam como int. Com os conversores
+    # typed, o resultado é o mesmo do resource, mas pelo client compartilhado
+    def __init__(
+        self,
+        table_name: str,
+        serialize: SerializeMap = serialize_map,
+        deserialize: DeserializeMap = deserialize_map,
+    ):
+        self.table_name = table_name
+        self.serialize = serialize
+        self.deserialize = deserialize
+
+    def __call(self, method: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        # O client é resolvido a cada chamada, então segue o registro atual
+        function: Callable[..., Dict[str, Any]] = getattr(
+            get_dynamo_db_client(), method
+        )
+
+        return deserialize_response(
+            function(**build_client_params(self.table_name, params, self.serialize)),
+            self.deserialize,
+        )
+
+    def query(self, **params) -> Dict[str, Any]:
+        return self.__call("query", params)
+
+    def scan(self, **params) -> Dict[str, Any]:
+        return self.__call("scan", params)
+
+    def get_item(self, **params) -> Dict[str, Any]:
+        return self.__call("get_item", params)
+
+    def put_item(self, **params) -> Dict[str, Any]:
+        return self.__call("put_item", params)
+
+    def update_item(self, **params) -> Dict[str, Any]:
+        return self.__call("update_item", params)
+
+    def delete_item(self, **params) -> Dict[str, Any]:
+        return self.__call("delete_item", params)
+
+    def batch_write_item(
+        self, RequestItems: Dict[str, List[Dict[str, Any]]], **params
+    ) -> Dict[str, Any]:
+        response = get_dynamo_db_client().batch_write_item(
+            RequestItems=convert_write_requests(RequestItems, self.serialize),
+            **params,
+        )
+        response["UnprocessedItems"] = convert_write_requests(
+            response.get("UnprocessedItems", {}), deserialize_map
+        )
+
+        return response
+
+    def batch_get_item(
+        self, RequestItems: Dict[str, Dict[str, Any]], **params
+    ) -> Dict[str, Any]:
+        response = get_dynamo_db_client().batch_get_item(
+            RequestItems=convert_key_requests(RequestItems, self.serialize),
+            **params,
+        )
+        response["Responses"] = {
+            table_name: [self.deserialize(item) for item in items]
+            for table_name, items in response.get("Responses", {}).items()
+        }
+        response["UnprocessedKeys"] = convert_key_requests(
+            response.get("UnprocessedKeys", {}), deserialize_map
+        )
+
+        return response
@@ -0,0 +1,90 @@
+import base64
+import binascii
+import hashlib
+import hmac
+import json
+from typing import Any, Dict, Optional
+from boto3.dynamodb.types import TypeDeserializer, TypeSerializer
+
+CURSOR_SIGNATURE_SEPARATOR = "."
+CURSOR_SCOPE_SIZE = 16
+
+TYPE_SERIALIZER = TypeSerializer()
+TYPE_DESERIALIZER = TypeDeserializer()
+
+
+class InvalidCursorError(ValueError):
+    pass
+
+
+def encode_base64(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
+
+
+def decode_base64(data: str) -> bytes:
+    return base64.urlsafe_b64decode(data + "=" * (-len(data) % 4))
+
+
+class CursorCodec:
+    def __init__(self, secret: Optional[bytes] = None):
+        self.secret = secret
+
+    @staticmethod
+    def build_scope(*parts: Any) -> str:
+        # O cursor só vale para a mesma consulta que o gerou
+        data = json.dumps(parts, sort_keys=True, default=str).encode("utf-8")
+
+        return hashlib.sha256(data).hexdigest()[:CURSOR_SCOPE_SIZE]
+
+    def __sign(self, payload: str) -> str:
+        return encode_base64(
+            hmac.new(self.secret, payload.encode("utf-8"), hashlib.sha256).digest()
+        )
+
+    def encode(
+        self, last_evaluated_key: Optional[Dict[str, Any]], scope: str = ""
+    ) -> Optional[str]:
+        if not last_evaluated_key:
+            return None
+
+        # O formato tipado do DynamoDB preserva Decimal, binários e conjuntos
+        data = {
+            "key": TYPE_SERIALIZER.serialize(last_evaluated_key),
+            "scope": scope,
+        }
+        payload = encode_base64(json.dumps(data, separators=(",", ":")).encode("utf-8"))
+
+        if self.secret is None:
+            return payload
+
+        return payload + CURSOR_SIGNATURE_SEPARATOR + self.__sign(payload)
+
+    def decode(
+        self, cursor: Optional[str], scope: str = ""
+    ) -> Optional[Dict[str, Any]]:
+        if not cursor:
+            return None
+
+        payload, _, signature = cursor.partition(CURSOR_SIGNATURE_SEPARATOR)
+
+        if self.secret is not None and not hmac.compare_digest(
+            signature.encode("utf-8"), self.__sign(payload).encode("ascii")
+        ):
+            raise InvalidCursorError("Invalid cursor signature")
+
+        try:
+            data = json.loads(decode_base64(payload))
+            last_evaluated_key = TYPE_DESERIALIZER.deserialize(data["key"])
+        except (AttributeError, binascii.Error, KeyError, TypeError, ValueError) as e:
+            raise InvalidCursorError("Malformed cursor") from e
+
+        if not isinstance(last_evaluated_key, dict):
+            raise InvalidCursorError("Malformed cursor")
+
+        if data.get("scope") != scope:
+            raise InvalidCursorError("Cursor does not belong to this query")
+
+        return last_evaluated_key
+
+
+DEFAULT_CURSOR_CODEC = CursorCodec()
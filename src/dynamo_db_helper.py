@@ -1,14 +1,33 @@
-import boto3
+import threading
 import time
 from abc import ABC
-from typing import Dict, Any, List, Optional, Tuple
-from datetime import datetime
-from boto3.dynamodb.conditions import Key, Attr
-from botocore.exceptions import ClientError
-from dynamo_db_utils import DynamoDBUtils as utils
-
-DYNAMO_DB_RESOURCE = boto3.resource("dynamodb")
-DYNAMO_DB_CLIENT = boto3.client("dynamodb")
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Iterable, List, Optional, Tuple
+from botocore.exceptions import BotoCoreError, ClientError
+from dynamo_db_utils import DynamoDBUtils as utils, RangeKeyEncoders, TIME_BUCKETS
+from query_planner import QueryPlan, QueryPlanner
+from aws_clients import describe_table, get_dynamo_db_client, get_dynamo_db_resource
+from attribute_values import deserialize_typed_map, serialize_typed_map
+from client_table import ClientTable
+from retry_policy import (
+    RetryPolicy,
+    RequestError,
+    DEFAULT_RETRY_POLICY,
+    cancellation_reasons,
+    error_code,
+)
+from instrumentation import (
+    Instrumentation,
+    NOOP_INSTRUMENTATION,
+    OperationRecord,
+    THROTTLING_ERRORS,
+)
+from rate_limiter import (
+    CapacityRateLimiter,
+    READ_CAPACITY,
+    WRITE_CAPACITY,
+    get_rate_limiter,
+)
 
 DEFAULT_MAX_ITEM_SIZE = 256
 DEFAULT_QUERY_ID_ITEM_SIZE = 32
@@ -19,13 +38,42 @@ PRIMARY_RANGE_KEY = "id_range"
 GSI_INDEX_NAME_KEY = "index_name"
 GSI_HASH_KEY = "HASH"
 GSI_RANGE_KEY = "RANGE"
+GSI_SHARDS_KEY = "SHARDS"
+GSI_TIME_BUCKET_KEY = "TIME_BUCKET"
+
+SHARDS_LAST_EVALUATED_KEY = "shards"
+SHARD_QUERY_MAX_WORKERS = 16
+
+# Um único pool para as consultas de todos os shards, criado uma vez por processo
+SHARD_QUERY_EXECUTOR = ThreadPoolExecutor(
+    max_workers=SHARD_QUERY_MAX_WORKERS, thread_name_prefix="dynamodb-shard-query"
+)
+
+BATCH_WRITE_MAX_ITEMS = 25
+BATCH_GET_MAX_ITEMS = 100
+TRANSACT_WRITE_MAX_ITEMS = 100
 
-EXECUTION_TRIES = 5
+CONDITIONAL_CHECK_FAILED_ERROR = "ConditionalCheckFailedException"
+
+RESULT_KEY = "key"
+RESULT_ERROR = "error"
+UNPROCESSED_ITEM_ERROR = "UnprocessedItem"
 
 RESERVED_WORDS = ["name", "status"]
 
 
+class PartialUpdateError(Exception):
+    def __init__(self, updated_ids: List[Dict[str, Any]], errors: List[Dict[str, Any]]):
+        super().__init__(f"Failed to update {len(errors)} keys")
+        self.updated_ids = updated_ids
+        self.errors = errors
+
+
 class DynamoDBHelper(ABC):
+    # Cardinalidade estimada dos atributos, usada pelo planner para comparar
+    # índices; atributos ausentes usam o valor padrão do planner
+    attribute_cardinality: Dict[str, int] = {}
+
     def __init__(
         self,
         table_name: str,
@@ -33,9 +81,29 @@ class DynamoDBHelper(ABC):
         has_range_key: bool,
         range_key_items: List[str],
         gsi_key_schemas: List[Dict[str, str]],
+        rate_limited: bool = False,
+        retry_policy: Optional[RetryPolicy] = None,
+        instrumentation: Optional[Instrumentation] = None,
+        range_key_encoders: RangeKeyEncoders = {},
+        low_level_client: bool = False,
     ):
+        # Com low_level_client, as chamadas vão direto ao client, sem o resource
+        self.client_table = ClientTable(table_name) if low_level_client else None
+        # Os shards são consultados pelo client compartilhado, que é thread-safe,
+        # mantendo os tipos do resource quando ele está em uso
+        self.shard_table = self.client_table or ClientTable(
+            table_name, serialize_typed_map, deserialize_typed_map
+        )
+        # Tabela de leitura que monta os registros direto do formato do client;
+        # definida pelos repositórios que têm um tipo de registro
+        self.record_table: Optional[ClientTable] = None
+        self.retry_policy = retry_policy or DEFAULT_RETRY_POLICY
+        self.instrumentation = instrumentation or NOOP_INSTRUMENTATION
         self._init_table(table_name, max_item_size)
-        self._init_key_schemas(has_range_key, range_key_items, gsi_key_schemas)
+        self._init_key_schemas(
+            has_range_key, range_key_items, gsi_key_schemas, range_key_encoders
+        )
+        self._init_rate_limiter(rate_limited)
         self.insert_condition_expression = utils.build_insert_condition_expression(
             has_range_key
         )
@@ -45,15 +113,28 @@ class DynamoDBHelper(ABC):
         has_range_key: bool,
         range_key_items: List[str],
         gsi_key_schemas: List[Dict[str, str]],
+        range_key_encoders: RangeKeyEncoders = {},
     ) -> None:
         self.primary_keys: List[str] = [PRIMARY_HASH_KEY]
         self.has_range_key: bool = has_range_key or len(range_key_items) > 0
         self.range_key_items: list[str] = range_key_items
+        self.range_key_encoders = range_key_encoders
         self.gsi_key_schemas: List[Dict[str, str]] = gsi_key_schemas
 
         if self.has_range_key:
             self.primary_keys.append(PRIMARY_RANGE_KEY)
 
+        self.query_planner = QueryPlanner(
+            self.has_range_key,
+            range_key_items,
+            gsi_key_schemas,
+            self.max_item_size,
+            self.item_count,
+            self.index_projections,
+            self.attribute_cardinality,
+            range_key_encoders,
+        )
+
         for gsi_key_schema in gsi_key_schemas:
             if (
                 GSI_INDEX_NAME_KEY not in gsi_key_schema
@@ -61,26 +142,79 @@ class DynamoDBHelper(ABC):
             ):
                 raise ValueError(f"Invalid GSI key schema {gsi_key_schema}")
 
+            shards = gsi_key_schema.get(GSI_SHARDS_KEY)
+
+            if shards is not None and (not isinstance(shards, int) or shards < 1):
+                raise ValueError(f"Invalid GSI shards {gsi_key_schema}")
+
+            time_bucket = gsi_key_schema.get(GSI_TIME_BUCKET_KEY)
+
+            if time_bucket is not None and (
+                time_bucket not in TIME_BUCKETS or GSI_RANGE_KEY not in gsi_key_schema
+            ):
+                raise ValueError(f"Invalid GSI time bucket {gsi_key_schema}")
+
     def _init_table(self, table_name: str, max_item_size: int) -> None:
         self.table_name = table_name
-        self.table = DYNAMO_DB_RESOURCE.Table(table_name)
-        table_description = DYNAMO_DB_CLIENT.describe_table(TableName=table_name)
+        self._local = threading.local()
+        table_description = describe_table(table_name)
         read_capacity_units = table_description["Table"]["ProvisionedThroughput"][
             "ReadCapacityUnits"
         ]
         write_capacity_units = table_description["Table"]["ProvisionedThroughput"][
             "WriteCapacityUnits"
         ]
+        self.read_capacity_units = read_capacity_units
+        self.write_capacity_units = write_capacity_units
         read_capacity_bytes = read_capacity_units * 4 * 1024
         write_capacity_bytes = write_capacity_units * 1024
 
         if read_capacity_bytes < max_item_size or write_capacity_bytes < max_item_size:
             raise ValueError("Max item size is bigger than read or write capacity")
 
+        self.max_item_size = max_item_size
+        self.item_count = table_description["Table"].get("ItemCount", 0)
+        self.index_projections = {
+            index["IndexName"]: index.get("Projection", {})
+            for index in table_description["Table"].get("GlobalSecondaryIndexes", [])
+        }
         self.max_read_items = read_capacity_bytes // max_item_size
         self.max_write_items = write_capacity_bytes // max_item_size
         self.max_query_id_items = read_capacity_bytes // DEFAULT_QUERY_ID_ITEM_SIZE
 
+    @property
+    def table(self) -> Any:
+        if self.client_table is not None:
+            return self.client_table
+
+        # Recursos do boto3 não são thread-safe: cada thread usa sua própria Table
+        table = getattr(self._local, "table", None)
+
+        if table is None:
+            table = get_dynamo_db_resource().Table(self.table_name)
+            self._local.table = table
+
+        return table
+
+    def get_read_table(self, as_records: bool = False) -> Any:
+        if as_records and self.record_table is not None:
+            return self.record_table
+
+        return self.table
+
+    @property
+    def batch_resource(self) -> Any:
+        # O ClientTable também atende às chamadas em lote do resource
+        return self.client_table or get_dynamo_db_resource()
+
+    def _init_rate_limiter(self, rate_limited: bool) -> None:
+        self.rate_limiter: Optional[CapacityRateLimiter] = None
+
+        if rate_limited:
+            self.rate_limiter = get_rate_limiter(
+                self.table_name, self.read_capacity_units, self.write_capacity_units
+            )
+
     def is_primary_key(self, key_condition: Dict[str, Any]) -> bool:
         if PRIMARY_HASH_KEY not in key_condition:
             return False
@@ -89,6 +223,49 @@ class DynamoDBHelper(ABC):
 
         return True
 
+    def plan_query(
+        self,
+        key_condition: Dict[str, Any],
+        filter_condition: Optional[Dict[str, Any]] = None,
+        projection_expression: Optional[List[str]] = None,
+    ) -> QueryPlan:
+        return self.query_planner.plan(
+            key_condition, filter_condition, projection_expression
+        )
+
+    def explain(
+        self,
+        key_condition: Dict[str, Any],
+        filter_condition: Optional[Dict[str, Any]] = None,
+        projection_expression: Optional[List[str]] = None,
+    ) -> Dict[str, Any]:
+        return self.query_planner.explain(
+            key_condition, filter_condition, projection_expression
+        )
+
+    def get_time_bucket_key_schema(self) -> Dict[str, Any]:
+        for gsi_key_schema in self.gsi_key_schemas:
+            if gsi_key_schema.get(GSI_TIME_BUCKET_KEY):
+                return gsi_key_schema
+
+        raise ValueError(f"Table {self.table_name} has no time bucket index")
+
+    def build_put_item_params(
+        self, item: Dict[str, Any], overwrite: bool
+    ) -> Dict[str, Any]:
+        return utils.build_put_item_params(
+            item,
+            self.range_key_items,
+            overwrite,
+            self.gsi_key_schemas,
+            self.range_key_encoders,
+        )
+
+    def build_range_key(self, item: Dict[str, Any]) -> Optional[str]:
+        return utils.build_range_key(
+            item, self.range_key_items, self.range_key_encoders
+        )
+
     def build_primary_key(self, key: Dict[str, Any]) -> Dict[str, Any]:
         assert PRIMARY_HASH_KEY in key, "Primary hash key is required"
         primary_key = {PRIMARY_HASH_KEY: key[PRIMARY_HASH_KEY]}
@@ -99,33 +276,121 @@ class DynamoDBHelper(ABC):
 
         return primary_key
 
+    def build_primary_key_tuple(self, key: Dict[str, Any]) -> Tuple[Any, ...]:
+        return tuple(key[primary_key] for primary_key in self.primary_keys)
+
     @staticmethod
     def execute_tries(
-        function: callable, params: Dict[str, Any]
+        function: callable,
+        params: Dict[str, Any],
+        retry_policy: Optional[RetryPolicy] = None,
     ) -> Optional[Dict[str, Any]]:
-        retries = 0
-        backoff_factor: float = 1.5
-        exception = None
+        return (retry_policy or DEFAULT_RETRY_POLICY).execute(function, params)
 
-        while retries < EXECUTION_TRIES:
-            try:
-                return function(**params)
-            except ClientError as e:
-                if (
-                    e.response["Error"]["Code"]
-                    == "ProvisionedThroughputExceededException"
-                ):
-                    exception = e
-                    retries += 1
-                    wait_time = backoff_factor**retries
-                    print(
-                        f"ProvisionedThroughputExceededException: Retrying in {wait_time} seconds..."
-                    )
-                    time.sleep(wait_time)
-                else:
-                    raise e
+    def execute(
+        self,
+        function: callable,
+        params: Dict[str, Any],
+        capacity: str,
+        operation: str,
+        item_count: int = 1,
+    ) -> Optional[Dict[str, Any]]:
+        if self.rate_limiter is None and not self.instrumentation.enabled:
+            return self.execute_tries(function, params, self.retry_policy)
+
+        estimates: List[float] = []
+        retry_errors: List[str] = []
 
-        raise exception
+        # Cada tentativa, inclusive as repetições, consome tokens do bucket
+        def measured_function(**params) -> Optional[Dict[str, Any]]:
+            if self.rate_limiter is not None:
+                estimates.append(
+                    self.rate_limiter.acquire(capacity, operation, item_count)
+                )
+
+            return function(**params)
+
+        def on_retry(error: RequestError, attempt: int, delay: float) -> None:
+            retry_errors.append(error_code(error))
+
+        started_at = time.perf_counter()
+
+        try:
+            response = self.retry_policy.execute(
+                measured_function,
+                dict(params, ReturnConsumedCapacity="TOTAL"),
+                on_retry=on_retry,
+            )
+        except (ClientError, BotoCoreError) as e:
+            self.record_operation(
+                operation,
+                params,
+                capacity,
+                started_at,
+                None,
+                None,
+                retry_errors,
+                error_code(e),
+            )
+            raise
+
+        consumed_units = CapacityRateLimiter.consumed_capacity_units(
+            (response or {}).get("ConsumedCapacity")
+        )
+
+        if self.rate_limiter is not None:
+            self.rate_limiter.settle(
+                capacity, operation, estimates[-1], consumed_units, item_count
+            )
+
+        self.record_operation(
+            operation,
+            params,
+            capacity,
+            started_at,
+            response,
+            consumed_units,
+            retry_errors,
+        )
+
+        return response
+
+    def record_operation(
+        self,
+        operation: str,
+        params: Dict[str, Any],
+        capacity: str,
+        started_at: float,
+        response: Optional[Dict[str, Any]],
+        consumed_units: Optional[float],
+        retry_errors: List[str],
+        error: Optional[str] = None,
+    ) -> None:
+        if not self.instrumentation.enabled:
+            return
+
+        response = response or {}
+        items_returned = response.get("Count", len(response.get("Items", [])))
+
+        self.instrumentation.record(
+            OperationRecord(
+                operation,
+                self.table_name,
+                index_name=params.get("IndexName"),
+                duration_ms=(time.perf_counter() - started_at) * 1000,
+                items_returned=items_returned,
+                items_scanned=response.get("ScannedCount", items_returned),
+                consumed_read_units=(
+                    (consumed_units or 0.0) if capacity == READ_CAPACITY else 0.0
+                ),
+                consumed_write_units=(
+                    (consumed_units or 0.0) if capacity == WRITE_CAPACITY else 0.0
+                ),
+                retries=len(retry_errors),
+                throttles=sum(1 for code in retry_errors if code in THROTTLING_ERRORS),
+                error=error,
+            )
+        )
 
     def put_item(
         self,
@@ -133,52 +398,460 @@ class DynamoDBHelper(ABC):
         item: Dict[str, Any],
         overwrite: bool,
     ) -> Optional[str]:
-        params = utils.build_put_item_params(item, self.range_key_items, overwrite)
+        params = self.build_put_item_params(item, overwrite)
 
-        self.execute_tries(put_item_function, params)
+        self.execute(put_item_function, params, WRITE_CAPACITY, "put_item")
 
         return self.build_primary_key(params["Item"])
 
-    def get(
+    def put_items(
+        self, put_item_function, items: List[Dict[str, Any]], overwrite: bool
+    ) -> List[Dict[str, Any]]:
+        results: List[Dict[str, Any]] = []
+
+        for item in items:
+            params = self.build_put_item_params(item, overwrite)
+            result = {RESULT_KEY: self.build_primary_key(params["Item"])}
+
+            try:
+                self.execute(put_item_function, params, WRITE_CAPACITY, "put_item")
+                result[RESULT_ERROR] = None
+            except ClientError as e:
+                result[RESULT_ERROR] = e.response["Error"]["Code"]
+
+            results.append(result)
+
+        return results
+
+    def batch_put_items(self, items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        return self.batch_write_items(
+            self.build_put_item_params(item, True)["Item"] for item in items
+        )
+
+    def batch_write_items(
+        self, items: Iterable[Dict[str, Any]]
+    ) -> List[Dict[str, Any]]:
+        # Grava os itens como estão, sem montar chaves nem renovar timestamps
+        results: List[Dict[str, Any]] = []
+        chunks: List[List[Tuple[Dict[str, Any], Dict[str, Any]]]] = [[]]
+        chunk_keys: set = set()
+
+        for item in items:
+            primary_key = self.build_primary_key(item)
+            key_tuple = self.build_primary_key_tuple(primary_key)
+
+            # O BatchWriteItem rejeita chaves repetidas na mesma requisição
+            if len(chunks[-1]) >= BATCH_WRITE_MAX_ITEMS or key_tuple in chunk_keys:
+                chunks.append([])
+                chunk_keys = set()
+
+            result = {RESULT_KEY: primary_key, RESULT_ERROR: None}
+            chunks[-1].append((result, item))
+            chunk_keys.add(key_tuple)
+            results.append(result)
+
+        for chunk in chunks:
+            if chunk:
+                self.__batch_write_chunk(chunk)
+
+        return results
+
+    def __batch_write_chunk(
+        self, chunk: List[Tuple[Dict[str, Any], Dict[str, Any]]]
+    ) -> None:
+        pending = {
+            self.build_primary_key_tuple(result[RESULT_KEY]): (result, item)
+            for result, item in chunk
+        }
+        attempt = 0
+
+        while True:
+            attempt += 1
+            request_items = {
+                self.table_name: [
+                    {"PutRequest": {"Item": item}} for _, item in pending.values()
+                ]
+            }
+
+            try:
+                response = self.execute(
+                    self.batch_resource.batch_write_item,
+                    {"RequestItems": request_items},
+                    WRITE_CAPACITY,
+                    "batch_write_item",
+                    len(pending),
+                )
+            except ClientError as e:
+                # Os lotes anteriores já foram gravados, então o erro é
+                # registrado apenas nos itens pendentes deste lote
+                for result, _ in pending.values():
+                    result[RESULT_ERROR] = e.response["Error"]["Code"]
+
+                return
+
+            unprocessed = response.get("UnprocessedItems", {}).get(self.table_name, [])
+            pending = {
+                key_tuple: pending[key_tuple]
+                for key_tuple in (
+                    self.build_primary_key_tuple(request["PutRequest"]["Item"])
+                    for request in unprocessed
+                )
+            }
+
+            if not pending:
+                return
+
+            if attempt >= self.retry_policy.max_attempts:
+                break
+
+            time.sleep(self.retry_policy.compute_delay(attempt))
+
+        for result, _ in pending.values():
+            result[RESULT_ERROR] = UNPROCESSED_ITEM_ERROR
+
+    def batch_get_items(
         self,
-        key_condition: Dict[str, str],
-        filter_condition: Dict[str, str],
+        keys: List[Dict[str, Any]],
+        projection_expression: Optional[List[str]],
+    ) -> Dict[Tuple[Any, ...], Dict[str, Any]]:
+        results: Dict[Tuple[Any, ...], Dict[str, Any]] = {}
+        pending: Dict[Tuple[Any, ...], Dict[str, Any]] = {}
+
+        for key in keys:
+            primary_key = self.build_primary_key(key)
+            pending[self.build_primary_key_tuple(primary_key)] = primary_key
+
+        request_params: Dict[str, Any] = {}
+
+        if projection_expression:
+            # As chaves primárias são necessárias para indexar o resultado
+            projection_expression = self.primary_keys + [
+                attr for attr in projection_expression if attr not in self.primary_keys
+            ]
+            utils.build_projection_expression(request_params, projection_expression)
+
+        pending_keys = list(pending.values())
+
+        for start in range(0, len(pending_keys), BATCH_GET_MAX_ITEMS):
+            self.__batch_get_chunk(
+                pending_keys[start : start + BATCH_GET_MAX_ITEMS],
+                request_params,
+                results,
+            )
+
+        return results
+
+    def __batch_get_chunk(
+        self,
+        keys: List[Dict[str, Any]],
+        request_params: Dict[str, Any],
+        results: Dict[Tuple[Any, ...], Dict[str, Any]],
+    ) -> None:
+        attempt = 0
+
+        while True:
+            attempt += 1
+            request_items = {self.table_name: {"Keys": keys, **request_params}}
+
+            response = self.execute(
+                self.batch_resource.batch_get_item,
+                {"RequestItems": request_items},
+                READ_CAPACITY,
+                "batch_get_item",
+                len(keys),
+            )
+
+            for item in response.get("Responses", {}).get(self.table_name, []):
+                results[self.build_primary_key_tuple(item)] = item
+
+            unprocessed = response.get("UnprocessedKeys", {}).get(self.table_name)
+            keys = unprocessed["Keys"] if unprocessed else []
+
+            if not keys:
+                return
+
+            if attempt >= self.retry_policy.max_attempts:
+                raise RuntimeError(
+                    f"Unable to read {len(keys)} unprocessed keys from {self.table_name}"
+                )
+
+            time.sleep(self.retry_policy.compute_delay(attempt))
+
+    def build_query_params(
+        self,
+        plan: QueryPlan,
         projection_expression: Optional[List[str]],
         last_evaluated_key: Optional[Dict[str, Any]],
         limit: Optional[int],
-    ) -> Tuple[List[Dict[str, Any]], Optional[Dict[str, Any]]]:
+    ) -> Dict[str, Any]:
         if limit is None:
             limit = self.max_read_items
 
-        if self.is_primary_key(key_condition):
-            params = utils.build_get_item_params(
-                key_condition,
-                filter_condition,
+        if plan.gsi_key_schema is None:
+            return utils.build_get_item_params(
+                plan.key_condition,
+                plan.filter_condition,
                 projection_expression,
                 last_evaluated_key,
                 limit,
             )
+
+        return utils.build_get_item_params_gsi_key_schema(
+            [plan.gsi_key_schema],
+            plan.key_condition,
+            plan.filter_condition,
+            projection_expression,
+            last_evaluated_key,
+            limit,
+        )
+
+    def build_shard_query_params(
+        self,
+        plan: QueryPlan,
+        projection_expression: Optional[List[str]],
+        last_evaluated_key: Optional[Dict[str, Any]],
+        limit: Optional[int],
+    ) -> List[Tuple[str, Dict[str, Any]]]:
+        if limit is None:
+            limit = self.max_read_items
+
+        # A chave de paginação guarda a posição de cada shard ainda não esgotado
+        if last_evaluated_key:
+            pending = last_evaluated_key[SHARDS_LAST_EVALUATED_KEY]
         else:
-            params = utils.build_get_item_params_gsi_key_schema(
-                self.gsi_key_schemas,
-                key_condition,
-                filter_condition,
-                projection_expression,
-                last_evaluated_key,
-                limit,
+            pending = {str(shard): None for shard in range(plan.shards)}
+
+        shard_limit = -(-limit // len(pending))
+
+        return [
+            (
+                shard,
+                utils.build_get_item_params_gsi_key_schema(
+                    [plan.gsi_key_schema],
+                    plan.key_condition,
+                    plan.filter_condition,
+                    projection_expression,
+                    pending[shard],
+                    shard_limit,
+                    int(shard),
+                ),
+            )
+            for shard in sorted(pending, key=int)
+        ]
+
+    @staticmethod
+    def merge_shard_pages(
+        gsi_key_schema: Dict[str, Any],
+        shards: List[str],
+        responses: List[Dict[str, Any]],
+        as_records: bool = False,
+    ) -> Tuple[List[Dict[str, Any]], Optional[Dict[str, Any]]]:
+        shard_attribute = utils.get_shard_attribute(gsi_key_schema)
+        items: List[Dict[str, Any]] = []
+        next_pending: Dict[str, Dict[str, Any]] = {}
+
+        for shard, response in zip(shards, responses):
+            shard_items = response.get("Items", [])
+
+            # Os registros já são montados sem os atributos de shard
+            if not as_records:
+                for item in shard_items:
+                    item.pop(shard_attribute, None)
+
+            items.extend(shard_items)
+
+            if response.get("LastEvaluatedKey"):
+                next_pending[shard] = response["LastEvaluatedKey"]
+
+        if not next_pending:
+            return items, None
+
+        return items, {SHARDS_LAST_EVALUATED_KEY: next_pending}
+
+    def get(
+        self,
+        key_condition: Dict[str, str],
+        filter_condition: Dict[str, str],
+        projection_expression: Optional[List[str]],
+        last_evaluated_key: Optional[Dict[str, Any]],
+        limit: Optional[int],
+        as_records: bool = False,
+    ) -> Tuple[List[Dict[str, Any]], Optional[Dict[str, Any]]]:
+        plan = self.plan_query(key_condition, filter_condition, projection_expression)
+        as_records = as_records and self.record_table is not None
+
+        if plan.shards:
+            return self.__get_sharded(
+                plan, projection_expression, last_evaluated_key, limit, as_records
             )
 
-        response = self.execute_tries(self.table.query, params)
+        params = self.build_query_params(
+            plan, projection_expression, last_evaluated_key, limit
+        )
+        response = self.execute(
+            self.get_read_table(as_records).query, params, READ_CAPACITY, "query"
+        )
+
+        return response.get("Items", []), response.get("LastEvaluatedKey")
+
+    def __get_sharded(
+        self,
+        plan: QueryPlan,
+        projection_expression: Optional[List[str]],
+        last_evaluated_key: Optional[Dict[str, Any]],
+        limit: Optional[int],
+        as_records: bool = False,
+    ) -> Tuple[List[Dict[str, Any]], Optional[Dict[str, Any]]]:
+        shard_params = self.build_shard_query_params(
+            plan, projection_expression, last_evaluated_key, limit
+        )
+        table = self.record_table if as_records else self.shard_table
+
+        def query_shard(params: Dict[str, Any]) -> Dict[str, Any]:
+            return self.execute(table.query, params, READ_CAPACITY, "query")
+
+        responses = list(
+            SHARD_QUERY_EXECUTOR.map(
+                query_shard, [params for _, params in shard_params]
+            )
+        )
+
+        return self.merge_shard_pages(
+            plan.gsi_key_schema,
+            [shard for shard, _ in shard_params],
+            responses,
+            as_records,
+        )
+
+    def scan(
+        self,
+        projection_expression: Optional[List[str]],
+        last_evaluated_key: Optional[Dict[str, Any]],
+        limit: Optional[int],
+        segment: Optional[int] = None,
+        total_segments: Optional[int] = None,
+    ) -> Tuple[List[Dict[str, Any]], Optional[Dict[str, Any]]]:
+        params = {"Limit": limit or self.max_read_items}
+        utils.build_projection_expression(params, projection_expression)
+
+        if total_segments is not None:
+            params["Segment"] = segment
+            params["TotalSegments"] = total_segments
+
+        if last_evaluated_key:
+            params["ExclusiveStartKey"] = last_evaluated_key
+
+        response = self.execute(self.table.scan, params, READ_CAPACITY, "scan")
 
         return response.get("Items", []), response.get("LastEvaluatedKey")
 
+    def migrate_range_key(self, item: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        range_key = self.build_range_key(item)
+
+        if range_key is None or item.get(PRIMARY_RANGE_KEY) == range_key:
+            return None
+
+        old_key = self.build_primary_key(item)
+        new_item = dict(item, **{PRIMARY_RANGE_KEY: range_key})
+
+        try:
+            self.execute(
+                get_dynamo_db_client().transact_write_items,
+                {
+                    "TransactItems": utils.build_transact_move_items(
+                        self.table_name, old_key, new_item
+                    )
+                },
+                WRITE_CAPACITY,
+                "transact_write_items",
+                2,
+            )
+        except ClientError as e:
+            raise map_transaction_error(e) from e
+
+        return self.build_primary_key(new_item)
+
     def update_item(
         self,
         key: Dict[str, Any],
         filter_condition: Dict[str, Any],
         update_items: Dict[str, Any],
-        updated_ids: List[Dict[str, Any]],
+        updated_ids: Optional[List[Dict[str, Any]]] = None,
     ) -> None:
-        params = utils.build_update_item_params(key, filter_condition, update_items)
-        self.execute_tries(self.table.update_item, params)
-        updated_ids.append(key)
+        params = utils.build_update_item_params(
+            key, filter_condition, update_items, self.gsi_key_schemas
+        )
+        self.execute(self.table.update_item, params, WRITE_CAPACITY, "update_item")
+
+        if updated_ids is not None:
+            updated_ids.append(key)
+
+    def build_transact_items(
+        self, updates: List[Tuple[Dict[str, Any], Dict[str, Any], Dict[str, Any]]]
+    ) -> List[Dict[str, Any]]:
+        key_tuples: set = set()
+        transact_items: List[Dict[str, Any]] = []
+
+        for key, filter_condition, update_items in updates:
+            key_tuple = self.build_primary_key_tuple(key)
+
+            if key_tuple in key_tuples:
+                raise ValueError(f"Duplicated key {key} in the same transaction")
+
+            key_tuples.add(key_tuple)
+            transact_items.append(
+                utils.build_transact_update_item(
+                    self.table_name,
+                    key,
+                    filter_condition,
+                    update_items,
+                    self.gsi_key_schemas,
+                )
+            )
+
+        # A TransactWriteItems aceita no máximo 100 ações; dividir em lotes
+        # quebraria a atomicidade da transição, então o limite é explícito
+        if len(transact_items) > TRANSACT_WRITE_MAX_ITEMS:
+            raise ValueError(
+                f"Transaction with {len(transact_items)} items exceeds the limit of "
+                f"{TRANSACT_WRITE_MAX_ITEMS} items"
+            )
+
+        return transact_items
+
+    def transact_update_items(
+        self, updates: List[Tuple[Dict[str, Any], Dict[str, Any], Dict[str, Any]]]
+    ) -> List[Dict[str, Any]]:
+        transact_items = self.build_transact_items(updates)
+
+        try:
+            self.execute(
+                get_dynamo_db_client().transact_write_items,
+                {"TransactItems": transact_items},
+                WRITE_CAPACITY,
+                "transact_write_items",
+                len(transact_items),
+            )
+        except ClientError as e:
+            raise map_transaction_error(e) from e
+
+        return [key for key, _, _ in updates]
+
+
+def map_transaction_error(error: ClientError) -> ClientError:
+    reasons = cancellation_reasons(error)
+
+    if "ConditionalCheckFailed" not in reasons:
+        return error
+
+    # Mantém o mesmo erro que um update_item condicional levantaria
+    return ClientError(
+        {
+            "Error": {
+                "Code": CONDITIONAL_CHECK_FAILED_ERROR,
+                "Message": error.response["Error"].get("Message", ""),
+            },
+            "CancellationReasons": error.response.get("CancellationReasons", []),
+        },
+        error.operation_name,
+    )
@@ -1,7 +1,19 @@
-import copy
-from typing import Dict, Any, List, Optional, Tuple
-from boto3.dynamodb.conditions import Attr, Key
-from datetime import datetime
+import re
+import zlib
+from typing import Callable, Dict, Any, Iterator, List, Optional, Tuple, Union
+from boto3.dynamodb.conditions import Attr
+from boto3.dynamodb.types import TypeSerializer
+from datetime import datetime, timedelta, timezone
+from expression_compiler import (
+    build_condition,
+    build_update,
+    parse_condition_key,
+    DEFAULT_OPERATOR,
+    KEY_CONDITION_OPERATORS,
+    KEY_CONDITION_PREFIX,
+    FILTER_CONDITION_PREFIX,
+    CONDITION_EXPRESSION_PREFIX,
+)
 
 PRIMARY_HASH_KEY = "id"
 PRIMARY_RANGE_KEY = "id_range"
@@ -10,30 +22,134 @@ RESERVED_WORDS = ["name", "status"]
 GSI_INDEX_NAME_KEY = "index_name"
 GSI_HASH_KEY = "HASH"
 GSI_RANGE_KEY = "RANGE"
+GSI_SHARDS_KEY = "SHARDS"
+GSI_SHARD_ATTRIBUTE_KEY = "SHARD_ATTRIBUTE"
+
+SHARD_ATTRIBUTE_SUFFIX = "_shard"
+SHARD_SEPARATOR = "#"
+
+# Índices com TIME_BUCKET usam como hash o período do timestamp da chave de
+# ordenação, então cada hora (ou dia) de escritas cai numa partição diferente
+GSI_TIME_BUCKET_KEY = "TIME_BUCKET"
+TIME_BUCKETS = {
+    "day": ("%Y-%m-%d", timedelta(days=1)),
+    "hour": ("%Y-%m-%dT%H", timedelta(hours=1)),
+}
+
+# Marcadores abaixo do "." para que "1.0" ordene antes de "1.0.0" e uma
+# pré-release ("1.0.0-beta") antes da versão final
+VERSION_RELEASE_MARKER = "$"
+VERSION_PRE_RELEASE_MARKER = "!"
+VERSION_NUMBER_PATTERN = re.compile(r"\d+")
+VERSION_NUMBER_MAX_DIGITS = 9
+
+RangeKeyEncoders = Dict[str, Callable[[Any], str]]
+
+TYPE_SERIALIZER = TypeSerializer()
 
 
 class DynamoDBUtils:
 
     @staticmethod
-    def __add_range_key(item: Dict[str, str], range_key_items: List[str]) -> None:
-        range_key_values = [item[key] for key in range_key_items if key in item]
-        if range_key_values:
-            item[PRIMARY_RANGE_KEY] = "#".join(range_key_values)
+    def build_range_key(
+        item: Dict[str, Any],
+        range_key_items: List[str],
+        range_key_encoders: RangeKeyEncoders = {},
+    ) -> Optional[str]:
+        range_key_values = [
+            range_key_encoders.get(key, str)(item[key])
+            for key in range_key_items
+            if key in item
+        ]
+
+        return "#".join(range_key_values) if range_key_values else None
+
+    @staticmethod
+    def __add_range_key(
+        item: Dict[str, str],
+        range_key_items: List[str],
+        range_key_encoders: RangeKeyEncoders = {},
+    ) -> None:
+        range_key = DynamoDBUtils.build_range_key(
+            item, range_key_items, range_key_encoders
+        )
+        if range_key:
+            item[PRIMARY_RANGE_KEY] = range_key
+
+    @staticmethod
+    def __encode_version_numbers(version: str) -> str:
+        def encode_number(match: re.Match) -> str:
+            digits = match.group()
+
+            if len(digits) > VERSION_NUMBER_MAX_DIGITS:
+                raise ValueError(f"Version number too long: {digits}")
+
+            return f"{len(digits)}{digits}"
+
+        return VERSION_NUMBER_PATTERN.sub(encode_number, version)
+
+    @staticmethod
+    def encode_version(version_name: str) -> str:
+        # Cada número recebe o próprio comprimento como prefixo, então a ordem
+        # das strings segue a numérica: "1.9.0" -> "11.19.10$", "1.10.0" ->
+        # "11.210.10$"
+        core, separator, pre_release = str(version_name).partition("-")
+        encoded = DynamoDBUtils.__encode_version_numbers(core)
+
+        if not separator:
+            return encoded + VERSION_RELEASE_MARKER
+
+        return (
+            encoded
+            + VERSION_PRE_RELEASE_MARKER
+            + DynamoDBUtils.__encode_version_numbers(pre_release)
+        )
 
     @staticmethod
     def __build_key_expression(
         params: Dict[str, Any], key_condition: Dict[str, str]
     ) -> Tuple[Optional[str], str]:
         assert key_condition and key_condition.keys(), "Key condition is required"
-        key_expression = None
 
-        for key, value in key_condition.items():
-            if key_expression is None:
-                key_expression = Key(key).eq(value)
-            else:
-                key_expression &= Key(key).eq(value)
+        range_operators = [
+            operator
+            for _, operator in map(parse_condition_key, key_condition)
+            if operator != DEFAULT_OPERATOR
+        ]
+
+        # Só a chave de ordenação aceita operadores, e apenas um por query
+        if len(range_operators) > 1 or any(
+            operator not in KEY_CONDITION_OPERATORS for operator in range_operators
+        ):
+            raise ValueError(f"Invalid key condition {list(key_condition)}.")
+
+        key_expression, names, values = build_condition(
+            key_condition, KEY_CONDITION_PREFIX
+        )
 
         params["KeyConditionExpression"] = key_expression
+        DynamoDBUtils.merge_expression_attributes(params, names, values)
+
+    @staticmethod
+    def merge_expression_attributes(
+        params: Dict[str, Any],
+        expression_attribute_names: Dict[str, str],
+        expression_attribute_values: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        if expression_attribute_names:
+            params.setdefault("ExpressionAttributeNames", {}).update(
+                expression_attribute_names
+            )
+
+        if expression_attribute_values:
+            params.setdefault("ExpressionAttributeValues", {}).update(
+                expression_attribute_values
+            )
+
+    @staticmethod
+    def get_condition_attributes(condition: Dict[str, Any]) -> Dict[str, str]:
+        # Mapeia cada atributo para a chave usada na condição, com ou sem operador
+        return {parse_condition_key(key)[0]: key for key in condition}
 
     @staticmethod
     def __get_gsi_key_schema(
@@ -55,12 +171,10 @@ class DynamoDBUtils:
                 return gsi_key_schema
 
     @staticmethod
-    def __get_gsi_key_expression(
-        params: Dict[str, Any],
-        gsi_key_schemas: List[Dict[str, str]],
-        key_condition: Dict[str, Any],
-    ) -> Tuple[str, Any]:
-        key_set = key_condition.keys()
+    def find_gsi_key_schema(
+        gsi_key_schemas: List[Dict[str, str]], key_condition: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        key_set = DynamoDBUtils.get_condition_attributes(key_condition).keys()
 
         gsi_key_schema = DynamoDBUtils.__get_gsi_key_schema(gsi_key_schemas, key_set)
 
@@ -69,20 +183,137 @@ class DynamoDBUtils:
                 f"GSI key schema not found for the given update condition {key_set}."
             )
 
+        return gsi_key_schema
+
+    @staticmethod
+    def get_shard_attribute(gsi_key_schema: Dict[str, Any]) -> Optional[str]:
+        if not gsi_key_schema.get(GSI_SHARDS_KEY):
+            return None
+
+        return gsi_key_schema.get(
+            GSI_SHARD_ATTRIBUTE_KEY,
+            gsi_key_schema[GSI_HASH_KEY] + SHARD_ATTRIBUTE_SUFFIX,
+        )
+
+    @staticmethod
+    def get_shard(value: Any, shards: int) -> int:
+        # crc32 é estável entre processos, ao contrário do hash() do Python
+        return zlib.crc32(str(value).encode()) % shards
+
+    @staticmethod
+    def build_shard_key(hash_value: Any, shard: int) -> str:
+        return f"{hash_value}{SHARD_SEPARATOR}{shard}"
+
+    @staticmethod
+    def add_shard_keys(
+        item: Dict[str, Any],
+        gsi_key_schemas: List[Dict[str, Any]],
+        shard_source: Any = None,
+    ) -> Dict[str, Any]:
+        # O shard é derivado do id, então o mesmo item cai sempre no mesmo shard
+        if shard_source is None:
+            shard_source = item.get(PRIMARY_HASH_KEY)
+
+        for gsi_key_schema in gsi_key_schemas:
+            shard_attribute = DynamoDBUtils.get_shard_attribute(gsi_key_schema)
+            hash_key = gsi_key_schema[GSI_HASH_KEY]
+
+            if shard_attribute is None or hash_key not in item:
+                continue
+
+            assert shard_source is not None, "Primary hash key is required to shard"
+
+            item[shard_attribute] = DynamoDBUtils.build_shard_key(
+                item[hash_key],
+                DynamoDBUtils.get_shard(shard_source, gsi_key_schema[GSI_SHARDS_KEY]),
+            )
+
+        return item
+
+    @staticmethod
+    def format_timestamp(timestamp: Union[str, datetime]) -> str:
+        if isinstance(timestamp, str):
+            return timestamp
+
+        # Os timestamps gravados são UTC sem fuso, como o datetime.utcnow()
+        if timestamp.tzinfo is not None:
+            timestamp = timestamp.astimezone(timezone.utc).replace(tzinfo=None)
+
+        return timestamp.isoformat()
+
+    @staticmethod
+    def get_time_bucket(timestamp: Union[str, datetime], time_bucket: str) -> str:
+        bucket_format, _ = TIME_BUCKETS[time_bucket]
+
+        return datetime.fromisoformat(
+            DynamoDBUtils.format_timestamp(timestamp)
+        ).strftime(bucket_format)
+
+    @staticmethod
+    def iter_time_buckets(
+        first_bucket: str, last_bucket: str, time_bucket: str
+    ) -> Iterator[str]:
+        bucket_format, step = TIME_BUCKETS[time_bucket]
+        current = datetime.strptime(first_bucket, bucket_format)
+        last = datetime.strptime(last_bucket, bucket_format)
+
+        while current <= last:
+            yield current.strftime(bucket_format)
+            current += step
+
+    @staticmethod
+    def add_time_bucket_keys(
+        item: Dict[str, Any], gsi_key_schemas: List[Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        for gsi_key_schema in gsi_key_schemas:
+            time_bucket = gsi_key_schema.get(GSI_TIME_BUCKET_KEY)
+            range_key = gsi_key_schema.get(GSI_RANGE_KEY)
+
+            if time_bucket is None or range_key not in item:
+                continue
+
+            item[gsi_key_schema[GSI_HASH_KEY]] = DynamoDBUtils.get_time_bucket(
+                item[range_key], time_bucket
+            )
+
+        return item
+
+    @staticmethod
+    def __get_gsi_key_expression(
+        params: Dict[str, Any],
+        gsi_key_schemas: List[Dict[str, str]],
+        key_condition: Dict[str, Any],
+        shard: Optional[int] = None,
+    ) -> Tuple[str, Any]:
+        gsi_key_schema = DynamoDBUtils.find_gsi_key_schema(
+            gsi_key_schemas, key_condition
+        )
+
         index_name = gsi_key_schema.get(GSI_INDEX_NAME_KEY)
         hash_key = gsi_key_schema.get(GSI_HASH_KEY)
         range_key = gsi_key_schema.get(GSI_RANGE_KEY)
         hash_condition = key_condition.get(hash_key)
-        range_condition = key_condition.get(range_key)
-
-        key_condition = {hash_key: hash_condition}
-
-        if range_condition:
-            key_condition[range_key] = range_condition
+        condition_attributes = DynamoDBUtils.get_condition_attributes(key_condition)
+        range_condition_key = condition_attributes.get(range_key)
+        shard_attribute = DynamoDBUtils.get_shard_attribute(gsi_key_schema)
+
+        if shard_attribute is None:
+            index_key_condition = {hash_key: hash_condition}
+        elif shard is None:
+            raise ValueError(f"Shard is required to query the index {index_name}.")
+        else:
+            index_key_condition = {
+                shard_attribute: DynamoDBUtils.build_shard_key(hash_condition, shard)
+            }
+
+        if range_condition_key:
+            index_key_condition[range_condition_key] = key_condition[
+                range_condition_key
+            ]
 
         params["IndexName"] = index_name
 
-        DynamoDBUtils.__build_key_expression(params, key_condition)
+        DynamoDBUtils.__build_key_expression(params, index_key_condition)
 
     @staticmethod
     def build_projection_expression(
@@ -100,7 +331,7 @@ class DynamoDBUtils:
             f"#{attr}" for attr in projection_expression
         )
 
-        params["ExpressionAttributeNames"] = expression_attribute_names
+        DynamoDBUtils.merge_expression_attributes(params, expression_attribute_names)
         params["ProjectionExpression"] = projection_expression_str
 
     @staticmethod
@@ -130,67 +361,30 @@ class DynamoDBUtils:
         if not filter_condition:
             return
 
-        filter_expression = None
-
-        for key, value in filter_condition.items():
-            key_and_operator = key.split("#")
-            key = key_and_operator[0]
-            operator = key_and_operator[1] if len(key_and_operator) > 1 else "eq"
-            condition = None
-
-            match operator:
-                case "eq":
-                    condition = Attr(key).eq(value)
-                case "ne":
-                    condition = Attr(key).ne(value)
-                case "in":
-                    condition = Attr(key).is_in(value)
-                case "lt":
-                    condition = Attr(key).lt(value)
-                case "lte":
-                    condition = Attr(key).lte(value)
-                case "gt":
-                    condition = Attr(key).gt(value)
-                case "gte":
-                    condition = Attr(key).gte(value)
-                case "between":
-                    condition = Attr(key).between(value[0], value[1])
-                case "begins_with":
-                    condition = Attr(key).begins_with(value)
-
-            assert condition is not None, f"Invalid operator: {operator}"
-
-            if not filter_expression:
-                filter_expression = condition
-            else:
-                filter_expression &= condition
+        prefix = (
+            FILTER_CONDITION_PREFIX
+            if param_key == "FilterExpression"
+            else CONDITION_EXPRESSION_PREFIX
+        )
+        filter_expression, names, values = build_condition(filter_condition, prefix)
 
         params[param_key] = filter_expression
+        DynamoDBUtils.merge_expression_attributes(params, names, values)
 
     @staticmethod
     def build_update_expression(
-        params: Dict[str, Any], update_items: Dict[str, Any]
+        params: Dict[str, Any],
+        update_items: Dict[str, Any],
+        timestamp: Optional[str] = None,
     ) -> Tuple[str, Dict[str, str], Dict[str, Any]]:
         assert update_items and len(update_items) > 0, "Update items cannot be empty."
 
-        update_expression = "SET "
-        expression_attribute_names = {}
-        expression_attribute_values = {}
-
-        timestamp = datetime.utcnow().isoformat()
-        update_items["updated_at"] = timestamp
+        update_items["updated_at"] = timestamp or datetime.utcnow().isoformat()
 
-        for key, value in update_items.items():
-            update_expression += f"#{key} = :{key}, "
-            expression_attribute_names[f"#{key}"] = key
-            expression_attribute_values[f":{key}"] = value
-
-        update_expression = update_expression.rstrip(", ")
+        update_expression, names, values = build_update(update_items)
 
         params["UpdateExpression"] = update_expression
-        params["ExpressionAttributeNames"] = expression_attribute_names
-        params["ExpressionAttributeValues"] = expression_attribute_values
-
+        DynamoDBUtils.merge_expression_attributes(params, names, values)
 
     @staticmethod
     def build_insert_condition_expression(has_range_key: bool) -> Attr:
@@ -207,12 +401,18 @@ class DynamoDBUtils:
         put_item: Dict[str, Any],
         range_key_items: List[str] = [],
         overwrite: bool = False,
+        gsi_key_schemas: List[Dict[str, Any]] = [],
+        range_key_encoders: RangeKeyEncoders = {},
     ) -> Dict[str, Any]:
         timestamp = datetime.utcnow().isoformat()
-        item = copy.deepcopy(put_item)
-        DynamoDBUtils.__add_range_key(item, range_key_items)
+        # Só atributos de primeiro nível são acrescentados, então a cópia rasa
+        # basta e os valores aninhados não são duplicados
+        item = dict(put_item)
+        DynamoDBUtils.__add_range_key(item, range_key_items, range_key_encoders)
         item["created_at"] = timestamp
         item["updated_at"] = timestamp
+        DynamoDBUtils.add_time_bucket_keys(item, gsi_key_schemas)
+        DynamoDBUtils.add_shard_keys(item, gsi_key_schemas)
 
         params = {"Item": item}
 
@@ -249,10 +449,13 @@ class DynamoDBUtils:
         projection_expression: Optional[List[str]],
         last_evaluated_key: Optional[Dict[str, Any]],
         limit: Optional[int],
+        shard: Optional[int] = None,
     ) -> Tuple[List[Dict[str, Any]], Optional[Dict[str, Any]]]:
         params: Dict[str, Any] = {}
 
-        DynamoDBUtils.__get_gsi_key_expression(params, gsi_key_schemas, key_condition)
+        DynamoDBUtils.__get_gsi_key_expression(
+            params, gsi_key_schemas, key_condition, shard
+        )
 
         DynamoDBUtils.__build_common_params(
             params, filter_condition, projection_expression, last_evaluated_key, limit
@@ -265,10 +468,22 @@ class DynamoDBUtils:
         key: Dict[str, Any],
         filter_condition: Dict[str, Any],
         update_items: Dict[str, Any],
+        gsi_key_schemas: List[Dict[str, Any]] = [],
     ) -> Dict[str, Any]:
         params: Dict[str, Any] = {"Key": key}
+        timestamp = datetime.utcnow().isoformat()
+        # O período do índice por tempo sai do mesmo updated_at gravado
+        update_items = DynamoDBUtils.add_time_bucket_keys(
+            dict(update_items, updated_at=timestamp), gsi_key_schemas
+        )
+
+        if any(DynamoDBUtils.get_shard_attribute(schema) for schema in gsi_key_schemas):
+            # Alterar o hash de um índice fragmentado também altera o seu shard
+            update_items = DynamoDBUtils.add_shard_keys(
+                update_items, gsi_key_schemas, key.get(PRIMARY_HASH_KEY)
+            )
 
-        DynamoDBUtils.build_update_expression(params, update_items)
+        DynamoDBUtils.build_update_expression(params, update_items, timestamp)
 
         DynamoDBUtils.build_filter_expression(
             params, filter_condition, "ConditionExpression"
@@ -276,6 +491,69 @@ class DynamoDBUtils:
 
         return params
 
+    @staticmethod
+    def build_backfill_item_params(
+        key: Dict[str, Any], attributes: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        # Grava atributos derivados sem alterar o updated_at do item
+        params: Dict[str, Any] = {"Key": key}
+        update_expression, names, values = build_update(attributes)
+
+        params["UpdateExpression"] = update_expression
+        DynamoDBUtils.merge_expression_attributes(params, names, values)
+
+        return params
+
+    @staticmethod
+    def serialize_attributes(attributes: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            key: TYPE_SERIALIZER.serialize(value) for key, value in attributes.items()
+        }
+
+    @staticmethod
+    def build_transact_update_item(
+        table_name: str,
+        key: Dict[str, Any],
+        filter_condition: Dict[str, Any],
+        update_items: Dict[str, Any],
+        gsi_key_schemas: List[Dict[str, Any]] = [],
+    ) -> Dict[str, Any]:
+        params = DynamoDBUtils.build_update_item_params(
+            key, filter_condition, dict(update_items), gsi_key_schemas
+        )
+
+        params["Key"] = DynamoDBUtils.serialize_attributes(params["Key"])
+        params["ExpressionAttributeValues"] = DynamoDBUtils.serialize_attributes(
+            params["ExpressionAttributeValues"]
+        )
+
+        return {"Update": {"TableName": table_name, **params}}
+
+    @staticmethod
+    def build_transact_move_items(
+        table_name: str, old_key: Dict[str, Any], item: Dict[str, Any]
+    ) -> List[Dict[str, Any]]:
+        # Grava o item com a nova chave e remove a antiga na mesma transação;
+        # as condições impedem sobrescrever ou recriar registros concorrentes
+        return [
+            {
+                "Put": {
+                    "TableName": table_name,
+                    "Item": DynamoDBUtils.serialize_attributes(item),
+                    "ConditionExpression": "attribute_not_exists(#id)",
+                    "ExpressionAttributeNames": {"#id": PRIMARY_HASH_KEY},
+                }
+            },
+            {
+                "Delete": {
+                    "TableName": table_name,
+                    "Key": DynamoDBUtils.serialize_attributes(old_key),
+                    "ConditionExpression": "attribute_exists(#id)",
+                    "ExpressionAttributeNames": {"#id": PRIMARY_HASH_KEY},
+                }
+            },
+        ]
+
     @staticmethod
     def datetime_serializer(obj):
         if isinstance(obj, datetime):
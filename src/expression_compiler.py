@@ -0,0 +1,156 @@
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
+
+EXPRESSION_CACHE_SIZE = 256
+
+KEY_CONDITION_PREFIX = "k"
+FILTER_CONDITION_PREFIX = "f"
+CONDITION_EXPRESSION_PREFIX = "c"
+
+DEFAULT_OPERATOR = "eq"
+
+COMPARISON_OPERATORS = {
+    "eq": "=",
+    "ne": "<>",
+    "lt": "<",
+    "lte": "<=",
+    "gt": ">",
+    "gte": ">=",
+}
+MULTI_VALUE_OPERATORS = ["in", "between"]
+OPERATORS = list(COMPARISON_OPERATORS) + MULTI_VALUE_OPERATORS + ["begins_with"]
+# Operadores aceitos pelo DynamoDB na chave de ordenação de um KeyConditionExpression
+KEY_CONDITION_OPERATORS = ["eq", "lt", "lte", "gt", "gte", "between", "begins_with"]
+
+# (atributo, operador, quantidade de valores)
+ConditionShape = Tuple[Tuple[str, str, int], ...]
+
+
+class ExpressionTemplate:
+    __slots__ = ("expression", "names", "value_placeholders", "expanded")
+
+    def __init__(
+        self,
+        expression: str,
+        names: Dict[str, str],
+        value_placeholders: Tuple[Tuple[str, ...], ...],
+        expanded: Optional[Tuple[bool, ...]] = None,
+    ):
+        self.expression = expression
+        self.names = names
+        self.value_placeholders = value_placeholders
+        # Indica quais valores são listas distribuídas em vários placeholders
+        self.expanded = expanded or tuple(False for _ in value_placeholders)
+
+    def bind(self, values: List[Any]) -> Dict[str, Any]:
+        expression_attribute_values: Dict[str, Any] = {}
+
+        for placeholders, expanded, value in zip(
+            self.value_placeholders, self.expanded, values
+        ):
+            if not expanded:
+                expression_attribute_values[placeholders[0]] = value
+            else:
+                for placeholder, item in zip(placeholders, value):
+                    expression_attribute_values[placeholder] = item
+
+        return expression_attribute_values
+
+
+def parse_condition_key(key: str) -> Tuple[str, str]:
+    key_and_operator = key.split("#")
+    operator = key_and_operator[1] if len(key_and_operator) > 1 else DEFAULT_OPERATOR
+
+    assert operator in OPERATORS, f"Invalid operator: {operator}"
+
+    return key_and_operator[0], operator
+
+
+def build_condition_shape(condition: Dict[str, Any]) -> ConditionShape:
+    shape = []
+
+    for key, value in condition.items():
+        attr, operator = parse_condition_key(key)
+
+        if operator == "in":
+            arity = len(value)
+            assert arity > 0, "The in operator requires at least one value"
+        elif operator == "between":
+            arity = 2
+        else:
+            arity = 1
+
+        shape.append((attr, operator, arity))
+
+    return tuple(shape)
+
+
+@lru_cache(maxsize=EXPRESSION_CACHE_SIZE)
+def compile_condition(shape: ConditionShape, prefix: str) -> ExpressionTemplate:
+    expressions = []
+    names: Dict[str, str] = {}
+    value_placeholders = []
+    expanded = []
+
+    for index, (attr, operator, arity) in enumerate(shape):
+        name = f"#{prefix}{index}"
+        names[name] = attr
+
+        if operator in MULTI_VALUE_OPERATORS:
+            values = tuple(f":{prefix}{index}_{item}" for item in range(arity))
+        else:
+            values = (f":{prefix}{index}",)
+
+        value_placeholders.append(values)
+        expanded.append(operator in MULTI_VALUE_OPERATORS)
+
+        if operator in COMPARISON_OPERATORS:
+            expressions.append(f"{name} {COMPARISON_OPERATORS[operator]} {values[0]}")
+        elif operator == "in":
+            expressions.append(f"{name} IN ({', '.join(values)})")
+        elif operator == "between":
+            expressions.append(f"{name} BETWEEN {values[0]} AND {values[1]}")
+        elif operator == "begins_with":
+            expressions.append(f"begins_with({name}, {values[0]})")
+
+    return ExpressionTemplate(
+        " AND ".join(expressions), names, tuple(value_placeholders), tuple(expanded)
+    )
+
+
+@lru_cache(maxsize=EXPRESSION_CACHE_SIZE)
+def compile_update(keys: Tuple[str, ...]) -> ExpressionTemplate:
+    expression = "SET " + ", ".join(f"#{key} = :{key}" for key in keys)
+    names = {f"#{key}": key for key in keys}
+    value_placeholders = tuple((f":{key}",) for key in keys)
+
+    return ExpressionTemplate(expression, names, value_placeholders)
+
+
+def build_condition(
+    condition: Dict[str, Any], prefix: str
+) -> Tuple[str, Dict[str, str], Dict[str, Any]]:
+    template = compile_condition(build_condition_shape(condition), prefix)
+
+    return (
+        template.expression,
+        dict(template.names),
+        template.bind(list(condition.values())),
+    )
+
+
+def build_update(
+    update_items: Dict[str, Any],
+) -> Tuple[str, Dict[str, str], Dict[str, Any]]:
+    template = compile_update(tuple(update_items.keys()))
+
+    return (
+        template.expression,
+        dict(template.names),
+        template.bind(list(update_items.values())),
+    )
+
+
+def clear_expression_cache() -> None:
+    compile_condition.cache_clear()
+    compile_update.cache_clear()
@@ -0,0 +1,208 @@
+import logging
+import math
+import threading
+from abc import ABC, abstractmethod
+from collections import deque
+from typing import Any, Dict, List, Optional, Tuple
+
+THROTTLING_ERRORS = [
+    "ProvisionedThroughputExceededException",
+    "ThrottlingException",
+    "RequestLimitExceeded",
+]
+
+DEFAULT_SAMPLE_SIZE = 1024
+DEFAULT_PERCENTILES = [50, 90, 99]
+
+MetricsKey = Tuple[str, str, Optional[str]]
+
+
+class OperationRecord:
+    __slots__ = (
+        "operation",
+        "table_name",
+        "index_name",
+        "duration_ms",
+        "pages",
+        "items_returned",
+        "items_scanned",
+        "consumed_read_units",
+        "consumed_write_units",
+        "retries",
+        "throttles",
+        "error",
+    )
+
+    def __init__(
+        self,
+        operation: str,
+        table_name: str,
+        index_name: Optional[str] = None,
+        duration_ms: float = 0.0,
+        pages: int = 1,
+        items_returned: int = 0,
+        items_scanned: int = 0,
+        consumed_read_units: float = 0.0,
+        consumed_write_units: float = 0.0,
+        retries: int = 0,
+        throttles: int = 0,
+        error: Optional[str] = None,
+    ):
+        self.operation = operation
+        self.table_name = table_name
+        self.index_name = index_name
+        self.duration_ms = duration_ms
+        self.pages = pages
+        self.items_returned = items_returned
+        self.items_scanned = items_scanned
+        self.consumed_read_units = consumed_read_units
+        self.consumed_write_units = consumed_write_units
+        self.retries = retries
+        self.throttles = throttles
+        self.error = error
+
+
+class Instrumentation:
+    # Sem instrumentação, o execute nem chega a montar o registro
+    enabled = False
+
+    def record(self, record: OperationRecord) -> None:
+        pass
+
+
+NOOP_INSTRUMENTATION = Instrumentation()
+
+
+class MetricsExporter(ABC):
+    @abstractmethod
+    def export(self, snapshot: List[Dict[str, Any]]) -> None:
+        pass
+
+
+class LoggingExporter(MetricsExporter):
+    def __init__(self, logger: Optional[logging.Logger] = None):
+        self.logger = logger or logging.getLogger(__name__)
+
+    def export(self, snapshot: List[Dict[str, Any]]) -> None:
+        for metrics in snapshot:
+            self.logger.info("dynamodb metrics %s", metrics)
+
+
+class OperationMetrics:
+    def __init__(self, sample_size: int):
+        self.calls = 0
+        self.errors = 0
+        self.pages = 0
+        self.items_returned = 0
+        self.items_scanned = 0
+        self.consumed_read_units = 0.0
+        self.consumed_write_units = 0.0
+        self.retries = 0
+        self.throttles = 0
+        self.total_duration_ms = 0.0
+        # Janela deslizante das últimas durações, usada nos percentis
+        self.durations: deque = deque(maxlen=sample_size)
+
+    def add(self, record: OperationRecord) -> None:
+        self.calls += 1
+        self.errors += 1 if record.error else 0
+        self.pages += record.pages
+        self.items_returned += record.items_returned
+        self.items_scanned += record.items_scanned
+        self.consumed_read_units += record.consumed_read_units
+        self.consumed_write_units += record.consumed_write_units
+        self.retries += record.retries
+        self.throttles += record.throttles
+        self.total_duration_ms += record.duration_ms
+        self.durations.append(record.duration_ms)
+
+    def percentile(self, percentile: float) -> Optional[float]:
+        if not self.durations:
+            return None
+
+        durations = sorted(self.durations)
+        rank = max(math.ceil(percentile / 100 * len(durations)), 1)
+
+        return durations[rank - 1]
+
+
+class MetricsAggregator(Instrumentation):
+    enabled = True
+
+    def __init__(
+        self,
+        sample_size: int = DEFAULT_SAMPLE_SIZE,
+        percentiles: List[float] = DEFAULT_PERCENTILES,
+    ):
+        self.sample_size = sample_size
+        self.percentiles = percentiles
+        self.metrics: Dict[MetricsKey, OperationMetrics] = {}
+        self.lock = threading.Lock()
+
+    def record(self, record: OperationRecord) -> None:
+        key = (record.operation, record.table_name, record.index_name)
+
+        with self.lock:
+            metrics = self.metrics.get(key)
+
+            if metrics is None:
+                metrics = OperationMetrics(self.sample_size)
+                self.metrics[key] = metrics
+
+            metrics.add(record)
+
+    def get(
+        self, operation: str, table_name: str, index_name: Optional[str] = None
+    ) -> Optional[OperationMetrics]:
+        with self.lock:
+            return self.metrics.get((operation, table_name, index_name))
+
+    def snapshot(self, reset: bool = False) -> List[Dict[str, Any]]:
+        with self.lock:
+            snapshot = [
+                self.__build_snapshot(key, metrics)
+                for key, metrics in self.metrics.items()
+            ]
+
+            if reset:
+                self.metrics.clear()
+
+        return snapshot
+
+    def __build_snapshot(
+        self, key: MetricsKey, metrics: OperationMetrics
+    ) -> Dict[str, Any]:
+        operation, table_name, index_name = key
+
+        return {
+            "operation": operation,
+            "table_name": table_name,
+            "index_name": index_name,
+            "calls": metrics.calls,
+            "errors": metrics.errors,
+            "pages": metrics.pages,
+            "items_returned": metrics.items_returned,
+            "items_scanned": metrics.items_scanned,
+            # Fração dos itens lidos que o filtro descartou
+            "filter_waste": (
+                1 - metrics.items_returned / metrics.items_scanned
+                if metrics.items_scanned
+                else 0.0
+            ),
+            "consumed_read_units": metrics.consumed_read_units,
+            "consumed_write_units": metrics.consumed_write_units,
+            "retries": metrics.retries,
+            "throttles": metrics.throttles,
+            "total_duration_ms": metrics.total_duration_ms,
+            **{
+                f"p{percentile}_ms": metrics.percentile(percentile)
+                for percentile in self.percentiles
+            },
+        }
+
+    def export(self, exporter: MetricsExporter, reset: bool = False) -> None:
+        exporter.export(self.snapshot(reset))
+
+    def reset(self) -> None:
+        with self.lock:
+            self.metrics.clear()
@@ -0,0 +1,117 @@
+import queue
+import threading
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+PREFETCH_PUT_TIMEOUT = 0.05
+
+FetchPage = Callable[
+    [Optional[Dict[str, Any]]], Tuple[List[Dict[str, Any]], Optional[Dict[str, Any]]]
+]
+
+_END_OF_PAGES = object()
+
+
+class PagePrefetcher:
+    def __init__(
+        self,
+        fetch_page: FetchPage,
+        last_evaluated_key: Optional[Dict[str, Any]],
+        depth: int,
+    ):
+        if depth < 1:
+            raise ValueError("Prefetch depth must be greater than zero")
+
+        # Cada fonte é lida por uma thread própria e todas dividem a mesma fila
+        self.sources: List[Tuple[FetchPage, Optional[Dict[str, Any]]]] = [
+            (fetch_page, last_evaluated_key)
+        ]
+        self.pages: queue.Queue = queue.Queue(maxsize=depth)
+        self.cancelled = threading.Event()
+        self.threads: List[threading.Thread] = []
+
+    @property
+    def thread(self) -> Optional[threading.Thread]:
+        return self.threads[0] if self.threads else None
+
+    def __enter__(self) -> "PagePrefetcher":
+        self.start()
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def __iter__(self) -> Iterator[List[Dict[str, Any]]]:
+        if not self.threads:
+            self.start()
+
+        running = len(self.threads)
+
+        while running:
+            page, error = self.pages.get()
+
+            if error is not None:
+                raise error
+
+            if page is _END_OF_PAGES:
+                running -= 1
+                continue
+
+            yield page
+
+    def start(self) -> None:
+        self.threads = [
+            threading.Thread(target=self.__produce, args=source, daemon=True)
+            for source in self.sources
+        ]
+
+        for thread in self.threads:
+            thread.start()
+
+    def close(self) -> None:
+        self.cancelled.set()
+
+        # Libera o produtor caso ele esteja bloqueado na fila cheia
+        while not self.pages.empty():
+            self.pages.get_nowait()
+
+        for thread in self.threads:
+            if thread is not threading.current_thread():
+                thread.join()
+
+    def __put(self, page: Any, error: Optional[BaseException] = None) -> bool:
+        while not self.cancelled.is_set():
+            try:
+                self.pages.put((page, error), timeout=PREFETCH_PUT_TIMEOUT)
+                return True
+            except queue.Full:
+                continue
+
+        return False
+
+    def __produce(
+        self, fetch_page: FetchPage, last_evaluated_key: Optional[Dict[str, Any]]
+    ) -> None:
+        try:
+            while not self.cancelled.is_set():
+                items, last_evaluated_key = fetch_page(last_evaluated_key)
+
+                if items and not self.__put(items):
+                    return
+
+                if not last_evaluated_key:
+                    break
+        except Exception as e:
+            self.__put(None, e)
+            return
+
+        self.__put(_END_OF_PAGES)
+
+
+class ParallelPagePrefetcher(PagePrefetcher):
+    def __init__(self, fetch_pages: List[FetchPage], depth: int):
+        if not fetch_pages:
+            raise ValueError("At least one page source is required")
+
+        super().__init__(fetch_pages[0], None, depth)
+        # As páginas chegam na ordem em que cada fonte termina de lê-las
+        self.sources = [(fetch_page, None) for fetch_page in fetch_pages]
@@ -0,0 +1,508 @@
+import math
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from expression_compiler import (
+    parse_condition_key,
+    DEFAULT_OPERATOR,
+    KEY_CONDITION_OPERATORS,
+)
+
+PRIMARY_HASH_KEY = "id"
+PRIMARY_RANGE_KEY = "id_range"
+RANGE_KEY_SEPARATOR = "#"
+
+GSI_INDEX_NAME_KEY = "index_name"
+GSI_HASH_KEY = "HASH"
+GSI_RANGE_KEY = "RANGE"
+GSI_SHARDS_KEY = "SHARDS"
+
+PROJECTION_ALL = "ALL"
+PROJECTION_KEYS_ONLY = "KEYS_ONLY"
+
+DEFAULT_ESTIMATED_ITEM_COUNT = 100_000
+DEFAULT_ATTRIBUTE_CARDINALITY = 100
+DEFAULT_KEYS_ONLY_ITEM_SIZE = 32
+
+# Leitura eventualmente consistente: meia unidade a cada 4 KB, por chamada
+READ_UNIT_BYTES = 4 * 1024
+EVENTUALLY_CONSISTENT_READ_UNITS = 0.5
+
+# Seletividade dos operadores sem estatísticas (as de comparação seguem a
+# estimativa clássica de 1/3)
+BEGINS_WITH_SELECTIVITY = 0.1
+BETWEEN_SELECTIVITY = 0.25
+COMPARISON_SELECTIVITY = 1 / 3
+
+# Formatos de condição distintos costumam ser poucos; acima do limite, os novos
+# formatos só deixam de ir para o cache
+PLAN_CACHE_SIZE = 1024
+
+Predicate = Tuple[str, str, str, Any]
+PlanShape = Tuple[Tuple[str, ...], Tuple[str, ...], Tuple[str, ...], Tuple[int, ...]]
+
+
+class QueryPlan:
+    __slots__ = (
+        "index_name",
+        "gsi_key_schema",
+        "key_condition",
+        "filter_condition",
+        "shards",
+        "estimated_items_read",
+        "estimated_items_returned",
+        "estimated_rcu",
+    )
+
+    def __init__(
+        self,
+        index_name: Optional[str],
+        gsi_key_schema: Optional[Dict[str, Any]],
+        key_condition: Dict[str, Any],
+        filter_condition: Dict[str, Any],
+        shards: int = 0,
+        estimated_items_read: float = 0.0,
+        estimated_items_returned: float = 0.0,
+        estimated_rcu: float = 0.0,
+    ):
+        self.index_name = index_name
+        self.gsi_key_schema = gsi_key_schema
+        self.key_condition = key_condition
+        self.filter_condition = filter_condition
+        self.shards = shards
+        self.estimated_items_read = estimated_items_read
+        self.estimated_items_returned = estimated_items_returned
+        self.estimated_rcu = estimated_rcu
+
+    def explain(self) -> Dict[str, Any]:
+        return {
+            "index_name": self.index_name,
+            "key_condition": self.key_condition,
+            "filter_condition": self.filter_condition,
+            "shards": self.shards,
+            "estimated_items_read": self.estimated_items_read,
+            "estimated_items_returned": self.estimated_items_returned,
+            "estimated_rcu": self.estimated_rcu,
+        }
+
+
+class QueryPlanner:
+    def __init__(
+        self,
+        has_range_key: bool,
+        range_key_items: List[str],
+        gsi_key_schemas: List[Dict[str, Any]],
+        max_item_size: int,
+        item_count: int = 0,
+        index_projections: Dict[str, Dict[str, Any]] = {},
+        attribute_cardinality: Dict[str, int] = {},
+        range_key_encoders: Dict[str, Callable[[Any], str]] = {},
+    ):
+        self.has_range_key = has_range_key
+        self.range_key_items = range_key_items
+        self.gsi_key_schemas = gsi_key_schemas
+        self.max_item_size = max_item_size
+        # Tabelas recém-criadas informam zero itens; o valor padrão mantém a
+        # proporção entre as estimativas
+        self.item_count = item_count or DEFAULT_ESTIMATED_ITEM_COUNT
+        self.index_projections = index_projections
+        self.attribute_cardinality = attribute_cardinality
+        self.range_key_encoders = range_key_encoders
+        # Índice escolhido por formato de condição (chaves e operadores); os
+        # valores só entram na montagem do plano do índice escolhido
+        self.plan_cache: Dict[PlanShape, Optional[Dict[str, Any]]] = {}
+
+    def selectivity(self, attr: str, operator: str, value: Any) -> float:
+        cardinality = self.attribute_cardinality.get(
+            attr, DEFAULT_ATTRIBUTE_CARDINALITY
+        )
+
+        if operator == DEFAULT_OPERATOR:
+            return 1 / cardinality
+        elif operator == "ne":
+            return 1 - 1 / cardinality
+        elif operator == "in":
+            return min(len(value) / cardinality, 1.0)
+        elif operator == "begins_with":
+            return BEGINS_WITH_SELECTIVITY
+        elif operator == "between":
+            return BETWEEN_SELECTIVITY
+
+        return COMPARISON_SELECTIVITY
+
+    def plan(
+        self,
+        key_condition: Dict[str, Any],
+        filter_condition: Optional[Dict[str, Any]] = None,
+        projection_expression: Optional[List[str]] = None,
+    ) -> QueryPlan:
+        shape = self.__build_shape(
+            key_condition, filter_condition, projection_expression
+        )
+
+        if shape in self.plan_cache:
+            gsi_key_schema = self.plan_cache[shape]
+            predicates = self.__build_predicates(key_condition, filter_condition)
+
+            if gsi_key_schema is None:
+                return self.__plan_table(predicates)
+
+            return self.__plan_index(gsi_key_schema, predicates, projection_expression)
+
+        candidates = self.candidates(
+            key_condition, filter_condition, projection_expression
+        )
+        plan = candidates[0]
+
+        if len(self.plan_cache) < PLAN_CACHE_SIZE:
+            self.plan_cache[shape] = plan.gsi_key_schema
+
+        return plan
+
+    def explain(
+        self,
+        key_condition: Dict[str, Any],
+        filter_condition: Optional[Dict[str, Any]] = None,
+        projection_expression: Optional[List[str]] = None,
+    ) -> Dict[str, Any]:
+        candidates = self.candidates(
+            key_condition, filter_condition, projection_expression
+        )
+
+        return {
+            "plan": candidates[0].explain(),
+            "estimated_rcu": candidates[0].estimated_rcu,
+            "candidates": [candidate.explain() for candidate in candidates],
+        }
+
+    def candidates(
+        self,
+        key_condition: Dict[str, Any],
+        filter_condition: Optional[Dict[str, Any]] = None,
+        projection_expression: Optional[List[str]] = None,
+    ) -> List[QueryPlan]:
+        assert key_condition, "Key condition is required"
+
+        predicates = self.__build_predicates(key_condition, filter_condition)
+        candidates = []
+        table_plan = self.__plan_table(predicates)
+
+        if table_plan is not None:
+            candidates.append(table_plan)
+
+        for gsi_key_schema in self.gsi_key_schemas:
+            gsi_plan = self.__plan_index(
+                gsi_key_schema, predicates, projection_expression
+            )
+
+            if gsi_plan is not None:
+                candidates.append(gsi_plan)
+
+        if not candidates:
+            key_set = list(key_condition)
+            raise ValueError(f"Index not found for the given condition {key_set}.")
+
+        # Empates ficam com a tabela e depois com a ordem dos índices
+        ranked = sorted(
+            enumerate(candidates),
+            key=lambda item: (
+                item[1].estimated_rcu,
+                item[1].estimated_items_read,
+                item[0],
+            ),
+        )
+
+        return [candidate for _, candidate in ranked]
+
+    def __build_shape(
+        self,
+        key_condition: Dict[str, Any],
+        filter_condition: Optional[Dict[str, Any]],
+        projection_expression: Optional[List[str]],
+    ) -> PlanShape:
+        filter_condition = filter_condition or {}
+        # A quantidade de valores do "in" muda a seletividade estimada
+        in_sizes = tuple(
+            len(value)
+            for condition in (key_condition, filter_condition)
+            for key, value in condition.items()
+            if key.endswith("#in")
+        )
+
+        return (
+            tuple(key_condition),
+            tuple(filter_condition),
+            tuple(projection_expression or ()),
+            in_sizes,
+        )
+
+    def __build_predicates(
+        self,
+        key_condition: Dict[str, Any],
+        filter_condition: Optional[Dict[str, Any]],
+    ) -> List[Predicate]:
+        # Chave e filtro formam uma única conjunção: qualquer predicado pode
+        # virar condição de chave, e o que sobra vai para o filtro
+        return [
+            (key, *parse_condition_key(key), value)
+            for condition in (key_condition, filter_condition or {})
+            for key, value in condition.items()
+        ]
+
+    def __find_hash(
+        self, predicates: List[Predicate], hash_key: str
+    ) -> Optional[Predicate]:
+        for predicate in predicates:
+            _, attr, operator, _ = predicate
+
+            if attr == hash_key and operator == DEFAULT_OPERATOR:
+                return predicate
+
+        return None
+
+    @staticmethod
+    def __covers(range_predicate: Predicate, predicate: Predicate) -> bool:
+        # A condição de chave escolhida implica o outro predicado da mesma chave
+        if range_predicate is predicate:
+            return True
+
+        _, _, operator, value = range_predicate
+        _, _, other_operator, other_value = predicate
+
+        if other_operator == DEFAULT_OPERATOR:
+            return operator == DEFAULT_OPERATOR and value == other_value
+
+        if other_operator == "begins_with":
+            return (
+                operator in (DEFAULT_OPERATOR, "begins_with")
+                and isinstance(value, str)
+                and isinstance(other_value, str)
+                and value.startswith(other_value)
+            )
+
+        return False
+
+    def __find_range(
+        self,
+        predicates: List[Predicate],
+        range_key: Optional[str],
+        built: Optional[Tuple[Predicate, float]] = None,
+    ) -> Tuple[Optional[Predicate], float, List[Predicate]]:
+        # O DynamoDB não aceita a chave de ordenação no filtro: os predicados
+        # dela são consumidos pela condição de chave que implica todos eles
+        range_predicates = [
+            predicate for predicate in predicates if predicate[1] == range_key
+        ]
+        explicit = [
+            (predicate, self.selectivity(*predicate[1:]))
+            for predicate in range_predicates
+            if predicate[2] in KEY_CONDITION_OPERATORS
+        ]
+        candidates = list(explicit)
+
+        if built is not None and built[0] is not None:
+            candidates.append(built)
+
+        covering = [
+            candidate
+            for candidate in candidates
+            if all(self.__covers(candidate[0], other) for other in range_predicates)
+        ]
+        best, best_selectivity = None, 1.0
+
+        # Sem uma condição que implique as demais, vale a de maior seletividade
+        # entre as originais, e as outras seguem no filtro como antes
+        for predicate, selectivity in covering or explicit:
+            if selectivity < best_selectivity:
+                best, best_selectivity = predicate, selectivity
+
+        if best is None:
+            return None, 1.0, []
+
+        if covering:
+            return best, best_selectivity, range_predicates
+
+        return best, best_selectivity, [best]
+
+    def __build_range_key(
+        self, predicates: List[Predicate]
+    ) -> Tuple[Optional[Predicate], float]:
+        # O id_range é a junção dos range_key_items: igualdades no início da
+        # lista viram um prefixo consultável com begins_with
+        equalities = {
+            attr: value
+            for _, attr, operator, value in predicates
+            if operator == DEFAULT_OPERATOR
+        }
+        prefixes = {
+            attr: value
+            for _, attr, operator, value in predicates
+            if operator == "begins_with"
+        }
+        values: List[str] = []
+        selectivity = 1.0
+
+        for attr in self.range_key_items:
+            encoder = self.range_key_encoders.get(attr, str)
+
+            if attr in equalities:
+                values.append(encoder(equalities[attr]))
+                selectivity *= self.selectivity(attr, DEFAULT_OPERATOR, None)
+                continue
+
+            # O prefixo de um valor codificado não é o prefixo da codificação
+            if attr in prefixes and attr not in self.range_key_encoders:
+                values.append(str(prefixes[attr]))
+                selectivity *= BEGINS_WITH_SELECTIVITY
+                prefix = RANGE_KEY_SEPARATOR.join(values)
+            elif values:
+                prefix = RANGE_KEY_SEPARATOR.join(values) + RANGE_KEY_SEPARATOR
+            else:
+                return None, 1.0
+
+            key = f"{PRIMARY_RANGE_KEY}#begins_with"
+
+            return (key, PRIMARY_RANGE_KEY, "begins_with", prefix), selectivity
+
+        value = RANGE_KEY_SEPARATOR.join(values)
+
+        return (PRIMARY_RANGE_KEY, PRIMARY_RANGE_KEY, DEFAULT_OPERATOR, value), (
+            selectivity
+        )
+
+    def __plan_table(self, predicates: List[Predicate]) -> Optional[QueryPlan]:
+        hash_predicate = self.__find_hash(predicates, PRIMARY_HASH_KEY)
+
+        if hash_predicate is None:
+            return None
+
+        range_predicate, range_selectivity = None, 1.0
+        consumed = [hash_predicate]
+
+        if self.has_range_key:
+            # O range montado não consome os predicados dos range_key_items, que
+            # continuam no filtro e garantem o mesmo resultado
+            range_predicate, range_selectivity, range_consumed = self.__find_range(
+                predicates, PRIMARY_RANGE_KEY, self.__build_range_key(predicates)
+            )
+            consumed += range_consumed
+
+        return self.__build_plan(
+            None,
+            None,
+            predicates,
+            hash_predicate,
+            range_predicate,
+            consumed,
+            range_selectivity,
+            self.max_item_size,
+        )
+
+    def __plan_index(
+        self,
+        gsi_key_schema: Dict[str, Any],
+        predicates: List[Predicate],
+        projection_expression: Optional[List[str]],
+    ) -> Optional[QueryPlan]:
+        hash_predicate = self.__find_hash(predicates, gsi_key_schema[GSI_HASH_KEY])
+
+        if hash_predicate is None:
+            return None
+
+        range_key = gsi_key_schema.get(GSI_RANGE_KEY)
+        range_predicate, range_selectivity, range_consumed = self.__find_range(
+            predicates, range_key
+        )
+        consumed = [hash_predicate] + range_consumed
+
+        index_name = gsi_key_schema[GSI_INDEX_NAME_KEY]
+        projection = self.index_projections.get(index_name, {})
+        projection_type = projection.get("ProjectionType", PROJECTION_ALL)
+
+        if projection_type != PROJECTION_ALL:
+            # O índice só atende se tiver todos os atributos lidos ou filtrados
+            if not projection_expression:
+                return None
+
+            available = {PRIMARY_HASH_KEY, PRIMARY_RANGE_KEY, hash_predicate[1]}
+            available.update(projection.get("NonKeyAttributes", []))
+
+            if range_key:
+                available.add(range_key)
+
+            needed = set(projection_expression)
+            needed.update(predicate[1] for predicate in predicates)
+
+            if not needed <= available:
+                return None
+
+        item_size = (
+            DEFAULT_KEYS_ONLY_ITEM_SIZE
+            if projection_type == PROJECTION_KEYS_ONLY
+            else self.max_item_size
+        )
+
+        return self.__build_plan(
+            index_name,
+            gsi_key_schema,
+            predicates,
+            hash_predicate,
+            range_predicate,
+            consumed,
+            range_selectivity,
+            item_size,
+            gsi_key_schema.get(GSI_SHARDS_KEY) or 0,
+        )
+
+    def __build_plan(
+        self,
+        index_name: Optional[str],
+        gsi_key_schema: Optional[Dict[str, Any]],
+        predicates: List[Predicate],
+        hash_predicate: Predicate,
+        range_predicate: Optional[Predicate],
+        consumed: List[Predicate],
+        range_selectivity: float,
+        item_size: int,
+        shards: int = 0,
+    ) -> QueryPlan:
+        key_condition = {hash_predicate[0]: hash_predicate[3]}
+
+        if range_predicate is not None:
+            key_condition[range_predicate[0]] = range_predicate[3]
+
+        consumed_ids = {id(predicate) for predicate in consumed}
+        filter_condition: Dict[str, Any] = {}
+        filter_selectivity = 1.0
+
+        for predicate in predicates:
+            if id(predicate) in consumed_ids:
+                continue
+
+            key, attr, operator, value = predicate
+
+            if key in filter_condition and filter_condition[key] != value:
+                raise ValueError(f"Conflicting conditions for {key}.")
+
+            filter_condition[key] = value
+            filter_selectivity *= self.selectivity(attr, operator, value)
+
+        items_read = (
+            self.item_count
+            * self.selectivity(hash_predicate[1], DEFAULT_OPERATOR, None)
+            * range_selectivity
+        )
+        queries = max(shards, 1)
+        # Cada query cobra no mínimo uma unidade, mesmo sem itens
+        read_units = queries * max(
+            math.ceil(items_read / queries * item_size / READ_UNIT_BYTES), 1
+        )
+
+        return QueryPlan(
+            index_name,
+            gsi_key_schema,
+            key_condition,
+            filter_condition,
+            shards,
+            items_read,
+            items_read * filter_selectivity,
+            read_units * EVENTUALLY_CONSISTENT_READ_UNITS,
+        )
@@ -0,0 +1,174 @@
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+READ_CAPACITY = "read"
+WRITE_CAPACITY = "write"
+
+RATE_LIMIT_UTILIZATION = 0.9
+RATE_LIMIT_BURST_SECONDS = 1.0
+CONSUMED_CAPACITY_SMOOTHING = 0.2
+DEFAULT_CAPACITY_ESTIMATE = 1.0
+
+
+class TokenBucket:
+    def __init__(
+        self,
+        rate: float,
+        capacity: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        if rate <= 0:
+            raise ValueError("Token bucket rate must be greater than zero")
+
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else rate
+        self.tokens = self.capacity
+        self.clock = clock
+        self.updated_at = clock()
+        self.lock = threading.Lock()
+
+    def __refill(self) -> None:
+        now = self.clock()
+        elapsed = now - self.updated_at
+        self.updated_at = now
+        self.tokens = min(self.capacity, self.tokens + elapsed * self.rate)
+
+    def reserve(self, tokens: float) -> float:
+        # Os tokens são reservados imediatamente, deixando o saldo negativo;
+        # o chamador aguarda o tempo necessário para quitar a dívida
+        with self.lock:
+            self.__refill()
+            self.tokens -= tokens
+
+            return -self.tokens / self.rate if self.tokens < 0 else 0.0
+
+    def acquire(self, tokens: float = 1.0) -> float:
+        wait_time = self.reserve(tokens)
+
+        if wait_time > 0:
+            time.sleep(wait_time)
+
+        return wait_time
+
+    def consume(self, tokens: float) -> None:
+        with self.lock:
+            self.__refill()
+            self.tokens -= tokens
+
+    def set_rate(self, rate: float, capacity: Optional[float] = None) -> None:
+        with self.lock:
+            self.__refill()
+            self.rate = rate
+            self.capacity = capacity if capacity is not None else rate
+            self.tokens = min(self.tokens, self.capacity)
+
+
+class CapacityRateLimiter:
+    def __init__(
+        self,
+        read_capacity_units: float,
+        write_capacity_units: float,
+        utilization: float = RATE_LIMIT_UTILIZATION,
+        burst_seconds: float = RATE_LIMIT_BURST_SECONDS,
+    ):
+        self.utilization = utilization
+        self.burst_seconds = burst_seconds
+        self.buckets: Dict[str, TokenBucket] = {
+            READ_CAPACITY: self.__build_bucket(read_capacity_units),
+            WRITE_CAPACITY: self.__build_bucket(write_capacity_units),
+        }
+        # Estimativa de unidades por item, separada por operação
+        self.estimates: Dict[str, float] = {}
+        self.lock = threading.Lock()
+
+    def __build_bucket(self, capacity_units: float) -> TokenBucket:
+        rate = capacity_units * self.utilization
+        return TokenBucket(rate, rate * self.burst_seconds)
+
+    def set_capacity(
+        self, read_capacity_units: float, write_capacity_units: float
+    ) -> None:
+        for capacity, capacity_units in (
+            (READ_CAPACITY, read_capacity_units),
+            (WRITE_CAPACITY, write_capacity_units),
+        ):
+            rate = capacity_units * self.utilization
+            self.buckets[capacity].set_rate(rate, rate * self.burst_seconds)
+
+    def estimate(self, operation: str, item_count: int = 1) -> float:
+        with self.lock:
+            unit_estimate = self.estimates.get(operation, DEFAULT_CAPACITY_ESTIMATE)
+
+        return unit_estimate * max(item_count, 1)
+
+    def reserve(
+        self, capacity: str, operation: str, item_count: int = 1
+    ) -> Tuple[float, float]:
+        # Devolve a estimativa reservada e quanto tempo aguardar antes da chamada
+        estimate = self.estimate(operation, item_count)
+        return estimate, self.buckets[capacity].reserve(estimate)
+
+    def acquire(self, capacity: str, operation: str, item_count: int = 1) -> float:
+        estimate, wait_time = self.reserve(capacity, operation, item_count)
+
+        if wait_time > 0:
+            time.sleep(wait_time)
+
+        return estimate
+
+    def settle(
+        self,
+        capacity: str,
+        operation: str,
+        estimate: float,
+        consumed_units: Optional[float],
+        item_count: int = 1,
+    ) -> None:
+        if consumed_units is None:
+            return
+
+        # Ajusta o saldo com o consumo real e refina a estimativa das próximas chamadas
+        self.buckets[capacity].consume(consumed_units - estimate)
+        consumed_per_item = consumed_units / max(item_count, 1)
+
+        with self.lock:
+            unit_estimate = self.estimates.get(operation, DEFAULT_CAPACITY_ESTIMATE)
+            self.estimates[operation] = unit_estimate + CONSUMED_CAPACITY_SMOOTHING * (
+                consumed_per_item - unit_estimate
+            )
+
+    @staticmethod
+    def consumed_capacity_units(
+        consumed_capacity: Union[Dict[str, Any], List[Dict[str, Any]], None]
+    ) -> Optional[float]:
+        if not consumed_capacity:
+            return None
+
+        if isinstance(consumed_capacity, dict):
+            consumed_capacity = [consumed_capacity]
+
+        return float(
+            sum(capacity.get("CapacityUnits", 0) for capacity in consumed_capacity)
+        )
+
+
+RATE_LIMITERS: Dict[str, CapacityRateLimiter] = {}
+RATE_LIMITERS_LOCK = threading.Lock()
+
+
+def get_rate_limiter(
+    table_name: str, read_capacity_units: float, write_capacity_units: float
+) -> CapacityRateLimiter:
+    with RATE_LIMITERS_LOCK:
+        rate_limiter = RATE_LIMITERS.get(table_name)
+
+        if rate_limiter is None:
+            rate_limiter = CapacityRateLimiter(
+                read_capacity_units, write_capacity_units
+            )
+            RATE_LIMITERS[table_name] = rate_limiter
+        else:
+            rate_limiter.set_capacity(read_capacity_units, write_capacity_units)
+
+        return rate_limiter
@@ -0,0 +1,155 @@
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Iterable, Optional, Tuple
+
+DEFAULT_CACHE_TTL = 30
+DEFAULT_CACHE_MAX_ENTRIES = 1024
+DEFAULT_CACHE_MAX_BYTES = 16 * 1024 * 1024
+
+
+class CacheEntry:
+    __slots__ = ("value", "tags", "size", "expires_at")
+
+    def __init__(
+        self, value: Any, tags: Tuple[Hashable, ...], size: int, expires_at: float
+    ):
+        self.value = value
+        self.tags = tags
+        self.size = size
+        self.expires_at = expires_at
+
+
+class ReleaseCache:
+    def __init__(
+        self,
+        ttl: float = DEFAULT_CACHE_TTL,
+        max_entries: int = DEFAULT_CACHE_MAX_ENTRIES,
+        max_bytes: int = DEFAULT_CACHE_MAX_BYTES,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        if max_entries < 1 or max_bytes < 1:
+            raise ValueError("Cache limits must be greater than zero")
+
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.clock = clock
+        self.entries: "OrderedDict[Hashable, CacheEntry]" = OrderedDict()
+        # Geração por tag; uma leitura só é gravada se nenhuma escrita ocorreu durante ela
+        self.generations: Dict[Hashable, int] = {}
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def estimate_size(value: Any) -> int:
+        return len(json.dumps(value, default=str))
+
+    def stats(self) -> Dict[str, int]:
+        with self.lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self.entries),
+                "bytes": self.size,
+            }
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self.lock:
+            entry = self.entries.get(key)
+
+            if entry is not None and self.clock() >= entry.expires_at:
+                self.__remove(key)
+                self.evictions += 1
+                entry = None
+
+            if entry is None:
+                self.misses += 1
+                return None
+
+            self.entries.move_to_end(key)
+            self.hits += 1
+
+            return entry.value
+
+    def put(
+        self,
+        key: Hashable,
+        value: Any,
+        tags: Iterable[Hashable] = (),
+        generations: Optional[Dict[Hashable, int]] = None,
+    ) -> bool:
+        tags = tuple(tags)
+        size = self.estimate_size(value)
+
+        if size > self.max_bytes:
+            return False
+
+        with self.lock:
+            if generations is not None and any(
+                self.generations.get(tag, 0) != generation
+                for tag, generation in generations.items()
+            ):
+                return False
+
+            if key in self.entries:
+                self.__remove(key)
+
+            self.entries[key] = CacheEntry(value, tags, size, self.clock() + self.ttl)
+            self.size += size
+
+            while len(self.entries) > self.max_entries or self.size > self.max_bytes:
+                self.__remove(next(iter(self.entries)))
+                self.evictions += 1
+
+            return True
+
+    def get_or_load(
+        self, key: Hashable, tags: Iterable[Hashable], loader: Callable[[], Any]
+    ) -> Any:
+        value = self.get(key)
+
+        if value is not None:
+            return value
+
+        tags = tuple(tags)
+        generations = self.snapshot_generations(tags)
+        value = loader()
+        self.put(key, value, tags, generations)
+
+        return value
+
+    def snapshot_generations(self, tags: Iterable[Hashable]) -> Dict[Hashable, int]:
+        # Capturado antes da leitura e repassado ao put para descartar dados obsoletos
+        with self.lock:
+            return {tag: self.generations.get(tag, 0) for tag in tags}
+
+    def invalidate(self, *tags: Hashable) -> int:
+        with self.lock:
+            for tag in tags:
+                self.generations[tag] = self.generations.get(tag, 0) + 1
+
+            keys = [
+                key
+                for key, entry in self.entries.items()
+                if any(tag in entry.tags for tag in tags)
+            ]
+
+            for key in keys:
+                self.__remove(key)
+
+            return len(keys)
+
+    def clear(self) -> None:
+        with self.lock:
+            self.entries.clear()
+            self.size = 0
+
+    def __remove(self, key: Hashable) -> None:
+        entry = self.entries.pop(key)
+        self.size -= entry.size
@@ -0,0 +1,516 @@
+import logging
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import deque
+from datetime import datetime
+from typing import Any, Callable, Deque, Dict, List, Optional, Set, Tuple
+from boto3.dynamodb.types import TypeDeserializer
+from botocore.exceptions import ClientError
+from app_release_repository import (
+    AppReleaseRepository,
+    APP_DEFAULT_STATUS,
+    APPS_DEFAULT_STAGE,
+    APPS_DEFAULT_STATUS,
+)
+from aws_clients import describe_table, get_dynamo_db_streams_client
+
+EVENT_INSERT = "INSERT"
+EVENT_MODIFY = "MODIFY"
+EVENT_REMOVE = "REMOVE"
+
+ITERATOR_LATEST = "LATEST"
+ITERATOR_TRIM_HORIZON = "TRIM_HORIZON"
+ITERATOR_AFTER_SEQUENCE_NUMBER = "AFTER_SEQUENCE_NUMBER"
+
+EXPIRED_ITERATOR_ERROR = "ExpiredIteratorException"
+TRIMMED_DATA_ERROR = "TrimmedDataAccessException"
+
+REPLICA_INDEXED_ATTRIBUTES = ["id", "mdm", "stage", "status"]
+
+DEFAULT_BOOTSTRAP_SEGMENTS = 8
+DEFAULT_POLL_INTERVAL = 1.0
+DEFAULT_STREAM_RECORDS_LIMIT = 1000
+DEFAULT_SHARD_REFRESH_INTERVAL = 60
+MAX_POLL_BACKOFF = 30.0
+
+TYPE_DESERIALIZER = TypeDeserializer()
+
+ReplicaKey = Tuple[Any, ...]
+
+
+class ResyncRequiredError(Exception):
+    pass
+
+
+class ChangeRecord:
+    __slots__ = ("event_name", "keys", "new_image", "created_at", "sequence_number")
+
+    def __init__(
+        self,
+        event_name: str,
+        keys: Dict[str, Any],
+        new_image: Optional[Dict[str, Any]],
+        created_at: float,
+        sequence_number: Optional[str] = None,
+    ):
+        self.event_name = event_name
+        self.keys = keys
+        self.new_image = new_image
+        self.created_at = created_at
+        self.sequence_number = sequence_number
+
+
+def deserialize_image(image: Dict[str, Any]) -> Dict[str, Any]:
+    return {key: TYPE_DESERIALIZER.deserialize(value) for key, value in image.items()}
+
+
+def build_change_record(record: Dict[str, Any]) -> ChangeRecord:
+    change = record["dynamodb"]
+    created_at = change.get("ApproximateCreationDateTime")
+
+    if isinstance(created_at, datetime):
+        created_at = created_at.timestamp()
+
+    return ChangeRecord(
+        record["eventName"],
+        deserialize_image(change["Keys"]),
+        deserialize_image(change["NewImage"]) if "NewImage" in change else None,
+        float(created_at) if created_at is not None else time.time(),
+        change.get("SequenceNumber"),
+    )
+
+
+class ChangeSource(ABC):
+    @abstractmethod
+    def start(self) -> None:
+        pass
+
+    @abstractmethod
+    def read(self) -> List[ChangeRecord]:
+        pass
+
+
+class LocalChangeSource(ChangeSource):
+    def __init__(self, clock: Callable[[], float] = time.time):
+        self.clock = clock
+        self.lock = threading.Lock()
+        self.records: Deque[ChangeRecord] = deque()
+        self.started = False
+
+    def start(self) -> None:
+        # Como o iterador LATEST do stream, só vê o que for publicado depois
+        with self.lock:
+            self.records.clear()
+            self.started = True
+
+    def publish(
+        self,
+        event_name: str,
+        keys: Dict[str, Any],
+        new_image: Optional[Dict[str, Any]] = None,
+        created_at: Optional[float] = None,
+    ) -> None:
+        record = ChangeRecord(
+            event_name,
+            dict(keys),
+            new_image,
+            self.clock() if created_at is None else created_at,
+        )
+
+        with self.lock:
+            if self.started:
+                self.records.append(record)
+
+    def read(self) -> List[ChangeRecord]:
+        with self.lock:
+            records = list(self.records)
+            self.records.clear()
+
+        return records
+
+
+class DynamoDBStreamSource(ChangeSource):
+    def __init__(
+        self,
+        stream_arn: str,
+        client: Optional[Any] = None,
+        limit: int = DEFAULT_STREAM_RECORDS_LIMIT,
+        shard_refresh_interval: float = DEFAULT_SHARD_REFRESH_INTERVAL,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.stream_arn = stream_arn
+        self.client = client or get_dynamo_db_streams_client()
+        self.limit = limit
+        self.shard_refresh_interval = shard_refresh_interval
+        self.clock = clock
+        self.iterators: Dict[str, str] = {}
+        self.sequence_numbers: Dict[str, str] = {}
+        self.parents: Dict[str, Optional[str]] = {}
+        self.finished: Set[str] = set()
+        self.refreshed_at: Optional[float] = None
+        self.refresh_pending = False
+
+    @classmethod
+    def from_table(cls, table_name: str, **kwargs) -> "DynamoDBStreamSource":
+        stream_arn = describe_table(table_name)["Table"].get("LatestStreamArn")
+
+        if not stream_arn:
+            raise ValueError(f"Table {table_name} has no stream enabled")
+
+        return cls(stream_arn, **kwargs)
+
+    def __describe_shards(self) -> List[Dict[str, Any]]:
+        shards: List[Dict[str, Any]] = []
+        params = {"StreamArn": self.stream_arn}
+
+        while True:
+            description = self.client.describe_stream(**params)["StreamDescription"]
+            shards += description.get("Shards", [])
+
+            if not description.get("LastEvaluatedShardId"):
+                return shards
+
+            params["ExclusiveStartShardId"] = description["LastEvaluatedShardId"]
+
+    def __refresh_shards(self, iterator_type: str) -> None:
+        for shard in self.__describe_shards():
+            shard_id = shard["ShardId"]
+
+            if shard_id in self.iterators or shard_id in self.finished:
+                continue
+
+            self.parents[shard_id] = shard.get("ParentShardId")
+            self.iterators[shard_id] = self.__get_shard_iterator(
+                shard_id, iterator_type
+            )
+
+        self.refreshed_at = self.clock()
+        self.refresh_pending = False
+
+    def __get_shard_iterator(
+        self, shard_id: str, iterator_type: str, sequence_number: Optional[str] = None
+    ) -> str:
+        params = {
+            "StreamArn": self.stream_arn,
+            "ShardId": shard_id,
+            "ShardIteratorType": iterator_type,
+        }
+
+        if sequence_number is not None:
+            params["SequenceNumber"] = sequence_number
+
+        try:
+            return self.client.get_shard_iterator(**params)["ShardIterator"]
+        except ClientError as e:
+            if e.response["Error"]["Code"] == TRIMMED_DATA_ERROR:
+                raise ResyncRequiredError(f"Stream shard {shard_id} was trimmed") from e
+
+            raise
+
+    def __renew_shard_iterator(self, shard_id: str) -> None:
+        # O iterador expira em 15 minutos; a leitura continua do último registro
+        # lido, e sem ele não há como saber o que foi perdido
+        sequence_number = self.sequence_numbers.get(shard_id)
+
+        if sequence_number is None:
+            raise ResyncRequiredError(f"Stream shard {shard_id} iterator expired")
+
+        self.iterators[shard_id] = self.__get_shard_iterator(
+            shard_id, ITERATOR_AFTER_SEQUENCE_NUMBER, sequence_number
+        )
+
+    def start(self) -> None:
+        self.iterators.clear()
+        self.sequence_numbers.clear()
+        self.parents.clear()
+        self.finished.clear()
+        self.__refresh_shards(ITERATOR_LATEST)
+
+    def read(self) -> List[ChangeRecord]:
+        if self.refreshed_at is None:
+            raise ValueError("Stream source must be started before reading")
+
+        # Shards criados depois do início são lidos desde o primeiro registro
+        if (
+            self.refresh_pending
+            or self.clock() - self.refreshed_at >= self.shard_refresh_interval
+        ):
+            self.__refresh_shards(ITERATOR_TRIM_HORIZON)
+
+        records: List[ChangeRecord] = []
+
+        for shard_id in list(self.iterators):
+            # Um shard filho só é lido depois que o pai foi esgotado, para manter
+            # a ordem das mudanças de uma mesma chave
+            if self.parents.get(shard_id) in self.iterators:
+                continue
+
+            try:
+                response = self.client.get_records(
+                    ShardIterator=self.iterators[shard_id], Limit=self.limit
+                )
+            except ClientError as e:
+                code = e.response["Error"]["Code"]
+
+                if code == TRIMMED_DATA_ERROR:
+                    raise ResyncRequiredError(
+                        f"Stream shard {shard_id} was trimmed"
+                    ) from e
+
+                if code != EXPIRED_ITERATOR_ERROR:
+                    raise
+
+                # Os registros do shard são lidos na próxima chamada
+                self.__renew_shard_iterator(shard_id)
+                continue
+
+            shard_records = [
+                build_change_record(record) for record in response.get("Records", [])
+            ]
+            records += shard_records
+
+            if shard_records and shard_records[-1].sequence_number is not None:
+                self.sequence_numbers[shard_id] = shard_records[-1].sequence_number
+
+            if response.get("NextShardIterator"):
+                self.iterators[shard_id] = response["NextShardIterator"]
+            else:
+                # O shard foi fechado; os filhos aparecem na próxima leitura
+                del self.iterators[shard_id]
+                self.finished.add(shard_id)
+                self.refresh_pending = True
+
+        return records
+
+
+class ReleaseReplica:
+    def __init__(
+        self,
+        repository: AppReleaseRepository,
+        source: ChangeSource,
+        bootstrap_segments: int = DEFAULT_BOOTSTRAP_SEGMENTS,
+        clock: Callable[[], float] = time.time,
+        logger: Optional[logging.Logger] = None,
+    ):
+        if bootstrap_segments < 1:
+            raise ValueError("Bootstrap segments must be greater than zero")
+
+        self.repository = repository
+        self.source = source
+        self.bootstrap_segments = bootstrap_segments
+        self.clock = clock
+        self.logger = logger or logging.getLogger(__name__)
+        self.lock = threading.RLock()
+        self.items: Dict[ReplicaKey, Dict[str, Any]] = {}
+        self.indexes: Dict[str, Dict[Any, Dict[ReplicaKey, Dict[str, Any]]]] = {
+            attr: {} for attr in REPLICA_INDEXED_ATTRIBUTES
+        }
+        self.synced_at: Optional[float] = None
+        self.records_applied = 0
+        self.poll_errors = 0
+        self.resyncs = 0
+        self.stopped = threading.Event()
+        self.thread: Optional[threading.Thread] = None
+
+    def __enter__(self) -> "ReleaseReplica":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.stop()
+
+    def bootstrap(self) -> int:
+        # O stream é posicionado antes da varredura; as mudanças feitas durante
+        # ela são reaplicadas no primeiro poll e a cópia converge
+        self.source.start()
+        started_at = self.clock()
+        pages = list(self.repository.iter_parallel_scan_pages(self.bootstrap_segments))
+
+        with self.lock:
+            self.items.clear()
+
+            for index in self.indexes.values():
+                index.clear()
+
+            for items in pages:
+                for item in items:
+                    self.__put(item)
+
+            self.synced_at = started_at
+
+            return len(self.items)
+
+    def __put(self, item: Dict[str, Any]) -> None:
+        key = self.repository.build_primary_key_tuple(item)
+        self.__remove(key)
+        self.items[key] = item
+
+        for attr, index in self.indexes.items():
+            if attr in item:
+                index.setdefault(item[attr], {})[key] = item
+
+    def __remove(self, key: ReplicaKey) -> None:
+        item = self.items.pop(key, None)
+
+        if item is None:
+            return
+
+        for attr, index in self.indexes.items():
+            bucket = index.get(item.get(attr))
+
+            if bucket is not None:
+                bucket.pop(key, None)
+
+                if not bucket:
+                    del index[item[attr]]
+
+    def apply(self, record: ChangeRecord) -> None:
+        if record.event_name == EVENT_REMOVE:
+            with self.lock:
+                self.__remove(self.repository.build_primary_key_tuple(record.keys))
+
+            return
+
+        if record.new_image is None:
+            raise ValueError("Change records must include the new image")
+
+        # Os itens são substituídos, nunca alterados: quem já os leu não vê
+        # uma versão parcial
+        with self.lock:
+            self.__put(record.new_image)
+
+    def poll(self) -> int:
+        polled_at = self.clock()
+
+        try:
+            records = self.source.read()
+        except ResyncRequiredError:
+            # Mudanças foram perdidas no stream; a cópia é refeita do zero
+            self.logger.warning("release replica resync", exc_info=True)
+            self.resyncs += 1
+            self.bootstrap()
+
+            return 0
+
+        with self.lock:
+            for record in records:
+                self.apply(record)
+
+            self.records_applied += len(records)
+            # Sem registros, a cópia está atualizada até o início da leitura. Os
+            # shards são lidos um após o outro, então o último não é o mais novo
+            self.synced_at = (
+                max(record.created_at for record in records) if records else polled_at
+            )
+
+        return len(records)
+
+    @property
+    def lag_seconds(self) -> Optional[float]:
+        if self.synced_at is None:
+            return None
+
+        return max(0.0, self.clock() - self.synced_at)
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            "items": len(self.items),
+            "lag_seconds": self.lag_seconds,
+            "records_applied": self.records_applied,
+            "poll_errors": self.poll_errors,
+            "resyncs": self.resyncs,
+        }
+
+    def start(self, poll_interval: float = DEFAULT_POLL_INTERVAL) -> None:
+        if self.thread is not None:
+            raise ValueError("Replica already started")
+
+        if self.synced_at is None:
+            self.bootstrap()
+
+        self.stopped.clear()
+        self.thread = threading.Thread(
+            target=self.__run,
+            args=(poll_interval,),
+            name="release-replica",
+            daemon=True,
+        )
+        self.thread.start()
+
+    def __run(self, poll_interval: float) -> None:
+        delay = poll_interval
+
+        while not self.stopped.wait(delay):
+            try:
+                self.poll()
+                delay = poll_interval
+            except Exception:
+                # A falha aparece no lag, que cresce até o próximo poll com sucesso;
+                # a thread segue viva e espera mais a cada falha seguida
+                self.logger.exception("release replica poll failed")
+                self.poll_errors += 1
+                delay = max(poll_interval, min(MAX_POLL_BACKOFF, delay * 2))
+
+    def stop(self) -> None:
+        if self.thread is None:
+            return
+
+        self.stopped.set()
+        self.thread.join()
+        self.thread = None
+
+    def find(
+        self,
+        package_name: Optional[str] = None,
+        mdm: Optional[str] = None,
+        stage: Optional[str] = None,
+        status: Optional[List[str]] = None,
+    ) -> List[Dict[str, Any]]:
+        conditions: Dict[str, List[Any]] = {}
+
+        if package_name is not None:
+            conditions["id"] = [package_name]
+
+        if mdm is not None:
+            conditions["mdm"] = [mdm]
+
+        if stage is not None:
+            conditions["stage"] = [stage]
+
+        if status is not None:
+            conditions["status"] = status
+
+        with self.lock:
+            if not conditions:
+                return list(self.items.values())
+
+            # Parte do índice com menos candidatos e filtra pelos demais atributos
+            buckets = {
+                attr: [self.indexes[attr].get(value, {}) for value in values]
+                for attr, values in conditions.items()
+            }
+            attr = min(buckets, key=lambda attr: sum(map(len, buckets[attr])))
+
+            return [
+                item
+                for bucket in buckets[attr]
+                for item in bucket.values()
+                if all(
+                    item.get(other) in values
+                    for other, values in conditions.items()
+                    if other != attr
+                )
+            ]
+
+    def get_app(
+        self, package_name: str, status: List[str] = APP_DEFAULT_STATUS
+    ) -> List[Dict[str, Any]]:
+        return sorted(
+            self.find(package_name=package_name, status=status),
+            key=self.repository.build_primary_key_tuple,
+        )
+
+    def get_all_apps(
+        self, stage: str = APPS_DEFAULT_STAGE, status: List[str] = APPS_DEFAULT_STATUS
+    ) -> List[Dict[str, Any]]:
+        return self.find(stage=stage, status=status)
@@ -0,0 +1,208 @@
+import random
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple, Type, Union
+from botocore.exceptions import (
+    BotoCoreError,
+    ClientError,
+    ConnectionClosedError,
+    ConnectTimeoutError,
+    EndpointConnectionError,
+    ReadTimeoutError,
+)
+
+DEFAULT_MAX_ATTEMPTS = 5
+DEFAULT_BASE_DELAY_MS = 25
+DEFAULT_MAX_DELAY_MS = 2000
+
+RETRYABLE_ERRORS = [
+    "ProvisionedThroughputExceededException",
+    "ThrottlingException",
+    "RequestLimitExceeded",
+    "InternalServerError",
+    "TransactionConflictException",
+]
+
+# Falhas de rede não chegam como ClientError; o botocore tenta uma vez só
+RETRYABLE_CONNECTION_ERRORS: Tuple[Type[BotoCoreError], ...] = (
+    EndpointConnectionError,
+    ConnectTimeoutError,
+    ReadTimeoutError,
+    ConnectionClosedError,
+)
+
+TRANSACTION_CANCELED_ERROR = "TransactionCanceledException"
+RETRYABLE_CANCELLATION_REASONS = [
+    "ThrottlingError",
+    "TransactionConflict",
+    "ProvisionedThroughputExceeded",
+]
+
+RETRY_BUDGET_CAPACITY = 500
+RETRY_BUDGET_RETRY_COST = 5
+RETRY_BUDGET_SUCCESS_REFILL = 1
+
+RequestError = Union[ClientError, BotoCoreError]
+OnRetry = Callable[[RequestError, int, float], None]
+
+
+def error_code(error: RequestError) -> str:
+    if isinstance(error, ClientError):
+        return error.response["Error"]["Code"]
+
+    return type(error).__name__
+
+
+def cancellation_reasons(error: ClientError) -> List[str]:
+    return [
+        reason.get("Code", "None")
+        for reason in error.response.get("CancellationReasons", [])
+    ]
+
+
+class RetryBudget:
+    def __init__(
+        self,
+        capacity: int = RETRY_BUDGET_CAPACITY,
+        retry_cost: int = RETRY_BUDGET_RETRY_COST,
+        success_refill: int = RETRY_BUDGET_SUCCESS_REFILL,
+    ):
+        self.capacity = capacity
+        self.retry_cost = retry_cost
+        self.success_refill = success_refill
+        self.tokens = capacity
+        self.lock = threading.Lock()
+
+    def withdraw(self) -> bool:
+        # Sem saldo, novas tentativas são negadas para não amplificar a carga
+        with self.lock:
+            if self.tokens < self.retry_cost:
+                return False
+
+            self.tokens -= self.retry_cost
+            return True
+
+    def deposit(self) -> None:
+        with self.lock:
+            self.tokens = min(self.capacity, self.tokens + self.success_refill)
+
+    def reset(self) -> None:
+        with self.lock:
+            self.tokens = self.capacity
+
+
+DEFAULT_RETRY_BUDGET = RetryBudget()
+
+
+class RetryPolicy:
+    def __init__(
+        self,
+        max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+        base_delay_ms: float = DEFAULT_BASE_DELAY_MS,
+        max_delay_ms: float = DEFAULT_MAX_DELAY_MS,
+        deadline_ms: Optional[float] = None,
+        retryable_errors: List[str] = RETRYABLE_ERRORS,
+        retryable_connection_errors: Tuple[
+            Type[BotoCoreError], ...
+        ] = RETRYABLE_CONNECTION_ERRORS,
+        budget: Optional[RetryBudget] = DEFAULT_RETRY_BUDGET,
+        random_function: Callable[[], float] = random.random,
+    ):
+        if max_attempts < 1:
+            raise ValueError("Max attempts must be greater than zero")
+
+        self.max_attempts = max_attempts
+        self.base_delay_ms = base_delay_ms
+        self.max_delay_ms = max_delay_ms
+        self.deadline_ms = deadline_ms
+        self.retryable_errors = retryable_errors
+        self.retryable_connection_errors = retryable_connection_errors
+        self.budget = budget
+        self.random_function = random_function
+
+    def is_retryable(self, error: RequestError) -> bool:
+        if isinstance(error, BotoCoreError):
+            return isinstance(error, self.retryable_connection_errors)
+
+        code = error.response["Error"]["Code"]
+
+        if code in self.retryable_errors:
+            return True
+
+        if code == TRANSACTION_CANCELED_ERROR:
+            # Só repete a transação quando nenhuma condição falhou
+            reasons = [
+                reason for reason in cancellation_reasons(error) if reason != "None"
+            ]
+            return len(reasons) > 0 and all(
+                reason in RETRYABLE_CANCELLATION_REASONS for reason in reasons
+            )
+
+        return False
+
+    def compute_delay(self, attempt: int) -> float:
+        # Backoff exponencial com "full jitter", em segundos
+        ceiling_ms = min(self.max_delay_ms, self.base_delay_ms * 2 ** (attempt - 1))
+        return self.random_function() * ceiling_ms / 1000
+
+    def next_delay(
+        self,
+        error: RequestError,
+        attempt: int,
+        started_at: float,
+        deadline_ms: Optional[float] = None,
+    ) -> Optional[float]:
+        if attempt >= self.max_attempts or not self.is_retryable(error):
+            return None
+
+        delay = self.compute_delay(attempt)
+        deadline_ms = deadline_ms if deadline_ms is not None else self.deadline_ms
+
+        if deadline_ms is not None:
+            elapsed_ms = (time.monotonic() - started_at) * 1000
+
+            if elapsed_ms + delay * 1000 > deadline_ms:
+                return None
+
+        if self.budget is not None and not self.budget.withdraw():
+            return None
+
+        return delay
+
+    def record_success(self) -> None:
+        if self.budget is not None:
+            self.budget.deposit()
+
+    def execute(
+        self,
+        function: Callable[..., Any],
+        params: Dict[str, Any],
+        deadline_ms: Optional[float] = None,
+        on_retry: Optional[OnRetry] = None,
+    ) -> Any:
+        started_at = time.monotonic()
+        attempt = 0
+
+        while True:
+            attempt += 1
+
+            try:
+                response = function(**params)
+            except (ClientError, BotoCoreError) as e:
+                delay = self.next_delay(e, attempt, started_at, deadline_ms)
+
+                if delay is None:
+                    raise
+
+                if on_retry is not None:
+                    on_retry(e, attempt, delay)
+
+                time.sleep(delay)
+                continue
+
+            self.record_success()
+
+            return response
+
+
+DEFAULT_RETRY_POLICY = RetryPolicy()
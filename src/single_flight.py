@@ -0,0 +1,96 @@
+import asyncio
+import threading
+from decimal import Decimal
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+
+
+def build_call_key(*parts: Any) -> Hashable:
+    # Dicionários e listas viram tuplas; Decimal e int iguais geram a mesma
+    # chave, como o DynamoDB os trataria
+    def freeze(value: Any) -> Hashable:
+        if isinstance(value, dict):
+            return (dict, tuple(sorted((key, freeze(v)) for key, v in value.items())))
+
+        if isinstance(value, (list, tuple)):
+            return (list, tuple(freeze(v) for v in value))
+
+        if isinstance(value, (set, frozenset)):
+            return (set, frozenset(freeze(v) for v in value))
+
+        if isinstance(value, (bytes, bytearray)):
+            return (bytes, bytes(value))
+
+        if isinstance(value, (int, float, Decimal)) and not isinstance(value, bool):
+            return (Decimal, value)
+
+        return (type(value), value)
+
+    return freeze(parts)
+
+
+class SingleFlightCall:
+    __slots__ = ("event", "result", "error")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.calls: Dict[Hashable, SingleFlightCall] = {}
+        self.shared_calls = 0
+
+    def do(self, key: Hashable, function: Callable[[], Any]) -> Any:
+        with self.lock:
+            call = self.calls.get(key)
+            leader = call is None
+
+            if leader:
+                call = self.calls[key] = SingleFlightCall()
+            else:
+                self.shared_calls += 1
+
+        # Quem chega com a mesma chave espera a chamada em andamento
+        if not leader:
+            call.event.wait()
+
+            if call.error is not None:
+                raise call.error
+
+            return call.result
+
+        try:
+            call.result = function()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            # Chamadas posteriores ao término fazem uma nova leitura
+            with self.lock:
+                del self.calls[key]
+
+            call.event.set()
+
+        return call.result
+
+
+class AsyncSingleFlight:
+    def __init__(self):
+        self.calls: Dict[Hashable, "asyncio.Future[Any]"] = {}
+        self.shared_calls = 0
+
+    async def do(self, key: Hashable, function: Callable[[], Awaitable[Any]]) -> Any:
+        task = self.calls.get(key)
+
+        if task is None:
+            task = asyncio.ensure_future(function())
+            self.calls[key] = task
+            task.add_done_callback(lambda _: self.calls.pop(key, None))
+        else:
+            self.shared_calls += 1
+
+        # O cancelamento de quem espera não cancela a leitura compartilhada
+        return await asyncio.shield(task)
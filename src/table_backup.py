@@ -0,0 +1,120 @@
+import base64
+import gzip
+import json
+from typing import Any, Dict, IO, Iterator, List, Optional, Tuple
+from boto3.dynamodb.types import Binary, TypeDeserializer, TypeSerializer
+from base_repository import BaseRepository, DEFAULT_SCAN_SEGMENTS
+from dynamo_db_helper import RESULT_ERROR
+
+GZIP_SUFFIX = ".gz"
+DEFAULT_IMPORT_BATCH_SIZE = 500
+
+TYPE_SERIALIZER = TypeSerializer()
+TYPE_DESERIALIZER = TypeDeserializer()
+
+
+def open_backup(path: str, mode: str) -> IO[str]:
+    # A compressão é escolhida pela extensão do arquivo
+    if path.endswith(GZIP_SUFFIX):
+        return gzip.open(path, mode + "t", encoding="utf-8")
+
+    return open(path, mode, encoding="utf-8")
+
+
+def encode_binary(value: Any) -> str:
+    if isinstance(value, Binary):
+        value = value.value
+
+    if isinstance(value, (bytes, bytearray)):
+        return base64.b64encode(value).decode("ascii")
+
+    raise TypeError(f"Object of type {type(value).__name__} is not serializable")
+
+
+def decode_binary(value: Dict[str, Any]) -> Dict[str, Any]:
+    # Binários vão em base64, como nas exportações do DynamoDB para o S3
+    if isinstance(value.get("B"), str):
+        return {"B": base64.b64decode(value["B"])}
+
+    if isinstance(value.get("BS"), list):
+        return {"BS": [base64.b64decode(v) for v in value["BS"]]}
+
+    return value
+
+
+def serialize_item(item: Dict[str, Any]) -> str:
+    # Uma linha {"Item": ...} no formato tipado, sem perder Decimal nem conjuntos
+    return json.dumps(
+        {"Item": TYPE_SERIALIZER.serialize(item)["M"]},
+        separators=(",", ":"),
+        default=encode_binary,
+    )
+
+
+def deserialize_item(line: str) -> Dict[str, Any]:
+    data = json.loads(line, object_hook=decode_binary)
+
+    return TYPE_DESERIALIZER.deserialize({"M": data["Item"]})
+
+
+def iter_backup_items(path: str) -> Iterator[Dict[str, Any]]:
+    with open_backup(path, "r") as file:
+        for line in file:
+            if line.strip():
+                yield deserialize_item(line)
+
+
+def export_table(
+    repository: BaseRepository,
+    path: str,
+    total_segments: int = DEFAULT_SCAN_SEGMENTS,
+    projection_expression: Optional[List[str]] = None,
+) -> int:
+    count = 0
+
+    # As páginas são gravadas conforme chegam, sem carregar a tabela inteira
+    with open_backup(path, "w") as file:
+        for items in repository.iter_parallel_scan_pages(
+            total_segments, projection_expression
+        ):
+            file.writelines(serialize_item(item) + "\n" for item in items)
+            count += len(items)
+
+    return count
+
+
+def import_table(
+    repository: BaseRepository,
+    path: str,
+    batch_size: int = DEFAULT_IMPORT_BATCH_SIZE,
+) -> Tuple[int, List[Dict[str, Any]]]:
+    if batch_size < 1:
+        raise ValueError("Batch size must be greater than zero")
+
+    imported = 0
+    errors: List[Dict[str, Any]] = []
+    batch: List[Dict[str, Any]] = []
+
+    def flush() -> None:
+        nonlocal imported
+
+        # Os itens são restaurados como foram exportados, com os timestamps
+        # e as chaves derivadas originais
+        for result in repository.batch_write_items(batch):
+            if result[RESULT_ERROR] is None:
+                imported += 1
+            else:
+                errors.append(result)
+
+        batch.clear()
+
+    for item in iter_backup_items(path):
+        batch.append(item)
+
+        if len(batch) >= batch_size:
+            flush()
+
+    if batch:
+        flush()
+
+    return imported, errors
@@ -10,4 +10,20 @@ sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../s
 # Adiciona o diretório mocks ao caminho de importação
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../mocks")))
 
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../utils")))
\ No newline at end of file
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../utils")))
+
+sys.path.insert(
+    0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../benchmarks"))
+)
+
+from aws_clients import TABLE_DESCRIPTION_CACHE
+
+# Os clients são criados sob demanda, dentro do mock_aws dos testes
+os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+
+
+@pytest.fixture(autouse=True)
+def table_description_cache():
+    # Cada teste cria uma nova tabela no moto, então a descrição não pode vazar
+    TABLE_DESCRIPTION_CACHE.invalidate()
+    yield TABLE_DESCRIPTION_CACHE
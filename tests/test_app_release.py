@@ -0,0 +1,57 @@
+import sys
+from decimal import Decimal
+from app_release import AppRelease
+from attribute_values import serialize_map
+
+ITEM = {
+    "id": "app",
+    "id_range": "SF01#1.0.0",
+    "mdm": "SF01",
+    "mdm_key": {"release_id": Decimal("1")},
+    "version_name": "1.0.0",
+    "stage": "pilot",
+    "status": "pending",
+    "created_at": "2024-03-01T13:00:00",
+    "updated_at": "2024-03-01T13:00:00",
+}
+
+
+def test_from_item():
+    release = AppRelease.from_item(ITEM)
+
+    assert release.id == "app"
+    assert release.mdm_key == {"release_id": 1}
+    assert release.extra is None
+    assert release.to_item() == ITEM
+    assert not hasattr(release, "__dict__")
+
+
+def test_from_item_keeps_extra_attributes():
+    item = dict(ITEM, stage_shard="pilot#1")
+    release = AppRelease.from_item(item)
+
+    assert release.extra == {"stage_shard": "pilot#1"}
+    assert release.to_item() == item
+
+
+def test_from_attribute_map():
+    item = dict(ITEM, stage_shard="pilot#1")
+    release = AppRelease.from_attribute_map(serialize_map(item))
+
+    assert release == AppRelease.from_item(item)
+    assert release.to_attribute_map() == serialize_map(item)
+
+
+def test_partial_release():
+    release = AppRelease("app", status="pending")
+
+    assert release.to_item() == {"id": "app", "status": "pending"}
+    assert AppRelease.from_attribute_map(release.to_attribute_map()) == release
+    assert release != AppRelease("app")
+    assert repr(release) == "AppRelease({'id': 'app', 'status': 'pending'})"
+
+
+def test_release_is_smaller_than_dict():
+    release = AppRelease.from_item(ITEM)
+
+    assert sys.getsizeof(release) < sys.getsizeof(dict(ITEM))
@@ -1,16 +1,37 @@
 import boto3
 import pytest
-from typing import Tuple, Any
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Tuple
 from test_dynamo_db_utils import create_table
 from moto import mock_aws
 from unittest.mock import MagicMock, patch
+from botocore.exceptions import ClientError
 from app_release_repository import (
     AppReleaseRepository,
     STAGE_PILOT,
+    STAGE_PRODUCTION,
     STATUS_PENDING,
     STATUS_APPROVED,
     STATUS_CANCELED,
+    STATUS_ROLLOUT,
+    STATUS_PREVIOUS,
+    STATUS_REPROVED,
+    APP_DEFAULT_STATUS,
+    DEFAULT_CHANGE_SHARDS,
+    build_gsi_key_schemas,
 )
+from app_release import AppRelease
+from cursor_codec import CursorCodec, InvalidCursorError
+from release_cache import ReleaseCache
+
+ALL_STATUS = [
+    STATUS_PENDING,
+    STATUS_APPROVED,
+    STATUS_CANCELED,
+    STATUS_ROLLOUT,
+    STATUS_PREVIOUS,
+    STATUS_REPROVED,
+]
 
 MOCK_DATA = [
     {
@@ -89,17 +110,23 @@ def test_init(app_release_repository: Tuple[AppReleaseRepository, Any]):
     assert len(repo.gsi_key_schemas) == 3
 
 
-def test_cancel_previous_versions(
-    app_release_repository: Tuple[AppReleaseRepository, Any]
+def test_pilot_app_cancels_previous_versions(
+    app_release_repository: Tuple[AppReleaseRepository, Any],
 ):
     repo, table = app_release_repository
 
     for data in MOCK_DATA:
         table.put_item(Item=data)
 
-    repo._AppReleaseRepository__cancel_previous_versions(
-        "teste app 3", "SF01", "2.0.0", STAGE_PILOT, STATUS_PENDING, STATUS_CANCELED
-    )
+    repo.pilot_app("teste app 3", "SF01", {"release_id": 5}, "2.0.0")
+
+    def status(id_range: str) -> str:
+        key = {"id": "teste app 3", "id_range": id_range}
+        return table.get_item(Key=key)["Item"]["status"]
+
+    assert status("SF01#1.1.0") == STATUS_APPROVED
+    assert status("SF01#1.2.0") == STATUS_CANCELED
+    assert status("SF01#2.0.0") == STATUS_PENDING
 
 
 def test_pilot_app(app_release_repository: Tuple[AppReleaseRepository, Any]):
@@ -173,3 +200,690 @@ def test_get_all_apps(app_release_repository: Tuple[AppReleaseRepository, Any]):
 
     for idx in range(len(result)):
         assert result[idx]["version_name"] == expected_result[idx]["version_name"]
+
+
+def test_iter_app(app_release_repository: Tuple[AppReleaseRepository, Any]):
+    repo, table = app_release_repository
+
+    for data in MOCK_DATA:
+        table.put_item(Item=data)
+
+    iterator = repo.iter_app("teste app 3")
+
+    assert next(iterator)["id_range"] == "SF01#1.1.0"
+    assert next(iterator)["id_range"] == "SF01#1.2.0"
+    assert next(iterator, None) is None
+
+
+def test_query_range_key_condition(
+    app_release_repository: Tuple[AppReleaseRepository, Any],
+):
+    repo, table = app_release_repository
+
+    for data in MOCK_DATA:
+        table.put_item(Item=data)
+
+    items, _ = repo.query({"id": "teste app 3", "id_range#begins_with": "SF01#1.2"})
+
+    assert [item["version_name"] for item in items] == ["1.2.0"]
+
+
+def test_query_moves_range_filter_to_key_condition(
+    app_release_repository: Tuple[AppReleaseRepository, Any],
+):
+    repo, table = app_release_repository
+
+    for data in MOCK_DATA:
+        table.put_item(Item=data)
+
+    with patch.object(repo, "execute", wraps=repo.execute) as execute:
+        items, _ = repo.query(
+            {"mdm": "SF01"}, {"version_name#gte": "1.1.0", "status": STATUS_PENDING}
+        )
+
+    params = execute.call_args.args[1]
+
+    assert params["IndexName"] == "mdm-version_name-index"
+    assert params["KeyConditionExpression"] == "#k0 = :k0 AND #k1 >= :k1"
+    assert params["FilterExpression"] == "#f0 = :f0"
+    assert sorted(item["id_range"] for item in items) == ["SF01#1.1.0", "SF01#1.2.0"]
+
+
+def test_pilot_approve_app_transition(
+    app_release_repository: Tuple[AppReleaseRepository, Any],
+):
+    repo, table = app_release_repository
+
+    for data in MOCK_DATA:
+        table.put_item(Item=data)
+
+    repo.pilot_approve_app("teste app 3", "SF01", "1.2.0")
+
+    items = {
+        item["version_name"]: item for item in repo.get_app("teste app 3", ALL_STATUS)
+    }
+    assert items["1.1.0"]["status"] == STATUS_CANCELED
+    assert items["1.2.0"]["status"] == STATUS_APPROVED
+
+
+def test_pilot_approve_app_transition_is_atomic(
+    app_release_repository: Tuple[AppReleaseRepository, Any],
+):
+    repo, table = app_release_repository
+
+    for data in MOCK_DATA:
+        table.put_item(Item=data)
+
+    # A versão 1.1.0 não está pendente, então nada deve ser alterado
+    with pytest.raises(ClientError) as excinfo:
+        repo.pilot_approve_app("teste app 3", "SF01", "1.1.0")
+
+    assert excinfo.value.response["Error"]["Code"] == "ConditionalCheckFailedException"
+
+    items = {
+        item["version_name"]: item for item in repo.get_app("teste app 3", ALL_STATUS)
+    }
+    assert items["1.1.0"]["status"] == STATUS_APPROVED
+    assert items["1.2.0"]["status"] == STATUS_PENDING
+
+
+def test_rollout_app_transition(
+    app_release_repository: Tuple[AppReleaseRepository, Any],
+):
+    repo, table = app_release_repository
+
+    for data in MOCK_DATA:
+        table.put_item(Item=data)
+
+    table.put_item(
+        Item=dict(
+            MOCK_DATA[2],
+            id_range="SF01#1.0.0",
+            version_name="1.0.0",
+            stage=STAGE_PRODUCTION,
+            status=STATUS_ROLLOUT,
+        )
+    )
+
+    with patch.object(
+        repo, "update_item", side_effect=AssertionError("sequential update")
+    ):
+        repo.rollout_app("teste app 3", "SF01", "1.1.0")
+
+    items = {
+        item["version_name"]: item for item in repo.get_app("teste app 3", ALL_STATUS)
+    }
+    assert items["1.0.0"]["status"] == STATUS_PREVIOUS
+    assert items["1.1.0"]["stage"] == STAGE_PRODUCTION
+    assert items["1.1.0"]["status"] == STATUS_ROLLOUT
+
+
+def test_rollout_app_transition_limit(
+    app_release_repository: Tuple[AppReleaseRepository, Any],
+):
+    repo, table = app_release_repository
+
+    for data in MOCK_DATA:
+        table.put_item(Item=data)
+
+    for idx in range(100):
+        table.put_item(
+            Item=dict(
+                MOCK_DATA[2],
+                id_range=f"SF01#0.{idx}.0",
+                version_name=f"0.{idx}.0",
+                stage=STAGE_PRODUCTION,
+                status=STATUS_ROLLOUT,
+            )
+        )
+
+    with pytest.raises(ValueError):
+        repo.rollout_app("teste app 3", "SF01", "1.1.0")
+
+    items = repo.get_app("teste app 3", [STATUS_PREVIOUS])
+    assert items == []
+
+
+def test_init_uses_cached_table_description(
+    app_release_repository: Tuple[AppReleaseRepository, Any],
+):
+    with patch(
+        "aws_clients.get_dynamo_db_client", side_effect=AssertionError("describe")
+    ):
+        repo = AppReleaseRepository(table_name="test_table")
+
+    assert repo.max_read_items > 0
+
+
+def test_get_app_uses_cache(dynamodb: Tuple[boto3.client, Any]):
+    _, table, _ = dynamodb
+    cache = ReleaseCache()
+    repo = AppReleaseRepository(table_name="test_table", cache=cache)
+
+    for data in MOCK_DATA:
+        table.put_item(Item=data)
+
+    assert len(repo.get_app("teste app 3")) == 2
+
+    with patch.object(repo, "iter_query", side_effect=AssertionError("query")):
+        result = repo.get_app("teste app 3")
+
+    assert len(result) == 2
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+def test_writes_invalidate_cache(dynamodb: Tuple[boto3.client, Any]):
+    _, table, _ = dynamodb
+    cache = ReleaseCache()
+    repo = AppReleaseRepository(table_name="test_table", cache=cache)
+
+    for data in MOCK_DATA:
+        table.put_item(Item=data)
+
+    repo.get_app("teste app 1")
+    repo.get_app("teste app 3")
+    repo.get_all_apps(stage=STAGE_PILOT, status=ALL_STATUS)
+    repo.get_all_apps(stage=STAGE_PRODUCTION, status=ALL_STATUS)
+
+    repo.rollout_app("teste app 3", "SF01", "1.1.0")
+
+    assert cache.get(("app", "teste app 1", tuple(APP_DEFAULT_STATUS))) is not None
+    assert cache.get(("app", "teste app 3", tuple(APP_DEFAULT_STATUS))) is None
+    assert cache.get(("apps", STAGE_PILOT, tuple(ALL_STATUS))) is None
+    assert cache.get(("apps", STAGE_PRODUCTION, tuple(ALL_STATUS))) is None
+
+    result = repo.get_all_apps(stage=STAGE_PRODUCTION, status=ALL_STATUS)
+    assert [item["version_name"] for item in result] == ["1.1.0"]
+
+    repo.get_app("teste app 1")
+    repo.pilot_reprove_app("teste app 1", "SF01", "1.0.0")
+
+    assert cache.get(("app", "teste app 1", tuple(APP_DEFAULT_STATUS))) is None
+
+
+@pytest.fixture
+def app_release_repository_factory():
+    with mock_aws():
+        resource = boto3.resource("dynamodb", region_name="us-east-1")
+
+        def build(schema_kwargs: Dict[str, Any], **kwargs: Any) -> AppReleaseRepository:
+            create_table(
+                "test_table",
+                resource,
+                {"HASH": "id", "RANGE": "id_range"},
+                build_gsi_key_schemas(**schema_kwargs),
+            )
+
+            return AppReleaseRepository(table_name="test_table", **kwargs)
+
+        yield build
+
+
+def test_get_all_apps_sharded(
+    app_release_repository_factory: Callable[..., AppReleaseRepository],
+):
+    repo = app_release_repository_factory({"stage_shards": 4}, stage_shards=4)
+    items = [
+        dict(
+            MOCK_DATA[0], id=f"app {idx}", stage=STAGE_PRODUCTION, status=STATUS_ROLLOUT
+        )
+        for idx in range(20)
+    ]
+    repo.insert_many(items, overwrite=True)
+
+    shards = {
+        item["stage_shard"]
+        for item in repo.get_many(
+            [{"id": item["id"], "id_range": "SF01#1.0.0"} for item in items]
+        ).values()
+    }
+    assert len(shards) > 1
+    assert all(shard.startswith(f"{STAGE_PRODUCTION}#") for shard in shards)
+
+    result = repo.get_all_apps()
+
+    assert sorted(item["id"] for item in result) == sorted(item["id"] for item in items)
+    assert all("stage_shard" not in item for item in result)
+
+
+def test_iter_all_apps_sharded_pagination(
+    app_release_repository_factory: Callable[..., AppReleaseRepository],
+):
+    repo = app_release_repository_factory({"stage_shards": 4}, stage_shards=4)
+    repo.insert_many(
+        [
+            dict(
+                MOCK_DATA[0],
+                id=f"app {idx}",
+                stage=STAGE_PRODUCTION,
+                status=STATUS_ROLLOUT,
+            )
+            for idx in range(20)
+        ],
+        overwrite=True,
+    )
+
+    items, last_evaluated_key = repo.query({"stage": STAGE_PRODUCTION}, limit=4)
+
+    assert len(items) <= 4
+    assert set(last_evaluated_key["shards"]) <= {"0", "1", "2", "3"}
+
+    result = list(repo.iter_query({"stage": STAGE_PRODUCTION}, limit=4))
+
+    assert len({item["id"] for item in result}) == 20
+
+
+def test_rollout_app_sharded(
+    app_release_repository_factory: Callable[..., AppReleaseRepository],
+):
+    repo = app_release_repository_factory({"stage_shards": 4}, stage_shards=4)
+    repo.insert_many(MOCK_DATA, overwrite=True)
+
+    repo.rollout_app("teste app 3", "SF01", "1.1.0")
+
+    result = repo.get_all_apps()
+
+    assert [(item["id"], item["version_name"]) for item in result] == [
+        ("teste app 3", "1.1.0")
+    ]
+
+
+def test_backfill_shard_keys(
+    app_release_repository_factory: Callable[..., AppReleaseRepository],
+):
+    repo = app_release_repository_factory({"stage_shards": 4}, stage_shards=4)
+    # Itens gravados antes de o índice ser particionado não têm o stage_shard
+    AppReleaseRepository(table_name="test_table").insert_many(
+        [
+            dict(
+                MOCK_DATA[0],
+                id=f"app {idx}",
+                stage=STAGE_PRODUCTION,
+                status=STATUS_ROLLOUT,
+            )
+            for idx in range(5)
+        ],
+        overwrite=True,
+    )
+
+    assert repo.get_all_apps() == []
+    assert repo.backfill_shard_keys() == 5
+    assert repo.backfill_shard_keys() == 0
+
+    result = repo.get_all_apps()
+
+    assert sorted(item["id"] for item in result) == [f"app {idx}" for idx in range(5)]
+
+
+def test_get_latest_release(
+    app_release_repository_factory: Callable[..., AppReleaseRepository],
+):
+    repo = app_release_repository_factory({}, sortable_versions=True)
+    versions = ["1.2.0", "1.10.0", "1.9.0", "2.0.0-beta"]
+    repo.insert_many(
+        [
+            dict(
+                MOCK_DATA[0],
+                id="app",
+                version_name=version,
+                stage=STAGE_PRODUCTION,
+                status=STATUS_PREVIOUS,
+            )
+            for version in versions
+        ],
+        overwrite=True,
+    )
+    repo.pilot_app("app", "SF01", {"release_id": 1}, "1.11.0")
+    repo.pilot_app("app", "SF02", {"release_id": 2}, "3.0.0")
+
+    result = repo.get_latest_release("app", "SF01", STAGE_PRODUCTION)
+    assert result["version_name"] == "2.0.0-beta"
+
+    result = repo.get_latest_release("app", "SF01", STAGE_PILOT)
+    assert result["version_name"] == "1.11.0"
+
+    assert repo.get_latest_release("app", "SF01", STAGE_PRODUCTION, ["rollout"]) is None
+    assert repo.get_latest_release("app", "SF03", STAGE_PRODUCTION) is None
+
+
+def test_get_latest_release_reads_one_item(
+    app_release_repository_factory: Callable[..., AppReleaseRepository],
+):
+    repo = app_release_repository_factory({}, sortable_versions=True)
+    repo.pilot_app("app", "SF01", {"release_id": 1}, "1.9.0")
+    repo.pilot_app("app", "SF01", {"release_id": 2}, "1.10.0")
+
+    with patch.object(repo, "execute", wraps=repo.execute) as execute:
+        result = repo.get_latest_release("app", "SF01", STAGE_PILOT)
+
+    assert result["version_name"] == "1.10.0"
+    execute.assert_called_once()
+    params = execute.call_args[0][1]
+    assert params["Limit"] == 1
+    assert params["ScanIndexForward"] is False
+
+
+def test_get_latest_release_requires_sortable_versions(
+    app_release_repository: Tuple[AppReleaseRepository, Any],
+):
+    repo = app_release_repository[0]
+
+    with pytest.raises(ValueError):
+        repo.get_latest_release("teste app 3", "SF01", STAGE_PILOT)
+
+
+def test_sortable_versions_transitions(
+    app_release_repository_factory: Callable[..., AppReleaseRepository],
+):
+    repo = app_release_repository_factory({}, sortable_versions=True)
+
+    result = repo.pilot_app("app", "SF01", {"release_id": 1}, "1.10.0")
+    assert result == {"id": "app", "id_range": "SF01#11.210.10$"}
+
+    repo.pilot_approve_app("app", "SF01", "1.10.0")
+    repo.rollout_app("app", "SF01", "1.10.0")
+    repo.pilot_app("app", "SF01", {"release_id": 2}, "1.11.0")
+    repo.pilot_reprove_app("app", "SF01", "1.11.0")
+
+    assert [
+        (item["version_name"], item["status"])
+        for item in repo.get_app("app", ALL_STATUS)
+    ] == [("1.10.0", STATUS_ROLLOUT), ("1.11.0", STATUS_REPROVED)]
+
+
+def test_sortable_versions_reject_long_numbers(
+    app_release_repository_factory: Callable[..., AppReleaseRepository],
+):
+    repo = app_release_repository_factory({}, sortable_versions=True)
+    repo.pilot_app("app", "SF01", {"release_id": 1}, "1.0.0")
+
+    with pytest.raises(ValueError, match="numbers up to 9 digits"):
+        repo.pilot_app("app", "SF01", {"release_id": 2}, "1.1234567890")
+
+    for transition in (
+        repo.pilot_approve_app,
+        repo.pilot_reprove_app,
+        repo.rollout_app,
+    ):
+        with pytest.raises(ValueError, match="numbers up to 9 digits"):
+            transition("app", "SF01", "1.1234567890")
+
+    # A versão pendente não é cancelada quando a nova versão é rejeitada
+    assert [(item["version_name"], item["status"]) for item in repo.get_app("app")] == [
+        ("1.0.0", STATUS_PENDING)
+    ]
+
+    # Sem versões ordenáveis, o número não passa pela codificação
+    AppReleaseRepository(table_name="test_table").validate_version_name("1.1234567890")
+
+
+def test_migrate_range_keys(
+    app_release_repository_factory: Callable[..., AppReleaseRepository],
+):
+    repo = app_release_repository_factory({}, sortable_versions=True)
+    table = repo.table
+
+    for data in MOCK_DATA:
+        table.put_item(Item=data)
+
+    migrated_ids = repo.migrate_range_keys({"id": "teste app 3"})
+
+    assert migrated_ids == [
+        {"id": "teste app 3", "id_range": "SF01#11.11.10$"},
+        {"id": "teste app 3", "id_range": "SF01#11.12.10$"},
+    ]
+    assert repo.get_latest_release("teste app 3", "SF01", STAGE_PILOT)["mdm_key"] == {
+        "release_id": 4
+    }
+
+    # Sem condição, a tabela inteira é migrada e os itens já migrados são ignorados
+    assert len(repo.migrate_range_keys()) == 2
+    assert repo.migrate_range_keys() == []
+    assert sorted(item["id_range"] for item in repo.iter_scan()) == [
+        "SF01#11.10.10$",
+        "SF01#11.11.10$",
+        "SF01#11.11.10$",
+        "SF01#11.12.10$",
+    ]
+
+
+def test_get_app_page(app_release_repository: Tuple[AppReleaseRepository, Any]):
+    repo, table = app_release_repository
+
+    for idx in range(5):
+        table.put_item(
+            Item=dict(
+                MOCK_DATA[0],
+                id="app",
+                id_range=f"SF01#1.{idx}.0",
+                version_name=f"1.{idx}.0",
+            )
+        )
+
+    versions = []
+    cursor = None
+
+    while True:
+        items, cursor = repo.get_app_page("app", cursor=cursor, page_size=2)
+        versions += [item["version_name"] for item in items]
+
+        if cursor is None:
+            break
+
+        assert isinstance(cursor, str)
+
+    assert versions == [f"1.{idx}.0" for idx in range(5)]
+
+    # O cursor não pode ser reutilizado em outra consulta
+    _, cursor = repo.get_app_page("app", page_size=2)
+
+    with pytest.raises(InvalidCursorError):
+        repo.get_app_page("teste app 3", cursor=cursor, page_size=2)
+
+    with pytest.raises(ValueError):
+        repo.get_app_page("app", page_size=0)
+
+
+def test_get_all_apps_page_signed_cursor(dynamodb: Tuple[boto3.client, Any]):
+    client, table, describle_table = dynamodb
+
+    with patch.object(client, "describe_table", return_value=describle_table):
+        repo = AppReleaseRepository(
+            table_name="test_table", cursor_codec=CursorCodec(b"secret")
+        )
+
+    repo.insert_many(
+        [
+            dict(
+                MOCK_DATA[0],
+                id=f"app {idx}",
+                stage=STAGE_PRODUCTION,
+                status=STATUS_ROLLOUT,
+            )
+            for idx in range(5)
+        ],
+        overwrite=True,
+    )
+
+    items, cursor = repo.get_all_apps_page(page_size=3)
+    assert len(items) == 3
+
+    with pytest.raises(InvalidCursorError):
+        repo.get_all_apps_page(cursor=cursor[:-2], page_size=3)
+
+    next_items, cursor = repo.get_all_apps_page(cursor=cursor, page_size=3)
+
+    assert cursor is None
+    assert sorted(item["id"] for item in items + next_items) == [
+        f"app {idx}" for idx in range(5)
+    ]
+
+
+def test_get_all_apps_page_sharded(
+    app_release_repository_factory: Callable[..., AppReleaseRepository],
+):
+    repo = app_release_repository_factory({"stage_shards": 4}, stage_shards=4)
+    repo.insert_many(
+        [
+            dict(
+                MOCK_DATA[0],
+                id=f"app {idx}",
+                stage=STAGE_PRODUCTION,
+                status=STATUS_ROLLOUT,
+            )
+            for idx in range(20)
+        ],
+        overwrite=True,
+    )
+
+    ids = []
+    items, cursor = repo.get_all_apps_page(page_size=4)
+    ids += [item["id"] for item in items]
+
+    while cursor is not None:
+        items, cursor = repo.get_all_apps_page(cursor=cursor, page_size=4)
+        ids += [item["id"] for item in items]
+
+    assert sorted(ids) == sorted(f"app {idx}" for idx in range(20))
+
+
+def test_changes_since(
+    app_release_repository_factory: Callable[..., AppReleaseRepository],
+):
+    repo = app_release_repository_factory(
+        {"track_changes": True, "change_shards": 2}, track_changes=True, change_shards=2
+    )
+    since = datetime.utcnow() - timedelta(minutes=1)
+    repo.insert_many(
+        [dict(MOCK_DATA[0], id=f"app {idx}") for idx in range(7)], overwrite=True
+    )
+
+    ids = []
+    items, cursor = repo.changes_since(since, page_size=3)
+    ids += [item["id"] for item in items]
+    assert cursor is not None
+
+    while cursor is not None:
+        items, cursor = repo.changes_since(since, cursor=cursor, page_size=3)
+        ids += [item["id"] for item in items]
+
+    # Com shards, cada página pode trazer até page_size itens por shard
+    assert sorted(ids) == sorted(f"app {idx}" for idx in range(7))
+
+    # Só as alterações a partir do novo since são retornadas
+    since = datetime.utcnow()
+    repo.pilot_approve_app("app 3", "SF01", "1.0.0")
+    items, cursor = repo.changes_since(since)
+
+    assert [(item["id"], item["status"]) for item in items] == [
+        ("app 3", STATUS_APPROVED)
+    ]
+    assert cursor is None
+
+    # O cursor só vale para o since que o gerou
+    _, cursor = repo.changes_since(since - timedelta(minutes=2), page_size=1)
+
+    with pytest.raises(InvalidCursorError):
+        repo.changes_since(since, cursor=cursor)
+
+
+def test_changes_since_spans_time_buckets_after_backfill(
+    app_release_repository_factory: Callable[..., AppReleaseRepository],
+):
+    repo = app_release_repository_factory({"track_changes": True}, track_changes=True)
+    now = datetime.utcnow()
+    since = now - timedelta(hours=2, minutes=1)
+
+    # Itens gravados antes do índice existir, um por hora
+    for idx in range(4):
+        repo.table.put_item(
+            Item=dict(
+                MOCK_DATA[0],
+                id=f"app {idx}",
+                updated_at=(now - timedelta(hours=idx)).isoformat(),
+            )
+        )
+
+    assert repo.changes_since(since) == ([], None)
+    assert repo.backfill_time_buckets() == 4
+    assert repo.backfill_time_buckets() == 0
+
+    ids = []
+    items, cursor = repo.changes_since(since, page_size=1)
+    ids += [item["id"] for item in items]
+
+    while cursor is not None:
+        items, cursor = repo.changes_since(since, cursor=cursor, page_size=1)
+        ids += [item["id"] for item in items]
+
+    assert ids == ["app 2", "app 1", "app 0"]
+
+
+def test_changes_since_limits_lookback(
+    app_release_repository_factory: Callable[..., AppReleaseRepository],
+):
+    repo = app_release_repository_factory({"track_changes": True}, track_changes=True)
+    now = datetime.utcnow()
+
+    # O índice de mudanças é sempre particionado
+    assert repo.get_time_bucket_key_schema()["SHARDS"] == DEFAULT_CHANGE_SHARDS
+    assert repo.changes_since(now - timedelta(hours=1), max_buckets=3) == ([], None)
+
+    with pytest.raises(ValueError):
+        repo.changes_since(now - timedelta(hours=3), max_buckets=3)
+
+    with pytest.raises(ValueError):
+        repo.changes_since(now - timedelta(days=8))
+
+    with pytest.raises(ValueError):
+        build_gsi_key_schemas(track_changes=True, change_shards=0)
+
+
+def test_changes_since_requires_time_bucket_index(
+    app_release_repository: Tuple[AppReleaseRepository, Any],
+):
+    repo, _ = app_release_repository
+
+    with pytest.raises(ValueError):
+        repo.changes_since(datetime.utcnow())
+
+
+def test_as_records(dynamodb: Tuple[boto3.client, Any]):
+    _, table, _ = dynamodb
+    repo = AppReleaseRepository(table_name="test_table", as_records=True)
+
+    for data in MOCK_DATA:
+        table.put_item(Item=data)
+
+    table.put_item(
+        Item=dict(
+            MOCK_DATA[0],
+            id="rollout app",
+            stage=STAGE_PRODUCTION,
+            status=STATUS_ROLLOUT,
+        )
+    )
+
+    app = repo.get_app("teste app 3")
+    all_apps = repo.get_all_apps()
+    page, _ = repo.get_app_page("teste app 3")
+
+    assert all(isinstance(release, AppRelease) for release in app + all_apps + page)
+    assert [release.to_item() for release in app] == MOCK_DATA[2:]
+    assert page == app
+    assert [release.id for release in all_apps] == ["rollout app"]
+    assert [release.id for release in repo.iter_app("teste app 1")] == ["teste app 1"]
+
+
+def test_as_records_latest_release(
+    app_release_repository_factory: Callable[..., AppReleaseRepository],
+):
+    repo = app_release_repository_factory({}, sortable_versions=True)
+    repo.as_records = True
+    repo.pilot_app("app", "SF01", {"release_id": 1}, "1.0.0")
+
+    latest = repo.get_latest_release("app", "SF01", STAGE_PILOT)
+
+    assert isinstance(latest, AppRelease)
+    assert (latest.version_name, latest.status) == ("1.0.0", STATUS_PENDING)
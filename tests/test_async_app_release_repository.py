@@ -0,0 +1,218 @@
+import asyncio
+import boto3
+import pytest
+from moto import mock_aws
+from unittest.mock import patch
+from botocore.exceptions import ClientError
+from test_dynamo_db_utils import create_table
+from app_release_repository import (
+    GSI_KEY_SCHEMAS,
+    STAGE_PILOT,
+    STAGE_PRODUCTION,
+    STATUS_APPROVED,
+    STATUS_CANCELED,
+    STATUS_PENDING,
+    STATUS_PREVIOUS,
+    STATUS_REPROVED,
+    STATUS_ROLLOUT,
+)
+from app_release import AppRelease
+from async_app_release_repository import AsyncAppReleaseRepository
+from release_cache import ReleaseCache
+
+ALL_STATUS = [
+    STATUS_PENDING,
+    STATUS_APPROVED,
+    STATUS_CANCELED,
+    STATUS_ROLLOUT,
+    STATUS_PREVIOUS,
+    STATUS_REPROVED,
+]
+
+
+@pytest.fixture
+def async_app_release_repository():
+    with mock_aws():
+        resource = boto3.resource("dynamodb", region_name="us-east-1")
+        create_table(
+            "test_table", resource, {"HASH": "id", "RANGE": "id_range"}, GSI_KEY_SCHEMAS
+        )
+        repo = AsyncAppReleaseRepository("test_table", cache=ReleaseCache())
+
+        yield repo
+
+        repo.close()
+
+
+def test_release_flow(async_app_release_repository: AsyncAppReleaseRepository):
+    repo = async_app_release_repository
+
+    async def run():
+        await repo.pilot_app("app", "SF01", {"release_id": 1}, "1.0.0")
+        await repo.pilot_approve_app("app", "SF01", "1.0.0")
+        await repo.rollout_app("app", "SF01", "1.0.0")
+
+        await repo.pilot_app("app", "SF01", {"release_id": 2}, "1.1.0")
+        await repo.pilot_app("app", "SF01", {"release_id": 3}, "1.2.0")
+        await repo.pilot_reprove_app("app", "SF01", "1.2.0")
+
+        return (
+            await repo.get_app("app", ALL_STATUS),
+            await repo.get_all_apps(),
+        )
+
+    app, all_apps = asyncio.run(run())
+    status = {item["version_name"]: (item["stage"], item["status"]) for item in app}
+
+    assert status == {
+        "1.0.0": (STAGE_PRODUCTION, STATUS_ROLLOUT),
+        "1.1.0": (STAGE_PILOT, STATUS_CANCELED),
+        "1.2.0": (STAGE_PILOT, STATUS_REPROVED),
+    }
+    assert [item["version_name"] for item in all_apps] == ["1.0.0"]
+
+
+def test_get_app_uses_cache(async_app_release_repository: AsyncAppReleaseRepository):
+    repo = async_app_release_repository
+
+    async def run():
+        await repo.pilot_app("app", "SF01", {"release_id": 1}, "1.0.0")
+        first = await repo.get_app("app")
+
+        with patch.object(repo, "iter_query", side_effect=AssertionError("query")):
+            second = await repo.get_app("app")
+
+        await repo.pilot_approve_app("app", "SF01", "1.0.0")
+
+        return first, second, await repo.get_app("app")
+
+    first, second, third = asyncio.run(run())
+
+    assert first == second
+    assert third[0]["status"] == STATUS_APPROVED
+    assert repo.cache.stats()["hits"] == 1
+
+
+def test_rollout_app_conditional_check_failed(
+    async_app_release_repository: AsyncAppReleaseRepository,
+):
+    repo = async_app_release_repository
+
+    async def run():
+        await repo.pilot_app("app", "SF01", {"release_id": 1}, "1.0.0")
+        await repo.rollout_app("app", "SF01", "1.0.0")
+
+    with pytest.raises(ClientError) as excinfo:
+        asyncio.run(run())
+
+    assert excinfo.value.response["Error"]["Code"] == "ConditionalCheckFailedException"
+
+
+def test_get_latest_release():
+    with mock_aws():
+        resource = boto3.resource("dynamodb", region_name="us-east-1")
+        create_table(
+            "test_table", resource, {"HASH": "id", "RANGE": "id_range"}, GSI_KEY_SCHEMAS
+        )
+
+        async def run():
+            async with AsyncAppReleaseRepository(
+                "test_table", sortable_versions=True
+            ) as repo:
+                await repo.pilot_app("app", "SF01", {"release_id": 1}, "1.9.0")
+                await repo.pilot_app("app", "SF01", {"release_id": 2}, "1.10.0")
+                await repo.pilot_approve_app("app", "SF01", "1.10.0")
+
+                return (
+                    await repo.get_latest_release("app", "SF01", STAGE_PILOT),
+                    await repo.get_latest_release("app", "SF01", STAGE_PRODUCTION),
+                )
+
+        latest, production = asyncio.run(run())
+
+    assert (latest["version_name"], latest["status"]) == ("1.10.0", STATUS_APPROVED)
+    assert production is None
+
+
+def test_get_app_page(async_app_release_repository: AsyncAppReleaseRepository):
+    repo = async_app_release_repository
+
+    async def run():
+        for idx in range(3):
+            await repo.insert(
+                {
+                    "id": "app",
+                    "mdm": "SF01",
+                    "version_name": f"1.{idx}.0",
+                    "stage": STAGE_PILOT,
+                    "status": STATUS_PENDING,
+                }
+            )
+
+        first, cursor = await repo.get_app_page("app", page_size=2)
+        second, next_cursor = await repo.get_app_page("app", cursor=cursor, page_size=2)
+
+        return first, second, next_cursor
+
+    first, second, next_cursor = asyncio.run(run())
+
+    assert [item["version_name"] for item in first + second] == [
+        "1.0.0",
+        "1.1.0",
+        "1.2.0",
+    ]
+    assert next_cursor is None
+
+
+@pytest.mark.parametrize("low_level_client", [False, True])
+def test_as_records(low_level_client: bool):
+    with mock_aws():
+        resource = boto3.resource("dynamodb", region_name="us-east-1")
+        create_table(
+            "test_table", resource, {"HASH": "id", "RANGE": "id_range"}, GSI_KEY_SCHEMAS
+        )
+
+        async def run():
+            async with AsyncAppReleaseRepository(
+                "test_table",
+                sortable_versions=True,
+                as_records=True,
+                low_level_client=low_level_client,
+            ) as repo:
+                await repo.pilot_app("app", "SF01", {"release_id": 1}, "1.0.0")
+
+                return (
+                    await repo.get_app("app"),
+                    (await repo.get_app_page("app"))[0],
+                    await repo.get_latest_release("app", "SF01", STAGE_PILOT),
+                )
+
+        app, page, latest = asyncio.run(run())
+
+    assert [type(release) for release in app + page] == [AppRelease, AppRelease]
+    assert app == page == [latest]
+    assert (latest.version_name, latest.mdm_key) == ("1.0.0", {"release_id": 1})
+
+
+def test_low_level_client():
+    with mock_aws():
+        resource = boto3.resource("dynamodb", region_name="us-east-1")
+        create_table(
+            "test_table", resource, {"HASH": "id", "RANGE": "id_range"}, GSI_KEY_SCHEMAS
+        )
+
+        async def run():
+            async with AsyncAppReleaseRepository(
+                "test_table", low_level_client=True
+            ) as repo:
+                await repo.pilot_app("app", "SF01", {"release_id": 1}, "1.0.0")
+                await repo.pilot_approve_app("app", "SF01", "1.0.0")
+                await repo.rollout_app("app", "SF01", "1.0.0")
+
+                return await repo.get_all_apps()
+
+        all_apps = asyncio.run(run())
+
+    assert [(item["version_name"], item["status"]) for item in all_apps] == [
+        ("1.0.0", STATUS_ROLLOUT)
+    ]
@@ -0,0 +1,158 @@
+import asyncio
+import time
+import boto3
+import pytest
+from moto import mock_aws
+from unittest.mock import MagicMock
+from botocore.exceptions import ClientError
+from test_dynamo_db_utils import create_table
+from async_base_repository import AsyncBaseRepository
+from instrumentation import MetricsAggregator
+from retry_policy import RetryPolicy
+
+GSI_KEY_SCHEMAS = [{"index_name": "stage-index", "HASH": "stage"}]
+
+
+@pytest.fixture
+def async_base_repository():
+    with mock_aws():
+        resource = boto3.resource("dynamodb", region_name="us-east-1")
+        create_table("test_table", resource, {"HASH": "id"}, GSI_KEY_SCHEMAS)
+        repo = AsyncBaseRepository(
+            "test_table", gsi_key_schemas=GSI_KEY_SCHEMAS, max_concurrency=4
+        )
+
+        yield repo
+
+        repo.close()
+
+
+def test_invalid_max_concurrency():
+    with pytest.raises(ValueError):
+        AsyncBaseRepository("test_table", max_concurrency=0)
+
+
+def test_insert_and_query(async_base_repository: AsyncBaseRepository):
+    repo = async_base_repository
+
+    async def run():
+        key = await repo.insert({"id": "app", "stage": "pilot"})
+        items, last_evaluated_key = await repo.query({"id": "app"})
+
+        return key, items, last_evaluated_key
+
+    key, items, last_evaluated_key = asyncio.run(run())
+
+    assert key == {"id": "app"}
+    assert [item["stage"] for item in items] == ["pilot"]
+    assert last_evaluated_key is None
+
+
+def test_iter_pages_and_update(async_base_repository: AsyncBaseRepository):
+    repo = async_base_repository
+
+    async def run():
+        await asyncio.gather(
+            *[
+                repo.insert({"id": f"app_{idx:02}", "stage": "pilot"})
+                for idx in range(10)
+            ]
+        )
+
+        pages = [page async for page in repo.iter_pages({"stage": "pilot"}, limit=3)]
+        updated_ids = await repo.update({"stage": "pilot"}, {}, {"status": "canceled"})
+        items = [item async for item in repo.iter_query({"stage": "pilot"})]
+
+        return pages, updated_ids, items
+
+    pages, updated_ids, items = asyncio.run(run())
+
+    assert sum(len(page) for page in pages) == 10
+    assert len(pages) == 4
+    assert sorted(key["id"] for key in updated_ids) == [
+        f"app_{idx:02}" for idx in range(10)
+    ]
+    assert all(item["status"] == "canceled" for item in items)
+
+
+def test_execute_backoff_does_not_block(async_base_repository: AsyncBaseRepository):
+    repo = async_base_repository
+    repo.repository.retry_policy = RetryPolicy(base_delay_ms=1, budget=None)
+    repo.repository.instrumentation = MetricsAggregator()
+    throttled = ClientError(
+        {"Error": {"Code": "ProvisionedThroughputExceededException"}}, "PutItem"
+    )
+    function = MagicMock(side_effect=[throttled, throttled, {"Items": []}])
+
+    async def run():
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+
+            while True:
+                ticks += 1
+                await asyncio.sleep(0)
+
+        task = asyncio.ensure_future(ticker())
+        response = await repo.execute(function, {}, "write", "put_item")
+        task.cancel()
+
+        return response, ticks
+
+    response, ticks = asyncio.run(run())
+    metrics = repo.repository.instrumentation.get("put_item", "test_table")
+
+    assert response == {"Items": []}
+    assert function.call_count == 3
+    assert ticks > 0
+    assert metrics.retries == 2
+    assert metrics.throttles == 2
+
+
+def test_execute_concurrency_is_bounded(async_base_repository: AsyncBaseRepository):
+    repo = async_base_repository
+    running = 0
+    max_running = 0
+
+    def function(**params):
+        nonlocal running, max_running
+        running += 1
+        max_running = max(max_running, running)
+        time.sleep(0.01)
+        running -= 1
+        return {}
+
+    async def run():
+        await asyncio.gather(
+            *[repo.execute(function, {}, "read", "query") for _ in range(20)]
+        )
+
+    asyncio.run(run())
+
+    assert max_running <= 4
+
+
+def test_single_flight_query():
+    with mock_aws():
+        resource = boto3.resource("dynamodb", region_name="us-east-1")
+        create_table("test_table", resource, {"HASH": "id"}, GSI_KEY_SCHEMAS)
+
+        async def run():
+            async with AsyncBaseRepository(
+                "test_table", gsi_key_schemas=GSI_KEY_SCHEMAS, single_flight=True
+            ) as repo:
+                await repo.insert({"id": "app", "stage": "pilot"})
+                repo.execute = MagicMock(wraps=repo.execute)
+
+                results = await asyncio.gather(
+                    *[repo.query({"stage": "pilot"}) for _ in range(10)]
+                )
+
+                return repo, results
+
+        repo, results = asyncio.run(run())
+
+    assert repo.execute.call_count == 1
+    assert repo.single_flight.shared_calls == 9
+    assert all([item["id"] for item in items] == ["app"] for items, _ in results)
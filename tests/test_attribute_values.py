@@ -0,0 +1,73 @@
+import pytest
+from decimal import Decimal
+from boto3.dynamodb.types import Binary, TypeDeserializer, TypeSerializer
+from attribute_values import (
+    deserialize_map,
+    deserialize_number,
+    deserialize_value,
+    serialize_map,
+    serialize_value,
+)
+
+ITEM = {
+    "id": "app",
+    "count": 3,
+    "negative": -2,
+    "ratio": Decimal("1.25"),
+    "enabled": True,
+    "missing": None,
+    "payload": b"\x00\x01",
+    "tags": {"a"},
+    "versions": {1},
+    "mdm_key": {"release_id": 1, "channels": ["a", "b"]},
+}
+
+
+def test_serialize_map_matches_type_serializer():
+    serializer = TypeSerializer()
+
+    assert serialize_map(ITEM) == {
+        key: serializer.serialize(value) for key, value in ITEM.items()
+    }
+
+
+def test_deserialize_map_matches_type_deserializer():
+    deserializer = TypeDeserializer()
+    attributes = serialize_map(ITEM)
+    expected = {
+        key: deserializer.deserialize(value) for key, value in attributes.items()
+    }
+
+    # Tipos simples: inteiros viram int e binários viram bytes
+    assert deserialize_map(attributes) == expected
+    assert deserialize_map(attributes)["mdm_key"]["release_id"] == 1
+    assert type(deserialize_map(attributes)["count"]) is int
+    assert type(deserialize_map(attributes)["payload"]) is bytes
+
+
+def test_deserialize_number():
+    assert deserialize_number("10") == 10
+    assert deserialize_number("-10") == -10
+    assert deserialize_number("1.50") == Decimal("1.50")
+    assert deserialize_number("1E+2") == Decimal("100")
+
+
+def test_serialize_value_binary_and_sets():
+    assert serialize_value(Binary(b"ab")) == {"B": b"ab"}
+    assert serialize_value({Binary(b"ab")}) == {"BS": [b"ab"]}
+    assert serialize_value((1, "a")) == {"L": [{"N": "1"}, {"S": "a"}]}
+    assert deserialize_value({"BS": [b"ab"]}) == {b"ab"}
+
+
+def test_serialize_value_invalid():
+    with pytest.raises(TypeError):
+        serialize_value(1.5)
+
+    with pytest.raises(TypeError):
+        serialize_value(object())
+
+    with pytest.raises(ValueError):
+        serialize_value(set())
+
+    with pytest.raises(ValueError):
+        deserialize_value({})
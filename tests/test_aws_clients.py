@@ -0,0 +1,102 @@
+import threading
+import pytest
+from unittest.mock import MagicMock, patch
+from aws_clients import (
+    ClientRegistry,
+    TableDescriptionCache,
+    build_client_config,
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_build_client_config():
+    config = build_client_config(max_pool_connections=10, read_timeout=3)
+
+    assert config.max_pool_connections == 10
+    assert config.read_timeout == 3
+    assert config.tcp_keepalive is True
+    assert config.retries["total_max_attempts"] == 1
+
+
+def test_client_registry_is_lazy():
+    with patch("boto3.session.Session") as session:
+        registry = ClientRegistry(region_name="us-east-1")
+        session.assert_not_called()
+
+        client = registry.get_client()
+
+        assert registry.get_client() is client
+        session.assert_called_once_with(region_name="us-east-1")
+        session.return_value.client.assert_called_once_with(
+            "dynamodb", config=registry.config
+        )
+
+
+def test_client_registry_resource_per_thread():
+    with patch("boto3.session.Session") as session:
+        session.return_value.resource.side_effect = lambda *args, **kwargs: object()
+        registry = ClientRegistry(region_name="us-east-1")
+        resources = []
+
+        resource = registry.get_resource()
+        thread = threading.Thread(
+            target=lambda: resources.append(registry.get_resource())
+        )
+        thread.start()
+        thread.join()
+
+        assert registry.get_resource() is resource
+        assert resources[0] is not resource
+
+
+def test_client_registry_streams_client():
+    with patch("boto3.session.Session") as session:
+        registry = ClientRegistry(region_name="us-east-1")
+        client = registry.get_streams_client()
+
+        assert registry.get_streams_client() is client
+        session.return_value.client.assert_called_once_with(
+            "dynamodbstreams", config=registry.config
+        )
+
+        registry.reset()
+
+        assert registry.streams_client is None
+
+
+def test_client_registry_configure_resets_clients():
+    with patch("boto3.session.Session"):
+        registry = ClientRegistry(region_name="us-east-1")
+        registry.get_client()
+
+        config = build_client_config(max_pool_connections=5)
+        registry.configure(config, region_name="sa-east-1")
+
+        assert registry.client is None
+        assert registry.config is config
+        assert registry.region_name == "sa-east-1"
+
+
+def test_table_description_cache_ttl():
+    clock = FakeClock()
+    cache = TableDescriptionCache(ttl=10, clock=clock)
+    loader = MagicMock(side_effect=lambda table_name: {"Table": {"Name": table_name}})
+
+    assert cache.get("table", loader) == {"Table": {"Name": "table"}}
+    assert cache.get("table", loader) == {"Table": {"Name": "table"}}
+    assert loader.call_count == 1
+
+    clock.now = 11
+    cache.get("table", loader)
+    assert loader.call_count == 2
+
+    cache.invalidate("table")
+    cache.get("table", loader)
+    assert loader.call_count == 3
@@ -1,12 +1,17 @@
 import boto3
 import pytest
+import time
+from concurrent.futures import ThreadPoolExecutor
 from typing import Tuple, Any
 from moto import mock_aws
 from unittest.mock import patch
 from test_dynamo_db_utils import create_table
 from base_repository import BaseRepository
+from dynamo_db_helper import PartialUpdateError
 from dynamo_db_utils import DynamoDBUtils as utils
 from unittest import TestCase
+from botocore.exceptions import ClientError
+from retry_policy import RetryPolicy
 
 MOCK_DATA = [
     {
@@ -162,3 +167,338 @@ def test_query_many(base_repository: Tuple[BaseRepository, Any]):
             break
 
     assert expected_items == resulted_items
+
+
+def test_insert_many(base_repository: Tuple[BaseRepository, Any]):
+    repo = base_repository[0]
+    items = [dict(item, id=f"bulk_{idx}") for idx, item in enumerate(MOCK_DATA * 3)]
+
+    results = repo.insert_many(items, overwrite=True)
+
+    assert [result["key"] for result in results] == [
+        {"id": item["id"]} for item in items
+    ]
+    assert all(result["error"] is None for result in results)
+
+    for item in items:
+        assert repo.query({"id": item["id"]})[0][0]["name"] == item["name"]
+
+
+def test_insert_many_duplicated_keys(base_repository: Tuple[BaseRepository, Any]):
+    repo = base_repository[0]
+    items = [MOCK_DATA[0], dict(MOCK_DATA[0], name="overwritten")]
+
+    results = repo.insert_many(items, overwrite=True)
+
+    assert all(result["error"] is None for result in results)
+    assert repo.query({"id": MOCK_DATA[0]["id"]})[0][0]["name"] == "overwritten"
+
+
+def test_insert_many_without_overwrite(base_repository: Tuple[BaseRepository, Any]):
+    repo = base_repository[0]
+    repo.insert(MOCK_DATA[0])
+
+    results = repo.insert_many(MOCK_DATA[:2], overwrite=False)
+
+    assert results[0]["error"] == "ConditionalCheckFailedException"
+    assert results[1] == {"key": {"id": MOCK_DATA[1]["id"]}, "error": None}
+
+
+def test_insert_many_defaults_to_conditional(
+    base_repository: Tuple[BaseRepository, Any]
+):
+    repo = base_repository[0]
+    repo.insert(MOCK_DATA[0])
+
+    # Como no insert, o padrão não sobrescreve itens existentes
+    with patch.object(repo, "batch_put_items", wraps=repo.batch_put_items) as batch:
+        results = repo.insert_many(MOCK_DATA[:2])
+
+    batch.assert_not_called()
+    assert [result["error"] for result in results] == [
+        "ConditionalCheckFailedException",
+        None,
+    ]
+
+
+def test_get_many(base_repository: Tuple[BaseRepository, Any]):
+    repo = base_repository[0]
+    items = [dict(item, id=f"bulk_{idx}") for idx, item in enumerate(MOCK_DATA * 10)]
+    repo.insert_many(items, overwrite=True)
+
+    keys = [{"id": item["id"]} for item in items] + [{"id": "missing"}]
+    results = repo.get_many(keys, projection_expression=["name"])
+
+    assert len(results) == len(items)
+
+    for item in items:
+        assert results[(item["id"],)] == {"id": item["id"], "name": item["name"]}
+
+
+def test_iter_pages(base_repository: Tuple[BaseRepository, Any]):
+    repo = base_repository[0]
+    repo.insert_many(MOCK_DATA, overwrite=True)
+
+    pages = list(
+        repo.iter_pages(
+            key_condition={"stage": "production"},
+            filter_condition={"status": "pending"},
+            limit=5,
+        )
+    )
+
+    assert len(pages) > 1
+    assert sum(len(page) for page in pages) == 4
+
+
+def test_iter_query_is_lazy(base_repository: Tuple[BaseRepository, Any]):
+    repo = base_repository[0]
+    repo.insert_many(MOCK_DATA, overwrite=True)
+
+    with patch.object(repo, "query", wraps=repo.query) as query:
+        iterator = repo.iter_query(key_condition={"stage": "production"}, limit=5)
+        assert query.call_count == 0
+
+        next(iterator)
+        assert query.call_count == 1
+
+        assert len(list(iterator)) == len(MOCK_DATA) - 1
+        assert query.call_count == 3
+
+
+def test_iter_pages_prefetch(base_repository: Tuple[BaseRepository, Any]):
+    repo = base_repository[0]
+    repo.insert_many(MOCK_DATA, overwrite=True)
+    key_condition = {"stage": "production"}
+
+    pages = list(repo.iter_pages(key_condition, limit=5))
+    prefetched_pages = list(repo.iter_pages(key_condition, limit=5, prefetch=2))
+
+    assert prefetched_pages == pages
+
+
+def test_update_parallel(base_repository: Tuple[BaseRepository, Any]):
+    repo = base_repository[0]
+    repo.insert_many(MOCK_DATA, overwrite=True)
+    repo.max_query_id_items = 5
+    expected_ids = list(
+        repo.iter_query(
+            {"stage": "production"},
+            {"status": "pending"},
+            projection_expression=repo.primary_keys,
+            limit=5,
+        )
+    )
+
+    updated_ids = repo.update(
+        {"stage": "production"},
+        {"status": "pending"},
+        {"status": "canceled"},
+        parallel=True,
+    )
+
+    assert updated_ids == expected_ids
+    assert len(updated_ids) == 4
+    assert (
+        len(list(repo.iter_query({"stage": "production"}, {"status": "canceled"}))) == 4
+    )
+
+
+def test_update_parallel_max_workers(base_repository: Tuple[BaseRepository, Any]):
+    repo = base_repository[0]
+    repo.insert_many(MOCK_DATA, overwrite=True)
+    repo.max_write_items = 2
+
+    with patch(
+        "base_repository.ThreadPoolExecutor", wraps=ThreadPoolExecutor
+    ) as executor:
+        repo.update({"stage": "production"}, {}, {"status": "canceled"}, parallel=True)
+
+    executor.assert_called_once_with(max_workers=2)
+
+    with pytest.raises(ValueError):
+        repo.update({"stage": "production"}, {}, {"status": "canceled"}, True, -1)
+
+
+def test_update_parallel_aggregates_errors(base_repository: Tuple[BaseRepository, Any]):
+    repo = base_repository[0]
+    repo.insert_many(MOCK_DATA, overwrite=True)
+    update_item = repo.update_item
+    failed_ids = ["test_id_2", "test_id_5"]
+
+    def fail_some(key, *args, **kwargs):
+        if key["id"] in failed_ids:
+            raise ClientError(
+                {"Error": {"Code": "ConditionalCheckFailedException"}}, "UpdateItem"
+            )
+
+        return update_item(key, *args, **kwargs)
+
+    with patch.object(repo, "update_item", side_effect=fail_some):
+        with pytest.raises(PartialUpdateError) as excinfo:
+            repo.update(
+                {"stage": "production"}, {}, {"status": "canceled"}, parallel=True
+            )
+
+    errors = excinfo.value.errors
+    updated_ids = excinfo.value.updated_ids
+
+    assert sorted(error["key"]["id"] for error in errors) == failed_ids
+    assert all(error["error"] == "ConditionalCheckFailedException" for error in errors)
+    assert len(updated_ids) == len(MOCK_DATA) - len(failed_ids)
+    assert not {key["id"] for key in updated_ids} & set(failed_ids)
+
+def test_rate_limited_repository(dynamodb: Tuple[boto3.client, Any]):
+    repo = BaseRepository(
+        table_name="test_table",
+        max_item_size=1024,
+        gsi_key_schemas=GSI_KEY_SCHEMAS,
+        rate_limited=True,
+    )
+
+    with patch.object(
+        repo.rate_limiter, "settle", wraps=repo.rate_limiter.settle
+    ) as settle:
+        with patch("time.sleep", return_value=None):
+            repo.insert(MOCK_DATA[0])
+            repo.query({"id": MOCK_DATA[0]["id"]})
+
+    assert settle.call_count == 2
+    assert [call.args[:2] for call in settle.call_args_list] == [
+        ("write", "put_item"),
+        ("read", "query"),
+    ]
+
+
+def test_rate_limited_repository_charges_retries(dynamodb: Tuple[boto3.client, Any]):
+    repo = BaseRepository(
+        table_name="test_table",
+        max_item_size=1024,
+        gsi_key_schemas=GSI_KEY_SCHEMAS,
+        rate_limited=True,
+    )
+    throttled = ClientError(
+        {"Error": {"Code": "ProvisionedThroughputExceededException"}}, "PutItem"
+    )
+
+    with patch.object(
+        repo.rate_limiter, "acquire", wraps=repo.rate_limiter.acquire
+    ) as acquire:
+        with patch.object(
+            repo.table, "put_item", side_effect=[throttled, throttled, {}]
+        ):
+            with patch("time.sleep", return_value=None):
+                repo.insert(MOCK_DATA[0])
+
+    assert acquire.call_count == 3
+
+
+def test_iter_pages_prefetch_uses_thread_table(
+    base_repository: Tuple[BaseRepository, Any]
+):
+    repo = base_repository[0]
+    repo.insert_many(MOCK_DATA, overwrite=True)
+    tables = []
+    query = repo.query
+
+    def tracked_query(*args, **kwargs):
+        tables.append(repo.table)
+        return query(*args, **kwargs)
+
+    with patch.object(repo, "query", side_effect=tracked_query):
+        pages = list(repo.iter_pages({"stage": "production"}, limit=5, prefetch=1))
+
+    assert sum(len(page) for page in pages) == len(MOCK_DATA)
+    assert all(table is not repo.table for table in tables)
+    assert all(table is tables[0] for table in tables)
+
+
+def test_repository_retry_policy(dynamodb: Tuple[boto3.client, Any]):
+    retry_policy = RetryPolicy(max_attempts=2, budget=None)
+    repo = BaseRepository(
+        table_name="test_table",
+        max_item_size=1024,
+        gsi_key_schemas=GSI_KEY_SCHEMAS,
+        retry_policy=retry_policy,
+    )
+    throttled = ClientError({"Error": {"Code": "ThrottlingException"}}, "PutItem")
+
+    with patch.object(repo.table, "put_item", side_effect=throttled) as put_item:
+        with patch("time.sleep", return_value=None):
+            with pytest.raises(ClientError):
+                repo.insert(MOCK_DATA[0])
+
+    assert put_item.call_count == 2
+
+
+def test_single_flight_query(dynamodb: Tuple[boto3.client, Any]):
+    repo = BaseRepository(
+        table_name="test_table",
+        max_item_size=1024,
+        gsi_key_schemas=GSI_KEY_SCHEMAS,
+        single_flight=True,
+    )
+    repo.insert_many(MOCK_DATA, overwrite=True)
+    expected = repo.query({"stage": "production"}, {"status": "pending"})
+    get = repo.get
+
+    def slow_get(*args):
+        # Mantém a leitura em andamento até todas as threads se juntarem a ela
+        while repo.single_flight.shared_calls < 7:
+            time.sleep(0.001)
+
+        return get(*args)
+
+    with patch.object(repo, "get", side_effect=slow_get) as mock_get:
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            results = list(
+                executor.map(
+                    lambda _: repo.query(
+                        {"stage": "production"}, {"status": "pending"}
+                    ),
+                    range(8),
+                )
+            )
+
+    assert mock_get.call_count == 1
+    assert all(result == expected for result in results)
+    assert len({id(items) for items, _ in results}) == 8
+
+    # Consultas diferentes não são agrupadas
+    with patch.object(repo, "get", wraps=get) as mock_get:
+        repo.query({"stage": "production"}, {"status": "approved"})
+        repo.query({"stage": "production"}, {"status": "approved"})
+
+    assert mock_get.call_count == 2
+
+
+def test_iter_parallel_scan(base_repository: Tuple[BaseRepository, Any]):
+    repo = base_repository[0]
+    repo.insert_many(
+        [{"id": f"id {idx}", "stage": "pilot"} for idx in range(25)], overwrite=True
+    )
+
+    with patch.object(repo, "scan", wraps=repo.scan) as scan:
+        ids = [item["id"] for item in repo.iter_parallel_scan(3, ["id"], limit=4)]
+
+    assert sorted(ids) == sorted(f"id {idx}" for idx in range(25))
+    # Cada segmento é lido com o seu próprio Segment/TotalSegments
+    assert {call.args[3:] for call in scan.call_args_list} == {
+        (0, 3),
+        (1, 3),
+        (2, 3),
+    }
+
+
+def test_iter_parallel_scan_propagates_errors(
+    base_repository: Tuple[BaseRepository, Any],
+):
+    repo = base_repository[0]
+    error = ClientError({"Error": {"Code": "AccessDeniedException"}}, "Scan")
+
+    with patch.object(repo, "scan", side_effect=error):
+        with pytest.raises(ClientError):
+            list(repo.iter_parallel_scan(2))
+
+    with pytest.raises(ValueError):
+        list(repo.iter_parallel_scan(0))
@@ -0,0 +1,209 @@
+import boto3
+import pytest
+from decimal import Decimal
+from moto import mock_aws
+from unittest.mock import patch
+from boto3.dynamodb.conditions import Attr
+from botocore.exceptions import ClientError
+from test_dynamo_db_utils import create_table
+from aws_clients import get_dynamo_db_client
+from app_release_repository import (
+    AppReleaseRepository,
+    STAGE_PILOT,
+    STAGE_PRODUCTION,
+    STATUS_APPROVED,
+    STATUS_PENDING,
+    STATUS_ROLLOUT,
+    build_gsi_key_schemas,
+)
+from app_release import AppRelease
+from attribute_values import deserialize_typed_map, serialize_typed_map
+from client_table import ClientTable, build_client_params, deserialize_response
+
+
+def build_release(idx: int):
+    return {
+        "id": f"app {idx}",
+        "mdm": "SF01",
+        "mdm_key": {"release_id": idx, "ratio": Decimal("0.5")},
+        "version_name": "1.0.0",
+        "stage": STAGE_PRODUCTION,
+        "status": STATUS_ROLLOUT,
+    }
+
+
+@pytest.fixture
+def client_app_release_repository():
+    with mock_aws():
+        resource = boto3.resource("dynamodb", region_name="us-east-1")
+        create_table(
+            "test_table",
+            resource,
+            {"HASH": "id", "RANGE": "id_range"},
+            build_gsi_key_schemas(4),
+        )
+
+        yield AppReleaseRepository(
+            table_name="test_table", stage_shards=4, low_level_client=True
+        )
+
+
+def test_build_client_params():
+    params = build_client_params(
+        "test_table",
+        {
+            "Key": {"id": "app", "id_range": "SF01#1.0.0"},
+            "ExclusiveStartKey": {"id": "app", "count": 1},
+            "ConditionExpression": Attr("id").not_exists(),
+            "ExpressionAttributeNames": {"#status": "status"},
+            "ExpressionAttributeValues": {":status": "pending"},
+        },
+    )
+
+    assert params == {
+        "TableName": "test_table",
+        "Key": {"id": {"S": "app"}, "id_range": {"S": "SF01#1.0.0"}},
+        "ExclusiveStartKey": {"id": {"S": "app"}, "count": {"N": "1"}},
+        "ConditionExpression": "attribute_not_exists(#n0)",
+        "ExpressionAttributeNames": {"#status": "status", "#n0": "id"},
+        "ExpressionAttributeValues": {":status": {"S": "pending"}},
+    }
+
+
+def test_deserialize_response():
+    response = deserialize_response(
+        {
+            "Items": [{"id": {"S": "app"}, "count": {"N": "2"}}],
+            "LastEvaluatedKey": {"id": {"S": "app"}},
+            "Count": 1,
+        }
+    )
+
+    assert response == {
+        "Items": [{"id": "app", "count": 2}],
+        "LastEvaluatedKey": {"id": "app"},
+        "Count": 1,
+    }
+
+
+def test_typed_client_table(client_app_release_repository: AppReleaseRepository):
+    client_app_release_repository.insert(build_release(1))
+    table = ClientTable("test_table", serialize_typed_map, deserialize_typed_map)
+
+    item = table.get_item(Key={"id": "app 1", "id_range": "SF01#1.0.0"})["Item"]
+
+    # Com os conversores typed, os números voltam como Decimal, como no resource
+    assert item["mdm_key"] == {"release_id": Decimal(1), "ratio": Decimal("0.5")}
+    assert isinstance(item["mdm_key"]["release_id"], Decimal)
+
+
+def test_as_records_from_attribute_maps(
+    client_app_release_repository: AppReleaseRepository,
+):
+    repo = AppReleaseRepository(
+        table_name="test_table",
+        stage_shards=4,
+        sortable_versions=True,
+        as_records=True,
+        low_level_client=True,
+    )
+    repo.insert_many([build_release(idx) for idx in range(6)], overwrite=True)
+    repo.pilot_app("app 0", "SF01", {"release_id": 99}, "2.0.0")
+
+    # Os registros saem direto dos atributos do client, sem passar por um dict
+    with patch.object(AppRelease, "from_item") as from_item:
+        all_apps = repo.get_all_apps()
+        app = repo.get_app("app 0")
+        page, _ = repo.get_all_apps_page(page_size=3)
+        latest = repo.get_latest_release("app 0", "SF01", STAGE_PILOT)
+
+    from_item.assert_not_called()
+    assert all(
+        isinstance(release, AppRelease) for release in all_apps + app + page + [latest]
+    )
+    assert sorted(release.id for release in all_apps) == [
+        f"app {idx}" for idx in range(6)
+    ]
+    # Os atributos de shard não fazem parte do registro
+    assert all(release.extra is None for release in all_apps + app)
+    assert [release.version_name for release in app] == ["1.0.0", "2.0.0"]
+    assert latest == app[1]
+    assert latest.mdm_key == {"release_id": 99}
+
+
+def test_release_flow(client_app_release_repository: AppReleaseRepository):
+    repo = client_app_release_repository
+
+    assert isinstance(repo.table, ClientTable)
+
+    repo.pilot_app("app", "SF01", {"release_id": 1}, "1.0.0")
+    repo.pilot_approve_app("app", "SF01", "1.0.0")
+    repo.rollout_app("app", "SF01", "1.0.0")
+
+    with pytest.raises(ClientError) as excinfo:
+        repo.insert({"id": "app", "mdm": "SF01", "version_name": "1.0.0"})
+
+    assert excinfo.value.response["Error"]["Code"] == "ConditionalCheckFailedException"
+
+    app = repo.get_app("app", [STATUS_PENDING, STATUS_APPROVED, STATUS_ROLLOUT])
+
+    assert [(item["stage"], item["status"]) for item in app] == [
+        (STAGE_PRODUCTION, STATUS_ROLLOUT)
+    ]
+    # Os números voltam como tipos simples
+    assert type(app[0]["mdm_key"]["release_id"]) is int
+    assert repo.get_app("app", [STATUS_PENDING]) == []
+    assert repo.get_all_apps(STAGE_PILOT) == []
+
+
+def test_batch_and_pages(client_app_release_repository: AppReleaseRepository):
+    repo = client_app_release_repository
+    items = [build_release(idx) for idx in range(30)]
+    results = repo.insert_many(items, overwrite=True)
+
+    assert all(result["error"] is None for result in results)
+
+    ids = []
+    page, cursor = repo.get_all_apps_page(page_size=4)
+    ids += [item["id"] for item in page]
+
+    while cursor is not None:
+        page, cursor = repo.get_all_apps_page(cursor=cursor, page_size=4)
+        ids += [item["id"] for item in page]
+
+    assert sorted(ids) == sorted(item["id"] for item in items)
+
+    many = repo.get_many([result["key"] for result in results[:3]])
+
+    assert sorted(item["mdm_key"]["release_id"] for item in many.values()) == [0, 1, 2]
+    assert many[("app 0", "SF01#1.0.0")]["mdm_key"]["ratio"] == Decimal("0.5")
+
+
+def test_batch_write_unprocessed_items(
+    client_app_release_repository: AppReleaseRepository,
+):
+    repo = client_app_release_repository
+    client = get_dynamo_db_client()
+    batch_write_item = client.batch_write_item
+
+    def mock_batch_write_item(RequestItems):
+        requests = RequestItems["test_table"]
+
+        if len(requests) > 1:
+            batch_write_item(RequestItems={"test_table": requests[:-1]})
+
+        # O último item volta no formato do client, como na resposta real
+        return {"UnprocessedItems": {"test_table": requests[-1:]}}
+
+    with patch.object(client, "batch_write_item", side_effect=mock_batch_write_item):
+        with patch("time.sleep", return_value=None):
+            results = repo.insert_many(
+                [build_release(idx) for idx in range(2)], overwrite=True
+            )
+
+    assert results[0]["error"] is None
+    assert results[1] == {
+        "key": {"id": "app 1", "id_range": "SF01#1.0.0"},
+        "error": "UnprocessedItem",
+    }
+    assert [item["id"] for item in repo.get_all_apps()] == ["app 0"]
@@ -0,0 +1,56 @@
+import pytest
+from decimal import Decimal
+from cursor_codec import CursorCodec, InvalidCursorError
+
+
+def test_encode_decode():
+    codec = CursorCodec()
+    last_evaluated_key = {
+        "id": "app",
+        "id_range": "SF01#1.0.0",
+        "release_id": Decimal("10.5"),
+        "shards": {"0": {"id": "app", "stage_shard": "production#0"}},
+    }
+
+    cursor = codec.encode(last_evaluated_key, "scope")
+
+    assert "{" not in cursor
+    assert codec.decode(cursor, "scope") == last_evaluated_key
+    assert isinstance(codec.decode(cursor, "scope")["release_id"], Decimal)
+    assert codec.encode(None) is None
+    assert codec.decode(None) is None
+
+
+def test_decode_rejects_other_scope():
+    codec = CursorCodec()
+    cursor = codec.encode({"id": "app"}, CursorCodec.build_scope({"id": "app"}))
+
+    with pytest.raises(InvalidCursorError):
+        codec.decode(cursor, CursorCodec.build_scope({"id": "other"}))
+
+
+def test_decode_malformed_cursor():
+    codec = CursorCodec()
+
+    for cursor in ["not a cursor", "e30", "W10", "éé"]:
+        with pytest.raises(InvalidCursorError):
+            codec.decode(cursor)
+
+
+def test_signed_cursor():
+    codec = CursorCodec(b"secret")
+    cursor = codec.encode({"id": "app"})
+
+    assert codec.decode(cursor) == {"id": "app"}
+
+    payload, _, _ = cursor.partition(".")
+    forged = CursorCodec().encode({"id": "other"})
+
+    with pytest.raises(InvalidCursorError):
+        codec.decode(payload)
+
+    with pytest.raises(InvalidCursorError):
+        codec.decode(forged + cursor[len(payload) :])
+
+    with pytest.raises(InvalidCursorError):
+        CursorCodec(b"other secret").decode(cursor)
@@ -3,10 +3,17 @@ import pytest
 from datetime import datetime
 from typing import Any, Tuple
 from moto import mock_aws
-from unittest.mock import patch
-from botocore.exceptions import ClientError
+from unittest.mock import MagicMock, patch
+from botocore.exceptions import ClientError, ConnectionClosedError
 from test_dynamo_db_utils import create_table
-from dynamo_db_helper import DynamoDBHelper, PRIMARY_HASH_KEY, PRIMARY_RANGE_KEY
+from aws_clients import get_dynamo_db_client, get_dynamo_db_resource
+from instrumentation import MetricsAggregator
+from dynamo_db_helper import (
+    DynamoDBHelper,
+    PRIMARY_HASH_KEY,
+    PRIMARY_RANGE_KEY,
+    UNPROCESSED_ITEM_ERROR,
+)
 from boto3.dynamodb.conditions import Attr
 
 
@@ -98,6 +105,47 @@ def test_is_primary_key(dynamo_db_helper: Tuple[DynamoDBHelper, Any]):
     assert not helper.is_primary_key({"id": "123"})
 
 
+def test_plan_query(dynamo_db_helper: Tuple[DynamoDBHelper, Any]):
+    helper = dynamo_db_helper[0]
+    filter_condition = {"status": "active", "id_range#begins_with": "SF01#"}
+
+    plan = helper.plan_query({"id": "123"}, filter_condition)
+
+    assert plan.index_name is None
+    assert plan.key_condition == {"id": "123", "id_range#begins_with": "SF01#"}
+    assert plan.filter_condition == {"status": "active"}
+    assert filter_condition == {"status": "active", "id_range#begins_with": "SF01#"}
+
+    plan = helper.plan_query(
+        {"gsi_hash_key": "123"}, {"gsi_range_key#gte": "4", "status": "active"}
+    )
+
+    assert plan.index_name == "GSI1"
+    assert plan.key_condition == {"gsi_hash_key": "123", "gsi_range_key#gte": "4"}
+    assert plan.filter_condition == {"status": "active"}
+
+    # Operadores que o KeyConditionExpression não aceita ficam no filtro
+    plan = helper.plan_query({"gsi_hash_key": "123"}, {"gsi_range_key#ne": "4"})
+
+    assert plan.key_condition == {"gsi_hash_key": "123"}
+    assert plan.filter_condition == {"gsi_range_key#ne": "4"}
+
+
+def test_explain(dynamo_db_helper: Tuple[DynamoDBHelper, Any]):
+    helper = dynamo_db_helper[0]
+    explain = helper.explain({"id": "123", "range_key1": "a"})
+
+    assert explain["plan"]["index_name"] is None
+    assert explain["plan"]["key_condition"] == {
+        "id": "123",
+        "id_range#begins_with": "a#",
+    }
+    assert explain["estimated_rcu"] == explain["plan"]["estimated_rcu"] > 0
+
+    with pytest.raises(ValueError):
+        helper.explain({"invalid_key": "value"})
+
+
 def test_build_primary_key(dynamo_db_helper: Tuple[DynamoDBHelper, Any]):
     helper = dynamo_db_helper[0]
     primary_key = {"id": "123", "id_range": "456"}
@@ -164,3 +212,284 @@ def test_execute_tries_with_other_exception(
                     {"Item": {"id": "test_id_1", "id_range": "range_value"}},
                 )
             assert excinfo.value.response["Error"]["Code"] == "Internal error"
+
+
+def test_batch_put_items_unprocessed_items(
+    dynamo_db_helper: Tuple[DynamoDBHelper, Any]
+):
+    helper = dynamo_db_helper[0]
+    items = [
+        {"id": "test_id_1", "range_key1": "a", "range_key2": "1"},
+        {"id": "test_id_2", "range_key1": "a", "range_key2": "2"},
+    ]
+    calls = []
+
+    def mock_batch_write_item(RequestItems):
+        requests = RequestItems["test_table"]
+        calls.append(len(requests))
+        # Sempre devolve o último item como não processado
+        return {"UnprocessedItems": {"test_table": requests[-1:]}}
+
+    with patch.object(
+        get_dynamo_db_resource(),
+        "batch_write_item",
+        side_effect=mock_batch_write_item,
+    ):
+        with patch("time.sleep", return_value=None):
+            results = helper.batch_put_items(items)
+
+    assert calls == [2, 1, 1, 1, 1]
+    assert results[0] == {
+        "key": {"id": "test_id_1", "id_range": "a#1"},
+        "error": None,
+    }
+    assert results[1]["error"] == UNPROCESSED_ITEM_ERROR
+
+
+def test_batch_get_items_unprocessed_keys(
+    dynamo_db_helper: Tuple[DynamoDBHelper, Any]
+):
+    helper = dynamo_db_helper[0]
+    keys = [{"id": f"test_id_{idx}", "id_range": "a#1"} for idx in range(150)]
+    calls = []
+
+    def mock_batch_get_item(RequestItems):
+        request = RequestItems["test_table"]
+        calls.append(len(request["Keys"]))
+        response = {"Responses": {"test_table": request["Keys"][1:]}}
+
+        if len(request["Keys"]) > 1:
+            response["UnprocessedKeys"] = {
+                "test_table": dict(request, Keys=request["Keys"][:1])
+            }
+
+        return response
+
+    with patch.object(
+        get_dynamo_db_resource(),
+        "batch_get_item",
+        side_effect=mock_batch_get_item,
+    ):
+        with patch("time.sleep", return_value=None):
+            results = helper.batch_get_items(keys, None)
+
+    assert calls == [100, 1, 50, 1]
+    assert len(results) == 148
+
+
+def test_batch_get_items_exhausted_retries(
+    dynamo_db_helper: Tuple[DynamoDBHelper, Any]
+):
+    helper = dynamo_db_helper[0]
+
+    def mock_batch_get_item(RequestItems):
+        return {"UnprocessedKeys": RequestItems}
+
+    with patch.object(
+        get_dynamo_db_resource(),
+        "batch_get_item",
+        side_effect=mock_batch_get_item,
+    ):
+        with patch("time.sleep", return_value=None):
+            with pytest.raises(RuntimeError):
+                helper.batch_get_items([{"id": "test_id_1", "id_range": "a#1"}], None)
+
+
+def test_batch_put_items_client_error(dynamo_db_helper: Tuple[DynamoDBHelper, Any]):
+    helper = dynamo_db_helper[0]
+    items = [
+        {"id": f"test_id_{idx}", "range_key1": "a", "range_key2": "1"}
+        for idx in range(30)
+    ]
+    calls = []
+
+    def mock_batch_write_item(RequestItems):
+        calls.append(len(RequestItems["test_table"]))
+
+        if len(calls) > 1:
+            raise ClientError(
+                {"Error": {"Code": "ValidationException", "Message": "Too large"}},
+                "BatchWriteItem",
+            )
+
+        return {}
+
+    with patch.object(
+        get_dynamo_db_resource(),
+        "batch_write_item",
+        side_effect=mock_batch_write_item,
+    ):
+        results = helper.batch_put_items(items)
+
+    assert calls == [25, 5]
+    assert all(result["error"] is None for result in results[:25])
+    assert all(result["error"] == "ValidationException" for result in results[25:])
+
+
+def build_transaction_canceled_error(*reasons: str) -> ClientError:
+    return ClientError(
+        {
+            "Error": {"Code": "TransactionCanceledException", "Message": "Canceled"},
+            "CancellationReasons": [{"Code": reason} for reason in reasons],
+        },
+        "TransactWriteItems",
+    )
+
+
+def test_transact_update_items_retries_conflicts(
+    dynamo_db_helper: Tuple[DynamoDBHelper, Any]
+):
+    helper = dynamo_db_helper[0]
+    key = {"id": "test_id_1", "id_range": "a#1"}
+
+    with patch.object(
+        get_dynamo_db_client(),
+        "transact_write_items",
+        side_effect=[
+            build_transaction_canceled_error("None", "TransactionConflict"),
+            build_transaction_canceled_error("ThrottlingError"),
+            {},
+        ],
+    ) as transact_write_items:
+        with patch("time.sleep", return_value=None):
+            result = helper.transact_update_items([(key, {}, {"status": "x"})])
+
+    assert transact_write_items.call_count == 3
+    assert result == [key]
+
+
+def test_transact_update_items_conditional_check_failed(
+    dynamo_db_helper: Tuple[DynamoDBHelper, Any]
+):
+    helper = dynamo_db_helper[0]
+    key = {"id": "test_id_1", "id_range": "a#1"}
+
+    with patch.object(
+        get_dynamo_db_client(),
+        "transact_write_items",
+        side_effect=build_transaction_canceled_error(
+            "TransactionConflict", "ConditionalCheckFailed"
+        ),
+    ) as transact_write_items:
+        with pytest.raises(ClientError) as excinfo:
+            helper.transact_update_items([(key, {}, {"status": "x"})])
+
+    assert transact_write_items.call_count == 1
+    assert excinfo.value.response["Error"]["Code"] == "ConditionalCheckFailedException"
+
+
+def test_execute_records_instrumentation(dynamo_db_helper: Tuple[DynamoDBHelper, Any]):
+    helper, table = dynamo_db_helper
+    helper.instrumentation = MetricsAggregator()
+    helper._init_key_schemas(
+        True,
+        [],
+        [
+            {
+                "index_name": "gsi_hash_key-gsi_range_key-index",
+                "HASH": "gsi_hash_key",
+                "RANGE": "gsi_range_key",
+            }
+        ],
+    )
+
+    for idx in range(4):
+        table.put_item(
+            Item={
+                "id": f"test_id_{idx}",
+                "id_range": "a#1",
+                "gsi_hash_key": "hash",
+                "gsi_range_key": "range",
+                "status": "active" if idx % 2 else "inactive",
+            }
+        )
+
+    items, _ = helper.get(
+        {"gsi_hash_key": "hash", "gsi_range_key": "range"},
+        {"status": "active"},
+        None,
+        None,
+        None,
+    )
+
+    metrics = helper.instrumentation.get(
+        "query", "test_table", "gsi_hash_key-gsi_range_key-index"
+    )
+
+    assert len(items) == 2
+    assert metrics.calls == 1
+    assert metrics.items_returned == 2
+    assert metrics.items_scanned == 4
+    assert metrics.consumed_read_units > 0
+
+
+def test_execute_records_retries_and_throttles(
+    dynamo_db_helper: Tuple[DynamoDBHelper, Any]
+):
+    helper = dynamo_db_helper[0]
+    helper.instrumentation = MetricsAggregator()
+    throttled = ClientError(
+        {"Error": {"Code": "ProvisionedThroughputExceededException"}}, "PutItem"
+    )
+    conflict = ClientError(
+        {"Error": {"Code": "TransactionConflictException"}}, "PutItem"
+    )
+
+    with patch("time.sleep", return_value=None):
+        helper.execute(
+            MagicMock(side_effect=[throttled, conflict, {}]), {}, "write", "put_item"
+        )
+
+        with pytest.raises(ClientError):
+            helper.execute(
+                MagicMock(side_effect=ClientError({"Error": {"Code": "X"}}, "PutItem")),
+                {},
+                "write",
+                "put_item",
+            )
+
+    metrics = helper.instrumentation.get("put_item", "test_table")
+
+    assert metrics.calls == 2
+    assert metrics.retries == 2
+    assert metrics.throttles == 1
+    assert metrics.errors == 1
+
+
+def test_execute_records_connection_errors(
+    dynamo_db_helper: Tuple[DynamoDBHelper, Any]
+):
+    helper = dynamo_db_helper[0]
+    helper.instrumentation = MetricsAggregator()
+    closed = ConnectionClosedError(endpoint_url="http://dynamo")
+
+    with patch("time.sleep", return_value=None):
+        response = helper.execute(
+            MagicMock(side_effect=[closed, {}]), {}, "read", "get_item"
+        )
+
+        with pytest.raises(ConnectionClosedError):
+            helper.execute(MagicMock(side_effect=closed), {}, "read", "get_item")
+
+    metrics = helper.instrumentation.get("get_item", "test_table")
+
+    # Uma repetição na primeira chamada e as demais tentativas na segunda
+    assert response == {}
+    assert metrics.calls == 2
+    assert metrics.retries == helper.retry_policy.max_attempts
+    assert metrics.errors == 1
+
+
+def test_batch_write_items_keeps_items(dynamo_db_helper: Tuple[DynamoDBHelper, Any]):
+    helper, table = dynamo_db_helper
+    item = {
+        "id": "test_id_1",
+        "id_range": "a#1",
+        "created_at": "2024-03-01T13:00:00",
+        "updated_at": "2024-03-01T14:00:00",
+    }
+
+    results = helper.batch_write_items(iter([item]))
+
+    assert results == [{"key": {"id": "test_id_1", "id_range": "a#1"}, "error": None}]
+    assert table.get_item(Key=results[0]["key"])["Item"] == item
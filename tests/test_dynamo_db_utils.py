@@ -1,7 +1,8 @@
 import pytest
 from dynamo_db_utils import DynamoDBUtils, PRIMARY_HASH_KEY, PRIMARY_RANGE_KEY
 from boto3.dynamodb.conditions import Attr, Key
-from datetime import datetime
+from expression_compiler import compile_condition, clear_expression_cache
+from datetime import datetime, timedelta, timezone
 from typing import Dict
 
 
@@ -22,50 +23,52 @@ def test_build_filter_expression():
     DynamoDBUtils.build_filter_expression(params, None)
     assert "FilterExpression" not in params
 
-    filter_condition = {"status#eq": "active"}
-    DynamoDBUtils.build_filter_expression(params, filter_condition)
-    assert params["FilterExpression"] == Attr("status").eq("active")
+    cases = [
+        ({"status#eq": "active"}, "#f0 = :f0", {":f0": "active"}),
+        ({"status#ne": "inactive"}, "#f0 <> :f0", {":f0": "inactive"}),
+        (
+            {"status#in": ["active", "pending"]},
+            "#f0 IN (:f0_0, :f0_1)",
+            {":f0_0": "active", ":f0_1": "pending"},
+        ),
+        ({"status#lt": 30}, "#f0 < :f0", {":f0": 30}),
+        ({"status#lte": 30}, "#f0 <= :f0", {":f0": 30}),
+        ({"status#gt": 30}, "#f0 > :f0", {":f0": 30}),
+        ({"status#gte": 30}, "#f0 >= :f0", {":f0": 30}),
+        (
+            {"status#between": [20, 30]},
+            "#f0 BETWEEN :f0_0 AND :f0_1",
+            {":f0_0": 20, ":f0_1": 30},
+        ),
+        ({"status#begins_with": "John"}, "begins_with(#f0, :f0)", {":f0": "John"}),
+    ]
 
-    filter_condition = {"status#ne": "inactive"}
-    DynamoDBUtils.build_filter_expression(params, filter_condition)
-    assert params["FilterExpression"] == Attr("status").ne("inactive")
+    for filter_condition, expression, values in cases:
+        params = {}
+        DynamoDBUtils.build_filter_expression(params, filter_condition)
+        assert params["FilterExpression"] == expression
+        assert params["ExpressionAttributeNames"] == {"#f0": "status"}
+        assert params["ExpressionAttributeValues"] == values
 
-    filter_condition = {"status#in": ["active", "pending"]}
+    params = {}
+    filter_condition = {"status": "active", "name#begins_with": "John"}
     DynamoDBUtils.build_filter_expression(params, filter_condition)
-    assert params["FilterExpression"] == Attr("status").is_in(["active", "pending"])
+    assert params["FilterExpression"] == "#f0 = :f0 AND begins_with(#f1, :f1)"
+    assert params["ExpressionAttributeNames"] == {"#f0": "status", "#f1": "name"}
+    assert params["ExpressionAttributeValues"] == {":f0": "active", ":f1": "John"}
 
-    filter_condition = {"age#lt": 30}
-    DynamoDBUtils.build_filter_expression(params, filter_condition)
-    assert params["FilterExpression"] == Attr("age").lt(30)
+    with pytest.raises(AssertionError):
+        DynamoDBUtils.build_filter_expression(params, {"status#invalid": "active"})
 
-    filter_condition = {"age#lte": 30}
-    DynamoDBUtils.build_filter_expression(params, filter_condition)
-    assert params["FilterExpression"] == Attr("age").lte(30)
 
-    filter_condition = {"age#gt": 30}
-    DynamoDBUtils.build_filter_expression(params, filter_condition)
-    assert params["FilterExpression"] == Attr("age").gt(30)
+def test_build_filter_expression_reuses_compiled_template():
+    clear_expression_cache()
 
-    filter_condition = {"age#gte": 30}
-    DynamoDBUtils.build_filter_expression(params, filter_condition)
-    assert params["FilterExpression"] == Attr("age").gte(30)
+    DynamoDBUtils.build_filter_expression({}, {"status#in": ["a", "b"], "stage": "x"})
+    DynamoDBUtils.build_filter_expression({}, {"status#in": ["c", "d"], "stage": "y"})
 
-    filter_condition = {"age#between": [20, 30]}
-    DynamoDBUtils.build_filter_expression(params, filter_condition)
-    assert params["FilterExpression"] == Attr("age").between(20, 30)
-
-    filter_condition = {"name#begins_with": "John"}
-    DynamoDBUtils.build_filter_expression(params, filter_condition)
-    assert params["FilterExpression"] == Attr("name").begins_with("John")
-
-    filter_condition = {"status": "active", "name#begins_with": "John"}
-    DynamoDBUtils.build_filter_expression(params, filter_condition)
-    assert params["FilterExpression"] == Attr("status").eq("active") & Attr(
-        "name"
-    ).begins_with("John")
-
-    with pytest.raises(AssertionError):
-        DynamoDBUtils.build_filter_expression(params, {"status#invalid": "active"})
+    assert compile_condition.cache_info().hits == 1
+    assert compile_condition.cache_info().misses == 1
 
 
 def test_build_projection_expression():
@@ -140,16 +143,22 @@ def test_build_get_item_params():
         last_evaluated_key,
         limit,
     )
-    assert params["KeyConditionExpression"] == Key("id").eq("123") & Key("id_range").eq(
-        "456"
-    )
-    assert params["FilterExpression"] == Attr("status").eq("active")
+    assert params["KeyConditionExpression"] == "#k0 = :k0 AND #k1 = :k1"
+    assert params["FilterExpression"] == "#f0 = :f0"
     assert params["ProjectionExpression"] == "#id, #name, #status"
     assert params["ExpressionAttributeNames"] == {
+        "#k0": "id",
+        "#k1": "id_range",
+        "#f0": "status",
         "#id": "id",
         "#name": "name",
         "#status": "status",
     }
+    assert params["ExpressionAttributeValues"] == {
+        ":k0": "123",
+        ":k1": "456",
+        ":f0": "active",
+    }
     assert params["ExclusiveStartKey"] == last_evaluated_key
     assert params["Limit"] == limit
 
@@ -172,11 +181,12 @@ def test_build_get_item_params_gsi_key_schema():
         last_evaluated_key,
         limit,
     )
-    assert params["KeyConditionExpression"] == Key("gsi_hash_key").eq("123") & Key(
-        "gsi_range_key"
-    ).eq("456")
+    assert params["KeyConditionExpression"] == "#k0 = :k0 AND #k1 = :k1"
     assert params["ProjectionExpression"] == "#id, #name, #status"
     assert params["ExpressionAttributeNames"] == {
+        "#k0": "gsi_hash_key",
+        "#k1": "gsi_range_key",
+        "#f0": "status",
         "#id": "id",
         "#name": "name",
         "#status": "status",
@@ -215,9 +225,11 @@ def test_build_get_item_params_gsi_key_schema_no_range():
         last_evaluated_key,
         limit,
     )
-    assert params["KeyConditionExpression"] == Key("gsi_hash_key").eq("123")
+    assert params["KeyConditionExpression"] == "#k0 = :k0"
     assert params["ProjectionExpression"] == "#id, #name, #status"
     assert params["ExpressionAttributeNames"] == {
+        "#k0": "gsi_hash_key",
+        "#f0": "status",
         "#id": "id",
         "#name": "name",
         "#status": "status",
@@ -238,6 +250,48 @@ def test_build_get_item_params_gsi_key_schema_no_range():
         )
 
 
+def test_build_get_item_params_range_operators():
+    params = DynamoDBUtils.build_get_item_params(
+        {"id": "123", "id_range#begins_with": "SF01#"}, {}, None, None, None
+    )
+
+    assert params["KeyConditionExpression"] == "#k0 = :k0 AND begins_with(#k1, :k1)"
+    assert params["ExpressionAttributeNames"] == {"#k0": "id", "#k1": "id_range"}
+    assert params["ExpressionAttributeValues"] == {":k0": "123", ":k1": "SF01#"}
+
+
+def test_build_get_item_params_gsi_key_schema_range_operators():
+    gsi_key_schemas = [
+        {"index_name": "GSI1", "HASH": "gsi_hash_key", "RANGE": "gsi_range_key"}
+    ]
+    key_condition = {"gsi_hash_key": "123", "gsi_range_key#between": ["1", "2"]}
+
+    params = DynamoDBUtils.build_get_item_params_gsi_key_schema(
+        gsi_key_schemas, key_condition, {}, None, None, None
+    )
+
+    assert params["IndexName"] == "GSI1"
+    assert params["KeyConditionExpression"] == (
+        "#k0 = :k0 AND #k1 BETWEEN :k1_0 AND :k1_1"
+    )
+    assert params["ExpressionAttributeValues"] == {
+        ":k0": "123",
+        ":k1_0": "1",
+        ":k1_1": "2",
+    }
+
+    for invalid_key in ["gsi_range_key#ne", "gsi_range_key#in"]:
+        with pytest.raises(ValueError):
+            DynamoDBUtils.build_get_item_params_gsi_key_schema(
+                gsi_key_schemas,
+                {"gsi_hash_key": "123", invalid_key: ["1"]},
+                {},
+                None,
+                None,
+                None,
+            )
+
+
 def test_build_update_item_params():
     key = {PRIMARY_HASH_KEY: "123", PRIMARY_RANGE_KEY: "456"}
     filter_condition = {"status#eq": "active"}
@@ -252,14 +306,16 @@ def test_build_update_item_params():
         "#status": "status",
         "#age": "age",
         "#updated_at": "updated_at",
+        "#c0": "status",
     }
     assert params["ExpressionAttributeValues"] == {
         ":status": "active",
         ":age": 30,
         ":updated_at": params["ExpressionAttributeValues"][":updated_at"],
+        ":c0": "active",
     }
 
-    assert params["ConditionExpression"] == Attr("status").eq("active")
+    assert params["ConditionExpression"] == "#c0 = :c0"
 
 
 def test_datetime_serializer():
@@ -271,3 +327,189 @@ def test_datetime_serializer():
     with pytest.raises(TypeError) as excinfo:
         DynamoDBUtils.datetime_serializer("not a datetime")
     assert str(excinfo.value) == "Type <class 'str'> not serializable"
+
+
+def test_build_transact_update_item():
+    key = {PRIMARY_HASH_KEY: "123", PRIMARY_RANGE_KEY: "456"}
+    filter_condition = {"status": "pending"}
+    update_items = {"status": "approved"}
+
+    transact_item = DynamoDBUtils.build_transact_update_item(
+        "test_table", key, filter_condition, update_items
+    )
+    update = transact_item["Update"]
+
+    assert update["TableName"] == "test_table"
+    assert update["Key"] == {"id": {"S": "123"}, "id_range": {"S": "456"}}
+    assert update["UpdateExpression"] == (
+        "SET #status = :status, #updated_at = :updated_at"
+    )
+    assert update["ConditionExpression"] == "#c0 = :c0"
+    assert update["ExpressionAttributeNames"]["#c0"] == "status"
+    assert update["ExpressionAttributeValues"][":status"] == {"S": "approved"}
+    assert update["ExpressionAttributeValues"][":c0"] == {"S": "pending"}
+    assert "updated_at" not in update_items
+
+
+SHARDED_GSI_KEY_SCHEMAS = [
+    {"index_name": "stage_shard-index", "HASH": "stage", "SHARDS": 4}
+]
+
+
+def test_add_shard_keys():
+    item = {"id": "123", "stage": "production"}
+    shard = DynamoDBUtils.get_shard("123", 4)
+
+    DynamoDBUtils.add_shard_keys(item, SHARDED_GSI_KEY_SCHEMAS)
+
+    assert item["stage_shard"] == f"production#{shard}"
+    assert DynamoDBUtils.get_shard("123", 4) == shard
+
+    item = {"id": "123"}
+    DynamoDBUtils.add_shard_keys(item, SHARDED_GSI_KEY_SCHEMAS)
+    assert "stage_shard" not in item
+
+
+def test_build_get_item_params_sharded_gsi_key_schema():
+    params = DynamoDBUtils.build_get_item_params_gsi_key_schema(
+        SHARDED_GSI_KEY_SCHEMAS, {"stage": "production"}, None, None, None, 10, 2
+    )
+
+    assert params["IndexName"] == "stage_shard-index"
+    assert params["KeyConditionExpression"] == "#k0 = :k0"
+    assert params["ExpressionAttributeNames"] == {"#k0": "stage_shard"}
+    assert params["ExpressionAttributeValues"] == {":k0": "production#2"}
+
+    with pytest.raises(ValueError):
+        DynamoDBUtils.build_get_item_params_gsi_key_schema(
+            SHARDED_GSI_KEY_SCHEMAS, {"stage": "production"}, None, None, None, 10
+        )
+
+
+def test_build_update_item_params_sharded_gsi_key_schema():
+    update_items = {"stage": "production"}
+    params = DynamoDBUtils.build_update_item_params(
+        {"id": "123"}, None, update_items, SHARDED_GSI_KEY_SCHEMAS
+    )
+
+    assert params["ExpressionAttributeNames"]["#stage_shard"] == "stage_shard"
+    assert params["ExpressionAttributeValues"][":stage_shard"] == (
+        f"production#{DynamoDBUtils.get_shard('123', 4)}"
+    )
+    assert "stage_shard" not in update_items
+
+
+def test_encode_version():
+    versions = ["0.9", "1.0-beta", "1.0", "1.0.0-rc.1", "1.0.0-rc.10", "1.0.0"]
+    versions += ["1.2.0", "1.9.0", "1.10.0", "10.0.0"]
+
+    encoded = [DynamoDBUtils.encode_version(version) for version in versions]
+
+    assert encoded == sorted(encoded)
+    assert DynamoDBUtils.encode_version("1.10.0") == "11.210.10$"
+
+    with pytest.raises(ValueError):
+        DynamoDBUtils.encode_version("1.1234567890")
+
+
+def test_build_range_key_with_encoders():
+    encoders = {"version_name": DynamoDBUtils.encode_version}
+    item = {"mdm": "SF01", "version_name": "1.10.0"}
+
+    assert DynamoDBUtils.build_range_key(item, ["mdm", "version_name"]) == (
+        "SF01#1.10.0"
+    )
+    assert DynamoDBUtils.build_range_key(item, ["mdm", "version_name"], encoders) == (
+        "SF01#11.210.10$"
+    )
+
+    params = DynamoDBUtils.build_put_item_params(
+        item, ["mdm", "version_name"], range_key_encoders=encoders
+    )
+    assert params["Item"]["id_range"] == "SF01#11.210.10$"
+
+
+def test_get_time_bucket():
+    assert DynamoDBUtils.get_time_bucket("2024-03-01T13:45:10.123456", "hour") == (
+        "2024-03-01T13"
+    )
+    assert DynamoDBUtils.get_time_bucket(datetime(2024, 3, 1, 13), "day") == (
+        "2024-03-01"
+    )
+
+    # Timestamps com fuso são convertidos para UTC antes de escolher o período
+    local = datetime(2024, 3, 1, 23, 30, tzinfo=timezone(timedelta(hours=-3)))
+    assert DynamoDBUtils.format_timestamp(local) == "2024-03-02T02:30:00"
+    assert DynamoDBUtils.get_time_bucket(local, "hour") == "2024-03-02T02"
+
+
+def test_iter_time_buckets():
+    assert list(
+        DynamoDBUtils.iter_time_buckets("2024-02-29T22", "2024-03-01T01", "hour")
+    ) == ["2024-02-29T22", "2024-02-29T23", "2024-03-01T00", "2024-03-01T01"]
+    assert (
+        list(DynamoDBUtils.iter_time_buckets("2024-03-02", "2024-03-01", "day")) == []
+    )
+
+
+TIME_BUCKET_GSI_KEY_SCHEMAS = [
+    {
+        "index_name": "updated_bucket-updated_at-index",
+        "HASH": "updated_bucket",
+        "RANGE": "updated_at",
+        "TIME_BUCKET": "hour",
+        "SHARDS": 2,
+    }
+]
+
+
+def test_build_put_item_params_time_bucket_gsi_key_schema():
+    params = DynamoDBUtils.build_put_item_params(
+        {PRIMARY_HASH_KEY: "123"},
+        [],
+        overwrite=True,
+        gsi_key_schemas=TIME_BUCKET_GSI_KEY_SCHEMAS,
+    )
+    item = params["Item"]
+    bucket = DynamoDBUtils.get_time_bucket(item["updated_at"], "hour")
+
+    assert item["updated_bucket"] == bucket
+    assert item["updated_bucket_shard"] == (
+        f"{bucket}#{DynamoDBUtils.get_shard('123', 2)}"
+    )
+
+
+def test_build_update_item_params_time_bucket_gsi_key_schema():
+    update_items = {"status": "approved"}
+    params = DynamoDBUtils.build_update_item_params(
+        {PRIMARY_HASH_KEY: "123"}, None, update_items, TIME_BUCKET_GSI_KEY_SCHEMAS
+    )
+    values = params["ExpressionAttributeValues"]
+    bucket = DynamoDBUtils.get_time_bucket(values[":updated_at"], "hour")
+
+    # O período e o shard derivam do mesmo updated_at gravado
+    assert values[":updated_bucket"] == bucket
+    assert values[":updated_bucket_shard"] == (
+        f"{bucket}#{DynamoDBUtils.get_shard('123', 2)}"
+    )
+    assert update_items == {"status": "approved"}
+
+
+def test_build_backfill_item_params():
+    params = DynamoDBUtils.build_backfill_item_params(
+        {PRIMARY_HASH_KEY: "123"}, {"updated_bucket": "2024-03-01T13"}
+    )
+
+    assert params["Key"] == {PRIMARY_HASH_KEY: "123"}
+    assert params["ExpressionAttributeValues"] == {":updated_bucket": "2024-03-01T13"}
+    assert "updated_at" not in params["ExpressionAttributeNames"].values()
+
+
+def test_build_put_item_params_copies_item():
+    item = {PRIMARY_HASH_KEY: "123", "mdm_key": {"release_id": 1}}
+    params = DynamoDBUtils.build_put_item_params(item, [], overwrite=True)
+
+    # Só o primeiro nível é copiado; os valores aninhados são compartilhados
+    assert item == {PRIMARY_HASH_KEY: "123", "mdm_key": {"release_id": 1}}
+    assert params["Item"] is not item
+    assert params["Item"]["mdm_key"] is item["mdm_key"]
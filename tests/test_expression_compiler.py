@@ -0,0 +1,80 @@
+import pytest
+from expression_compiler import (
+    build_condition,
+    build_update,
+    clear_expression_cache,
+    compile_condition,
+    compile_update,
+)
+
+
+@pytest.fixture(autouse=True)
+def expression_cache():
+    clear_expression_cache()
+    yield
+    clear_expression_cache()
+
+
+def test_build_condition():
+    expression, names, values = build_condition(
+        {"id": "123", "version#between": ["1.0.0", "2.0.0"]}, "k"
+    )
+
+    assert expression == "#k0 = :k0 AND #k1 BETWEEN :k1_0 AND :k1_1"
+    assert names == {"#k0": "id", "#k1": "version"}
+    assert values == {":k0": "123", ":k1_0": "1.0.0", ":k1_1": "2.0.0"}
+
+
+def test_build_condition_reuses_template_for_same_shape():
+    first = build_condition({"status#in": ["a", "b"]}, "f")
+    second = build_condition({"status#in": ["c", "d"]}, "f")
+    third = build_condition({"status#in": ["a", "b", "c"]}, "f")
+
+    assert first[0] == second[0] == "#f0 IN (:f0_0, :f0_1)"
+    assert second[2] == {":f0_0": "c", ":f0_1": "d"}
+    assert third[0] == "#f0 IN (:f0_0, :f0_1, :f0_2)"
+    assert compile_condition.cache_info().hits == 1
+    assert compile_condition.cache_info().misses == 2
+
+
+def test_build_condition_in_with_single_value():
+    expression, _, values = build_condition({"status#in": ["rollout"]}, "f")
+
+    assert expression == "#f0 IN (:f0_0)"
+    assert values == {":f0_0": "rollout"}
+
+
+def test_build_condition_eq_with_list_value():
+    expression, _, values = build_condition({"tags": ["a"]}, "f")
+
+    assert expression == "#f0 = :f0"
+    assert values == {":f0": ["a"]}
+
+
+def test_build_condition_returns_copy_of_names():
+    _, names, _ = build_condition({"status": "active"}, "f")
+    names["#f0"] = "changed"
+
+    _, names, _ = build_condition({"status": "active"}, "f")
+
+    assert names == {"#f0": "status"}
+
+
+def test_build_condition_invalid_operator():
+    with pytest.raises(AssertionError):
+        build_condition({"status#invalid": "active"}, "f")
+
+    with pytest.raises(AssertionError):
+        build_condition({"status#in": []}, "f")
+
+
+def test_build_update():
+    expression, names, values = build_update({"status": "approved", "age": 30})
+
+    assert expression == "SET #status = :status, #age = :age"
+    assert names == {"#status": "status", "#age": "age"}
+    assert values == {":status": "approved", ":age": 30}
+
+    build_update({"status": "rejected", "age": 31})
+
+    assert compile_update.cache_info().hits == 1
@@ -0,0 +1,71 @@
+from typing import Any, Dict, List
+from instrumentation import (
+    MetricsAggregator,
+    MetricsExporter,
+    NOOP_INSTRUMENTATION,
+    OperationRecord,
+)
+
+
+class ListExporter(MetricsExporter):
+    def __init__(self):
+        self.snapshots: List[List[Dict[str, Any]]] = []
+
+    def export(self, snapshot: List[Dict[str, Any]]) -> None:
+        self.snapshots.append(snapshot)
+
+
+def test_noop_instrumentation():
+    assert NOOP_INSTRUMENTATION.enabled is False
+    NOOP_INSTRUMENTATION.record(OperationRecord("query", "table"))
+
+
+def test_aggregator_percentiles():
+    aggregator = MetricsAggregator()
+
+    for duration in range(1, 101):
+        aggregator.record(OperationRecord("query", "table", duration_ms=duration))
+
+    metrics = aggregator.get("query", "table")
+
+    assert metrics.calls == 100
+    assert metrics.percentile(50) == 50
+    assert metrics.percentile(99) == 99
+    assert metrics.percentile(100) == 100
+
+
+def test_aggregator_groups_by_operation_and_index():
+    aggregator = MetricsAggregator()
+    aggregator.record(
+        OperationRecord(
+            "query",
+            "table",
+            "stage-index",
+            items_returned=2,
+            items_scanned=8,
+            consumed_read_units=1.5,
+            retries=2,
+            throttles=1,
+        )
+    )
+    aggregator.record(OperationRecord("query", "table", error="ValidationException"))
+
+    snapshot = {metrics["index_name"]: metrics for metrics in aggregator.snapshot()}
+
+    assert snapshot["stage-index"]["filter_waste"] == 0.75
+    assert snapshot["stage-index"]["consumed_read_units"] == 1.5
+    assert snapshot["stage-index"]["retries"] == 2
+    assert snapshot["stage-index"]["throttles"] == 1
+    assert snapshot[None]["errors"] == 1
+
+
+def test_aggregator_export_and_reset():
+    aggregator = MetricsAggregator(percentiles=[50])
+    exporter = ListExporter()
+    aggregator.record(OperationRecord("put_item", "table", duration_ms=3))
+
+    aggregator.export(exporter, reset=True)
+
+    assert exporter.snapshots[0][0]["operation"] == "put_item"
+    assert exporter.snapshots[0][0]["p50_ms"] == 3
+    assert aggregator.snapshot() == []
@@ -0,0 +1,102 @@
+import threading
+import pytest
+from typing import Any, Dict, List, Optional, Tuple
+from page_prefetcher import PagePrefetcher, ParallelPagePrefetcher
+
+
+def build_fetch_page(pages: int, calls: List[Optional[int]]):
+    def fetch_page(
+        last_evaluated_key: Optional[Dict[str, Any]]
+    ) -> Tuple[List[Dict[str, Any]], Optional[Dict[str, Any]]]:
+        page = last_evaluated_key["page"] if last_evaluated_key else 0
+        calls.append(page)
+        next_key = {"page": page + 1} if page + 1 < pages else None
+        return [{"id": f"{page}-{idx}"} for idx in range(2)], next_key
+
+    return fetch_page
+
+
+def test_prefetcher_yields_pages_in_order():
+    calls = []
+
+    with PagePrefetcher(build_fetch_page(5, calls), None, 2) as prefetcher:
+        pages = list(prefetcher)
+
+    assert [page[0]["id"] for page in pages] == ["0-0", "1-0", "2-0", "3-0", "4-0"]
+    assert calls == [0, 1, 2, 3, 4]
+
+
+def test_prefetcher_starts_from_last_evaluated_key():
+    calls = []
+
+    with PagePrefetcher(build_fetch_page(5, calls), {"page": 3}, 1) as prefetcher:
+        pages = list(prefetcher)
+
+    assert len(pages) == 2
+    assert calls == [3, 4]
+
+
+def test_prefetcher_fetches_ahead():
+    calls = []
+    fetched = threading.Event()
+    fetch_page = build_fetch_page(10, calls)
+
+    def tracked_fetch_page(last_evaluated_key):
+        result = fetch_page(last_evaluated_key)
+        if len(calls) == 3:
+            fetched.set()
+        return result
+
+    with PagePrefetcher(tracked_fetch_page, None, 2) as prefetcher:
+        next(iter(prefetcher))
+        # A página 0 foi consumida, as páginas 1 e 2 já foram buscadas
+        assert fetched.wait(timeout=5)
+
+
+def test_prefetcher_cancellation():
+    calls = []
+    prefetcher = PagePrefetcher(build_fetch_page(1000, calls), None, 1)
+
+    with prefetcher:
+        next(iter(prefetcher))
+
+    assert not prefetcher.thread.is_alive()
+    assert len(calls) < 1000
+
+
+def test_prefetcher_propagates_errors():
+    def fetch_page(last_evaluated_key):
+        raise RuntimeError("fetch failed")
+
+    with PagePrefetcher(fetch_page, None, 1) as prefetcher:
+        with pytest.raises(RuntimeError):
+            list(prefetcher)
+
+
+def test_prefetcher_invalid_depth():
+    with pytest.raises(ValueError):
+        PagePrefetcher(build_fetch_page(1, []), None, 0)
+
+
+def test_parallel_prefetcher_reads_all_sources():
+    calls = [[], [], []]
+    fetch_pages = [build_fetch_page(idx + 2, calls[idx]) for idx in range(3)]
+
+    with ParallelPagePrefetcher(fetch_pages, 1) as prefetcher:
+        pages = list(prefetcher)
+
+    assert len(pages) == 2 + 3 + 4
+    assert calls == [[0, 1], [0, 1, 2], [0, 1, 2, 3]]
+
+
+def test_parallel_prefetcher_cancellation():
+    fetch_pages = [build_fetch_page(1000, []) for _ in range(3)]
+    prefetcher = ParallelPagePrefetcher(fetch_pages, 1)
+
+    with prefetcher:
+        next(iter(prefetcher))
+
+    assert not any(thread.is_alive() for thread in prefetcher.threads)
+
+    with pytest.raises(ValueError):
+        ParallelPagePrefetcher([], 1)
@@ -0,0 +1,201 @@
+import pytest
+from unittest.mock import patch
+from query_planner import QueryPlanner
+
+GSI_KEY_SCHEMAS = [
+    {"index_name": "mdm-version_name-index", "HASH": "mdm", "RANGE": "version_name"},
+    {"index_name": "id-mdm-index", "HASH": "id", "RANGE": "mdm"},
+    {"index_name": "stage-index", "HASH": "stage"},
+]
+
+ATTRIBUTE_CARDINALITY = {"stage": 2, "status": 6, "mdm": 10}
+
+
+@pytest.fixture
+def query_planner():
+    return QueryPlanner(
+        True,
+        ["mdm", "version_name"],
+        GSI_KEY_SCHEMAS,
+        256,
+        attribute_cardinality=ATTRIBUTE_CARDINALITY,
+    )
+
+
+def test_plan_prefers_table_with_range_key_prefix(query_planner: QueryPlanner):
+    plan = query_planner.plan(
+        {"id": "app", "mdm": "SF01"}, {"version_name#ne": "1.0.0"}
+    )
+
+    assert plan.index_name is None
+    assert plan.key_condition == {"id": "app", "id_range#begins_with": "SF01#"}
+    # O predicado original continua no filtro e garante o mesmo resultado
+    assert plan.filter_condition == {"mdm": "SF01", "version_name#ne": "1.0.0"}
+
+
+def test_plan_builds_full_range_key(query_planner: QueryPlanner):
+    plan = query_planner.plan(
+        {"id": "app"}, {"mdm": "SF01", "version_name#begins_with": "1."}
+    )
+
+    assert plan.key_condition == {"id": "app", "id_range#begins_with": "SF01#1."}
+
+    plan = query_planner.plan({"id": "app"}, {"mdm": "SF01", "version_name": "1.0.0"})
+
+    assert plan.key_condition == {"id": "app", "id_range": "SF01#1.0.0"}
+
+
+def test_plan_consumes_covered_range_key_predicates(query_planner: QueryPlanner):
+    plan = query_planner.plan(
+        {"id": "a", "id_range#begins_with": "SF01#"},
+        {"mdm": "SF01", "version_name": "1.0.0"},
+    )
+
+    # O DynamoDB rejeita a chave de ordenação no filtro; o prefixo explícito
+    # é implicado pela chave montada
+    assert plan.key_condition == {"id": "a", "id_range": "SF01#1.0.0"}
+    assert plan.filter_condition == {"mdm": "SF01", "version_name": "1.0.0"}
+
+    plan = query_planner.plan(
+        {"id": "a", "id_range#begins_with": "SF01#1."}, {"mdm": "SF01"}
+    )
+
+    assert plan.key_condition == {"id": "a", "id_range#begins_with": "SF01#1."}
+    assert plan.filter_condition == {"mdm": "SF01"}
+
+    # Sem uma condição que implique a outra, vale a explícita
+    plan = query_planner.plan({"id": "a", "id_range": "SF02#1.0.0"}, {"mdm": "SF01"})
+
+    assert plan.key_condition == {"id": "a", "id_range": "SF02#1.0.0"}
+    assert plan.filter_condition == {"mdm": "SF01"}
+
+    plan = query_planner.plan(
+        {"mdm": "SF01", "version_name": "1.0.0"}, {"version_name#begins_with": "1."}
+    )
+
+    assert plan.index_name == "mdm-version_name-index"
+    assert plan.key_condition == {"mdm": "SF01", "version_name": "1.0.0"}
+    assert plan.filter_condition == {}
+
+
+def test_plan_cache_by_shape(query_planner: QueryPlanner):
+    plan = query_planner.plan({"id": "app"}, {"mdm": "SF01", "status": "a"})
+
+    # Mesmas chaves e operadores com outros valores não refazem a escolha
+    with patch.object(query_planner, "candidates") as candidates:
+        cached_plan = query_planner.plan(
+            {"id": "other"}, {"mdm": "SF02", "status": "b"}
+        )
+
+    candidates.assert_not_called()
+    assert len(query_planner.plan_cache) == 1
+    assert cached_plan.index_name == plan.index_name
+    assert cached_plan.key_condition == {
+        "id": "other",
+        "id_range#begins_with": "SF02#",
+    }
+    assert cached_plan.filter_condition == {"mdm": "SF02", "status": "b"}
+
+    query_planner.plan({"mdm": "SF01"}, {"status#in": ["a", "b"]})
+    query_planner.plan({"mdm": "SF01"}, {"status#in": ["a", "b", "c"]})
+
+    assert len(query_planner.plan_cache) == 3
+
+
+def test_plan_uses_index_range_key(query_planner: QueryPlanner):
+    plan = query_planner.plan(
+        {"mdm": "SF01"}, {"version_name#between": ["1.0", "2.0"], "status": "a"}
+    )
+
+    assert plan.index_name == "mdm-version_name-index"
+    assert plan.key_condition == {
+        "mdm": "SF01",
+        "version_name#between": ["1.0", "2.0"],
+    }
+    assert plan.filter_condition == {"status": "a"}
+
+
+def test_plan_consumes_filter_hash_key(query_planner: QueryPlanner):
+    plan = query_planner.plan({"stage": "pilot"}, {"id": "app"})
+
+    assert plan.index_name is None
+    assert plan.key_condition == {"id": "app"}
+    assert plan.filter_condition == {"stage": "pilot"}
+
+
+def test_plan_respects_index_projection():
+    query_planner = QueryPlanner(
+        True,
+        [],
+        [{"index_name": "stage-index", "HASH": "stage"}],
+        1024,
+        index_projections={"stage-index": {"ProjectionType": "KEYS_ONLY"}},
+    )
+
+    with pytest.raises(ValueError):
+        query_planner.plan({"stage": "pilot"})
+
+    with pytest.raises(ValueError):
+        query_planner.plan({"stage": "pilot"}, {"status": "a"}, ["id", "id_range"])
+
+    keys_only_plan = query_planner.plan({"stage": "pilot"}, {}, ["id", "id_range"])
+    all_plan = QueryPlanner(
+        True, [], [{"index_name": "stage-index", "HASH": "stage"}], 1024
+    ).plan({"stage": "pilot"}, {}, ["id", "id_range"])
+
+    assert keys_only_plan.index_name == "stage-index"
+    assert keys_only_plan.estimated_rcu < all_plan.estimated_rcu
+
+
+def test_plan_sharded_index():
+    gsi_key_schema = {"index_name": "stage_shard-index", "HASH": "stage", "SHARDS": 4}
+    query_planner = QueryPlanner(False, [], [gsi_key_schema], 256, item_count=10)
+    plan = query_planner.plan({"stage": "pilot"})
+
+    assert plan.shards == 4
+    assert plan.gsi_key_schema == gsi_key_schema
+    # Cada shard cobra ao menos meia unidade
+    assert plan.estimated_rcu == 2.0
+
+
+def test_explain(query_planner: QueryPlanner):
+    explain = query_planner.explain({"mdm": "SF01"}, {"version_name#gt": "1.0"})
+    candidates = explain["candidates"]
+
+    assert explain["plan"] == candidates[0]
+    assert explain["estimated_rcu"] == candidates[0]["estimated_rcu"]
+    assert [candidate["index_name"] for candidate in candidates] == [
+        "mdm-version_name-index"
+    ]
+
+    explain = query_planner.explain({"id": "app", "stage": "pilot"})
+    rcus = [candidate["estimated_rcu"] for candidate in explain["candidates"]]
+
+    assert rcus == sorted(rcus)
+    assert explain["plan"]["index_name"] is None
+
+
+def test_plan_without_index(query_planner: QueryPlanner):
+    with pytest.raises(ValueError):
+        query_planner.plan({"status": "pending"})
+
+
+def test_plan_encodes_range_key():
+    query_planner = QueryPlanner(
+        True,
+        ["mdm", "version_name"],
+        GSI_KEY_SCHEMAS,
+        256,
+        range_key_encoders={"version_name": lambda version: f"v{version}"},
+    )
+
+    plan = query_planner.plan({"id": "app"}, {"mdm": "SF01", "version_name": "1.0"})
+
+    assert plan.key_condition == {"id": "app", "id_range": "SF01#v1.0"}
+
+    # O prefixo da versão não vira prefixo da chave codificada
+    plan = query_planner.plan(
+        {"id": "app"}, {"mdm": "SF01", "version_name#begins_with": "1."}
+    )
+
+    assert plan.key_condition == {"id": "app", "id_range#begins_with": "SF01#"}
@@ -0,0 +1,122 @@
+import pytest
+from unittest.mock import patch
+from rate_limiter import (
+    TokenBucket,
+    CapacityRateLimiter,
+    READ_CAPACITY,
+    WRITE_CAPACITY,
+    RATE_LIMITERS,
+    get_rate_limiter,
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_token_bucket_reserve():
+    clock = FakeClock()
+    bucket = TokenBucket(rate=10, capacity=10, clock=clock)
+
+    assert bucket.reserve(10) == 0
+    assert bucket.reserve(5) == pytest.approx(0.5)
+
+    clock.now = 0.2
+    assert bucket.reserve(1) == pytest.approx(0.4)
+
+
+def test_token_bucket_capacity_limits_burst():
+    clock = FakeClock()
+    bucket = TokenBucket(rate=10, capacity=5, clock=clock)
+
+    clock.now = 100.0
+    assert bucket.reserve(5) == 0
+    assert bucket.reserve(1) == pytest.approx(0.1)
+
+
+def test_token_bucket_acquire_sleeps():
+    bucket = TokenBucket(rate=10, capacity=1, clock=FakeClock())
+
+    with patch("time.sleep") as sleep:
+        bucket.acquire(1)
+        sleep.assert_not_called()
+
+        bucket.acquire(1)
+        sleep.assert_called_once_with(pytest.approx(0.1))
+
+
+def test_token_bucket_invalid_rate():
+    with pytest.raises(ValueError):
+        TokenBucket(rate=0)
+
+
+def test_capacity_rate_limiter_settle():
+    rate_limiter = CapacityRateLimiter(10, 5, utilization=1.0)
+    bucket = rate_limiter.buckets[READ_CAPACITY]
+    bucket.clock = FakeClock()
+    bucket.updated_at = 0.0
+
+    estimate = rate_limiter.acquire(READ_CAPACITY, "query")
+    rate_limiter.settle(READ_CAPACITY, "query", estimate, 5.0)
+
+    assert bucket.tokens == pytest.approx(5.0)
+    assert rate_limiter.estimate("query") > estimate
+    assert rate_limiter.estimate("batch_get_item") == 1.0
+    assert rate_limiter.buckets[WRITE_CAPACITY].rate == 5
+
+
+def test_capacity_rate_limiter_scales_by_item_count():
+    rate_limiter = CapacityRateLimiter(100, 100, utilization=1.0)
+    bucket = rate_limiter.buckets[WRITE_CAPACITY]
+    bucket.clock = FakeClock()
+    bucket.updated_at = 0.0
+
+    estimate = rate_limiter.acquire(WRITE_CAPACITY, "batch_write_item", 25)
+    assert estimate == 25.0
+    assert bucket.tokens == pytest.approx(75.0)
+
+    rate_limiter.settle(WRITE_CAPACITY, "batch_write_item", estimate, 50.0, 25)
+    assert bucket.tokens == pytest.approx(50.0)
+    assert rate_limiter.estimate("batch_write_item", 25) == pytest.approx(30.0)
+
+
+def test_capacity_rate_limiter_reserve_does_not_sleep():
+    rate_limiter = CapacityRateLimiter(10, 5, utilization=1.0)
+    bucket = rate_limiter.buckets[READ_CAPACITY]
+    bucket.clock = FakeClock()
+    bucket.updated_at = 0.0
+
+    with patch("time.sleep") as sleep:
+        assert rate_limiter.reserve(READ_CAPACITY, "query", 10) == (10.0, 0.0)
+        estimate, wait_time = rate_limiter.reserve(READ_CAPACITY, "query", 5)
+        sleep.assert_not_called()
+
+    assert estimate == 5.0
+    assert wait_time == pytest.approx(0.5)
+
+
+def test_consumed_capacity_units():
+    assert CapacityRateLimiter.consumed_capacity_units(None) is None
+    assert CapacityRateLimiter.consumed_capacity_units({"CapacityUnits": 2}) == 2.0
+    assert (
+        CapacityRateLimiter.consumed_capacity_units(
+            [{"CapacityUnits": 2}, {"CapacityUnits": 1.5}]
+        )
+        == 3.5
+    )
+
+
+def test_get_rate_limiter_is_shared():
+    RATE_LIMITERS.clear()
+
+    rate_limiter = get_rate_limiter("test_table", 10, 5)
+
+    assert get_rate_limiter("test_table", 20, 5) is rate_limiter
+    assert rate_limiter.buckets[READ_CAPACITY].rate == pytest.approx(18)
+    assert get_rate_limiter("other_table", 10, 5) is not rate_limiter
+
+    RATE_LIMITERS.clear()
@@ -0,0 +1,108 @@
+import pytest
+from release_cache import ReleaseCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_get_counts_hits_and_misses():
+    cache = ReleaseCache()
+
+    assert cache.get("key") is None
+
+    cache.put("key", [{"id": "app"}])
+
+    assert cache.get("key") == [{"id": "app"}]
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+def test_ttl_expires_entries():
+    clock = FakeClock()
+    cache = ReleaseCache(ttl=10, clock=clock)
+    cache.put("key", ["value"])
+
+    clock.now = 9.9
+    assert cache.get("key") == ["value"]
+
+    clock.now = 10
+    assert cache.get("key") is None
+    assert cache.stats()["evictions"] == 1
+    assert cache.stats()["entries"] == 0
+
+
+def test_lru_evicts_least_recently_used():
+    cache = ReleaseCache(max_entries=2)
+    cache.put("a", [1])
+    cache.put("b", [2])
+    cache.get("a")
+    cache.put("c", [3])
+
+    assert cache.get("b") is None
+    assert cache.get("a") == [1]
+    assert cache.get("c") == [3]
+    assert cache.stats()["evictions"] == 1
+
+
+def test_max_bytes_limits_size():
+    cache = ReleaseCache(max_bytes=20)
+    cache.put("a", ["x" * 10])
+    cache.put("b", ["y" * 10])
+
+    assert cache.get("a") is None
+    assert cache.get("b") == ["y" * 10]
+    assert cache.stats()["bytes"] <= 20
+
+    assert cache.put("c", ["z" * 100]) is False
+    assert cache.get("b") == ["y" * 10]
+
+
+def test_invalidate_by_tag():
+    cache = ReleaseCache()
+    cache.put("app 1", [1], tags=[("package", "app 1")])
+    cache.put("app 2", [2], tags=[("package", "app 2")])
+    cache.put("pilot", [3], tags=[("stage", "pilot")])
+
+    assert cache.invalidate(("package", "app 1"), ("stage", "pilot")) == 2
+
+    assert cache.get("app 1") is None
+    assert cache.get("pilot") is None
+    assert cache.get("app 2") == [2]
+
+
+def test_get_or_load_discards_value_loaded_during_invalidation():
+    cache = ReleaseCache()
+
+    def loader():
+        cache.invalidate(("package", "app"))
+        return ["stale"]
+
+    assert cache.get_or_load("app", [("package", "app")], loader) == ["stale"]
+    assert cache.get("app") is None
+
+    assert cache.get_or_load("app", [("package", "app")], lambda: ["fresh"]) == [
+        "fresh"
+    ]
+    assert cache.get("app") == ["fresh"]
+
+
+def test_put_discards_value_with_stale_generations():
+    cache = ReleaseCache()
+    generations = cache.snapshot_generations([("package", "app")])
+
+    assert generations == {("package", "app"): 0}
+
+    cache.invalidate(("package", "app"))
+
+    assert not cache.put("app", ["stale"], [("package", "app")], generations)
+    assert cache.get("app") is None
+
+
+def test_invalid_limits():
+    with pytest.raises(ValueError):
+        ReleaseCache(max_entries=0)
@@ -0,0 +1,307 @@
+import boto3
+import pytest
+import time
+from moto import mock_aws
+from unittest.mock import patch
+from botocore.exceptions import ClientError
+from test_dynamo_db_utils import create_table
+from app_release_repository import (
+    AppReleaseRepository,
+    GSI_KEY_SCHEMAS,
+    STAGE_PILOT,
+    STAGE_PRODUCTION,
+    STATUS_PENDING,
+    STATUS_PREVIOUS,
+    STATUS_ROLLOUT,
+)
+from release_replica import (
+    ChangeRecord,
+    DynamoDBStreamSource,
+    EVENT_INSERT,
+    EVENT_MODIFY,
+    EVENT_REMOVE,
+    LocalChangeSource,
+    ReleaseReplica,
+    ResyncRequiredError,
+)
+
+RELEASES = [
+    {
+        "id": f"app {idx % 5}",
+        "mdm": f"SF0{idx % 2}",
+        "mdm_key": {"release_id": idx},
+        "version_name": f"1.{idx}.0",
+        "stage": STAGE_PRODUCTION if idx % 3 else STAGE_PILOT,
+        "status": STATUS_ROLLOUT if idx % 3 else STATUS_PENDING,
+    }
+    for idx in range(30)
+]
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def app_release_repository():
+    with mock_aws():
+        resource = boto3.resource("dynamodb", region_name="us-east-1")
+        client, _, _ = create_table(
+            "test_table", resource, {"HASH": "id", "RANGE": "id_range"}, GSI_KEY_SCHEMAS
+        )
+        client.update_table(
+            TableName="test_table",
+            StreamSpecification={
+                "StreamEnabled": True,
+                "StreamViewType": "NEW_AND_OLD_IMAGES",
+            },
+        )
+        repo = AppReleaseRepository("test_table")
+        repo.insert_many(RELEASES, overwrite=True)
+
+        yield repo
+
+
+def sort_items(items):
+    return sorted(items, key=lambda item: (item["id"], item["id_range"]))
+
+
+def test_bootstrap(app_release_repository: AppReleaseRepository):
+    repo = app_release_repository
+    replica = ReleaseReplica(repo, LocalChangeSource(), bootstrap_segments=4)
+
+    assert replica.lag_seconds is None
+    assert replica.bootstrap() == len(RELEASES)
+    assert replica.get_app("app 1") == repo.get_app("app 1")
+    assert sort_items(replica.get_all_apps()) == sort_items(
+        list(repo.iter_query({"stage": STAGE_PRODUCTION}, {"status": STATUS_ROLLOUT}))
+    )
+    assert len(replica.find(mdm="SF01", stage=STAGE_PILOT)) == 5
+    assert len(replica.find()) == len(RELEASES)
+    assert replica.find(package_name="app 9") == []
+
+
+def test_poll_applies_changes(app_release_repository: AppReleaseRepository):
+    clock = Clock()
+    source = LocalChangeSource(clock)
+    replica = ReleaseReplica(app_release_repository, source, clock=clock)
+
+    # Mudanças publicadas antes do bootstrap já estão na varredura
+    source.publish(EVENT_INSERT, {"id": "ignored", "id_range": "SF01#1.0.0"}, {})
+    replica.bootstrap()
+
+    for item in replica.find():
+        replica.apply(ChangeRecord(EVENT_REMOVE, item, None, clock()))
+
+    item = dict(RELEASES[1], id_range="SF01#1.1.0")
+    keys = {"id": item["id"], "id_range": item["id_range"]}
+    source.publish(EVENT_INSERT, keys, item, created_at=990.0)
+    clock.now = 1001.0
+
+    assert replica.poll() == 1
+    assert replica.get_all_apps() == [item]
+    assert replica.lag_seconds == 11.0
+
+    source.publish(EVENT_MODIFY, keys, dict(item, status=STATUS_PREVIOUS))
+    replica.poll()
+
+    assert replica.get_all_apps() == []
+    assert replica.get_all_apps(status=[STATUS_PREVIOUS]) == [
+        dict(item, status=STATUS_PREVIOUS)
+    ]
+    assert replica.lag_seconds == 0.0
+
+    source.publish(EVENT_REMOVE, keys)
+    replica.poll()
+    clock.now = 1003.0
+
+    assert replica.find() == []
+    assert replica.indexes == {"id": {}, "mdm": {}, "stage": {}, "status": {}}
+    assert replica.metrics() == {
+        "items": 0,
+        "lag_seconds": 2.0,
+        "records_applied": 3,
+        "poll_errors": 0,
+        "resyncs": 0,
+    }
+
+    with pytest.raises(ValueError):
+        replica.apply(ChangeRecord(EVENT_MODIFY, keys, None, clock()))
+
+
+def test_dynamodb_stream_source(app_release_repository: AppReleaseRepository):
+    repo = app_release_repository
+    replica = ReleaseReplica(repo, DynamoDBStreamSource.from_table("test_table"))
+    replica.bootstrap()
+
+    repo.pilot_app("app 1", "SF01", {"release_id": 99}, "2.0.0")
+    repo.pilot_approve_app("app 1", "SF01", "2.0.0")
+    repo.rollout_app("app 1", "SF01", "2.0.0")
+
+    assert replica.poll() > 0
+    assert replica.get_app("app 1") == repo.get_app("app 1")
+    assert [
+        item["version_name"]
+        for item in replica.find(
+            package_name="app 1", mdm="SF01", stage=STAGE_PRODUCTION
+        )
+        if item["status"] == STATUS_ROLLOUT
+    ] == ["2.0.0"]
+    assert replica.poll() == 0
+    assert replica.lag_seconds < 1
+
+
+def test_poll_synced_at_uses_newest_record(
+    app_release_repository: AppReleaseRepository,
+):
+    clock = Clock()
+    source = LocalChangeSource(clock)
+    replica = ReleaseReplica(app_release_repository, source, clock=clock)
+    replica.bootstrap()
+    item = dict(RELEASES[0], id="new app", id_range="SF00#1.0.0")
+    keys = {"id": item["id"], "id_range": item["id_range"]}
+
+    # Registros de shards diferentes não chegam em ordem de criação
+    source.publish(EVENT_INSERT, keys, item, created_at=998.0)
+    source.publish(EVENT_MODIFY, keys, item, created_at=995.0)
+    clock.now = 1001.0
+
+    assert replica.poll() == 2
+    assert replica.synced_at == 998.0
+
+
+def build_stream_error(code: str) -> ClientError:
+    return ClientError({"Error": {"Code": code, "Message": code}}, "GetRecords")
+
+
+def test_dynamodb_stream_source_renews_expired_iterator(
+    app_release_repository: AppReleaseRepository,
+):
+    repo = app_release_repository
+    source = DynamoDBStreamSource.from_table("test_table")
+    replica = ReleaseReplica(repo, source)
+    replica.bootstrap()
+
+    repo.pilot_app("app 1", "SF01", {"release_id": 99}, "2.0.0")
+    assert replica.poll() > 0
+
+    repo.pilot_approve_app("app 1", "SF01", "2.0.0")
+    get_records = source.client.get_records
+    calls = []
+
+    def mock_get_records(**params):
+        calls.append(params)
+
+        if len(calls) == 1:
+            raise build_stream_error("ExpiredIteratorException")
+
+        return get_records(**params)
+
+    with patch.object(source.client, "get_records", side_effect=mock_get_records):
+        assert replica.poll() == 0
+        assert replica.poll() > 0
+
+    assert calls[1]["ShardIterator"] != calls[0]["ShardIterator"]
+    assert replica.get_app("app 1") == repo.get_app("app 1")
+    assert replica.resyncs == 0
+
+
+def test_dynamodb_stream_source_expired_without_position(
+    app_release_repository: AppReleaseRepository,
+):
+    source = DynamoDBStreamSource.from_table("test_table")
+    source.start()
+
+    # Sem nenhum registro lido, não há de onde retomar a leitura
+    with patch.object(
+        source.client,
+        "get_records",
+        side_effect=build_stream_error("ExpiredIteratorException"),
+    ):
+        with pytest.raises(ResyncRequiredError):
+            source.read()
+
+
+def test_poll_resyncs_trimmed_stream(app_release_repository: AppReleaseRepository):
+    repo = app_release_repository
+    source = DynamoDBStreamSource.from_table("test_table")
+    replica = ReleaseReplica(repo, source)
+    replica.bootstrap()
+
+    repo.pilot_app("app 1", "SF01", {"release_id": 99}, "2.0.0")
+
+    with patch.object(
+        source.client,
+        "get_records",
+        side_effect=build_stream_error("TrimmedDataAccessException"),
+    ):
+        assert replica.poll() == 0
+
+    # A cópia é refeita pela varredura e inclui a mudança que se perdeu
+    assert replica.resyncs == 1
+    assert replica.get_app("app 1") == repo.get_app("app 1")
+    assert replica.poll() == 0
+
+
+def test_background_polling_survives_errors(
+    app_release_repository: AppReleaseRepository,
+):
+    source = LocalChangeSource()
+    read = source.read
+    calls = []
+
+    def mock_read():
+        calls.append(None)
+
+        # Falhas que não são do DynamoDB também não podem parar a thread
+        if len(calls) <= 2:
+            raise RuntimeError("connection reset")
+
+        return read()
+
+    with patch.object(source, "read", side_effect=mock_read):
+        with ReleaseReplica(app_release_repository, source) as replica:
+            replica.start(poll_interval=0.01)
+            item = dict(RELEASES[0], id="new app", id_range="SF00#1.0.0")
+            source.publish(
+                EVENT_INSERT, {"id": "new app", "id_range": "SF00#1.0.0"}, item
+            )
+
+            for _ in range(100):
+                if replica.find(package_name="new app"):
+                    break
+
+                time.sleep(0.01)
+
+            assert replica.find(package_name="new app") == [item]
+            assert replica.thread.is_alive()
+
+    assert replica.poll_errors == 2
+
+
+def test_background_polling(app_release_repository: AppReleaseRepository):
+    repo = app_release_repository
+    source = LocalChangeSource()
+
+    with ReleaseReplica(repo, source) as replica:
+        replica.start(poll_interval=0.01)
+
+        with pytest.raises(ValueError):
+            replica.start()
+
+        item = dict(RELEASES[0], id="new app", id_range="SF00#1.0.0")
+        source.publish(EVENT_INSERT, {"id": "new app", "id_range": "SF00#1.0.0"}, item)
+
+        for _ in range(100):
+            if replica.find(package_name="new app"):
+                break
+
+            time.sleep(0.01)
+
+        assert replica.find(package_name="new app") == [item]
+
+    assert replica.thread is None
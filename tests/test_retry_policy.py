@@ -0,0 +1,158 @@
+import pytest
+from unittest.mock import MagicMock, patch
+from botocore.exceptions import (
+    ClientError,
+    EndpointConnectionError,
+    ParamValidationError,
+    ReadTimeoutError,
+)
+from retry_policy import RetryPolicy, RetryBudget, RETRYABLE_ERRORS
+
+
+def build_client_error(code: str, reasons=None) -> ClientError:
+    response = {"Error": {"Code": code, "Message": code}}
+
+    if reasons is not None:
+        response["CancellationReasons"] = [{"Code": reason} for reason in reasons]
+
+    return ClientError(response, "Operation")
+
+
+@pytest.mark.parametrize("code", RETRYABLE_ERRORS)
+def test_is_retryable(code: str):
+    assert RetryPolicy().is_retryable(build_client_error(code))
+
+
+def test_is_retryable_transaction_canceled():
+    policy = RetryPolicy()
+
+    assert policy.is_retryable(
+        build_client_error(
+            "TransactionCanceledException", ["None", "TransactionConflict"]
+        )
+    )
+    assert not policy.is_retryable(
+        build_client_error(
+            "TransactionCanceledException",
+            ["ThrottlingError", "ConditionalCheckFailed"],
+        )
+    )
+    assert not policy.is_retryable(build_client_error("ValidationException"))
+
+
+def test_is_retryable_connection_errors():
+    policy = RetryPolicy()
+
+    assert policy.is_retryable(EndpointConnectionError(endpoint_url="http://dynamo"))
+    assert policy.is_retryable(ReadTimeoutError(endpoint_url="http://dynamo"))
+    assert not policy.is_retryable(ParamValidationError(report="invalid"))
+
+
+def test_execute_retries_connection_errors():
+    policy = RetryPolicy(budget=None)
+    function = MagicMock(
+        side_effect=[
+            EndpointConnectionError(endpoint_url="http://dynamo"),
+            ReadTimeoutError(endpoint_url="http://dynamo"),
+            {"Items": []},
+        ]
+    )
+
+    with patch("time.sleep"):
+        assert policy.execute(function, {}) == {"Items": []}
+
+    assert function.call_count == 3
+
+    function = MagicMock(side_effect=ParamValidationError(report="invalid"))
+
+    with pytest.raises(ParamValidationError):
+        policy.execute(function, {})
+
+    assert function.call_count == 1
+
+
+def test_compute_delay_full_jitter():
+    policy = RetryPolicy(base_delay_ms=10, max_delay_ms=50, random_function=lambda: 1)
+
+    assert policy.compute_delay(1) == pytest.approx(0.01)
+    assert policy.compute_delay(2) == pytest.approx(0.02)
+    assert policy.compute_delay(10) == pytest.approx(0.05)
+
+    policy.random_function = lambda: 0.5
+    assert policy.compute_delay(2) == pytest.approx(0.01)
+
+
+def test_execute_retries_until_success():
+    budget = RetryBudget()
+    policy = RetryPolicy(budget=budget)
+    on_retry = MagicMock()
+    function = MagicMock(
+        side_effect=[
+            build_client_error("ThrottlingException"),
+            build_client_error("InternalServerError"),
+            {"Items": []},
+        ]
+    )
+
+    with patch("time.sleep") as sleep:
+        assert policy.execute(function, {"a": 1}, on_retry=on_retry) == {"Items": []}
+
+    assert function.call_count == 3
+    assert sleep.call_count == 2
+    assert on_retry.call_count == 2
+    assert budget.tokens == budget.capacity - 2 * budget.retry_cost + 1
+
+
+def test_execute_max_attempts():
+    policy = RetryPolicy(max_attempts=3, budget=None)
+    function = MagicMock(side_effect=build_client_error("RequestLimitExceeded"))
+
+    with patch("time.sleep"):
+        with pytest.raises(ClientError):
+            policy.execute(function, {})
+
+    assert function.call_count == 3
+
+
+def test_execute_non_retryable_error():
+    function = MagicMock(side_effect=build_client_error("ValidationException"))
+
+    with pytest.raises(ClientError):
+        RetryPolicy(budget=None).execute(function, {})
+
+    assert function.call_count == 1
+
+
+def test_execute_deadline():
+    policy = RetryPolicy(
+        base_delay_ms=100, deadline_ms=150, budget=None, random_function=lambda: 1
+    )
+    function = MagicMock(side_effect=build_client_error("ThrottlingException"))
+
+    with patch("time.sleep"):
+        with pytest.raises(ClientError):
+            policy.execute(function, {})
+
+    # 100ms + 200ms de espera estouram o prazo de 150ms na segunda repetição
+    assert function.call_count == 2
+
+
+def test_execute_retry_budget():
+    budget = RetryBudget(capacity=10, retry_cost=5)
+    policy = RetryPolicy(budget=budget)
+    function = MagicMock(side_effect=build_client_error("ThrottlingException"))
+
+    with patch("time.sleep"):
+        with pytest.raises(ClientError):
+            policy.execute(function, {})
+
+    assert function.call_count == 3
+    assert budget.tokens == 0
+
+    budget.reset()
+    assert budget.tokens == 10
+
+
+def test_invalid_max_attempts():
+    with pytest.raises(ValueError):
+        RetryPolicy(max_attempts=0)
@@ -0,0 +1,58 @@
+import json
+from run_benchmarks import compare, main, RESULT_PER_CALL
+
+
+def test_compare_flags_slowdowns():
+    results = {
+        "a": {"seconds": 1.3, "unit": RESULT_PER_CALL},
+        "b": {"seconds": 1.1, "unit": RESULT_PER_CALL},
+        "c": {"seconds": 1.0, "unit": RESULT_PER_CALL},
+    }
+    baseline = {
+        "a": {"seconds": 1.0, "unit": RESULT_PER_CALL},
+        "b": {"seconds": 1.0, "unit": RESULT_PER_CALL},
+    }
+
+    comparisons = {
+        comparison["name"]: comparison
+        for comparison in compare(results, baseline, 0.2)
+    }
+
+    assert comparisons["a"]["regression"] is True
+    assert comparisons["b"]["regression"] is False
+    assert "c" not in comparisons
+
+
+def test_main_writes_and_compares_baseline(tmp_path):
+    output = tmp_path / "baseline.json"
+    args = ["--only", "micro", "--iterations", "5", "--repeat", "1"]
+
+    assert main(args + ["--output", str(output)]) == 0
+
+    baseline = json.loads(output.read_text())
+    assert "micro.build_put_item_params" in baseline["results"]
+
+    for result in baseline["results"].values():
+        result["seconds"] /= 1000
+
+    output.write_text(json.dumps(baseline))
+
+    assert main(args + ["--baseline", str(output)]) == 1
+
+
+def test_main_runs_macro_scenarios():
+    assert (
+        main(
+            [
+                "--only",
+                "macro",
+                "--releases",
+                "40",
+                "--packages",
+                "4",
+                "--previous-versions",
+                "10",
+            ]
+        )
+        == 0
+    )
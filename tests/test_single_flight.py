@@ -0,0 +1,122 @@
+import asyncio
+import threading
+import time
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+from single_flight import AsyncSingleFlight, SingleFlight, build_call_key
+
+
+def test_build_call_key():
+    assert build_call_key({"id": "app", "n": 1}, None) == build_call_key(
+        {"n": Decimal("1"), "id": "app"}, None
+    )
+    assert build_call_key({"id": "1"}) != build_call_key({"id": 1})
+    assert build_call_key({"status#in": ["a", "b"]}) != build_call_key(
+        {"status#in": ["b", "a"]}
+    )
+    assert build_call_key(True) != build_call_key(1)
+
+
+def test_single_flight_shares_call():
+    single_flight = SingleFlight()
+    started = threading.Event()
+    release = threading.Event()
+    calls = 0
+
+    def load():
+        nonlocal calls
+        calls += 1
+        started.set()
+        release.wait()
+        return ["item"]
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        leader = executor.submit(single_flight.do, "key", load)
+        started.wait()
+        followers = [executor.submit(single_flight.do, "key", load) for _ in range(7)]
+
+        while single_flight.shared_calls < 7:
+            time.sleep(0.001)
+
+        release.set()
+        results = [leader.result()] + [follower.result() for follower in followers]
+
+    assert calls == 1
+    assert all(result == ["item"] for result in results)
+    assert single_flight.calls == {}
+
+    # Depois de concluída, a próxima chamada faz uma nova leitura
+    assert single_flight.do("key", load) == ["item"]
+    assert calls == 2
+
+
+def test_single_flight_shares_error():
+    single_flight = SingleFlight()
+    started = threading.Event()
+    release = threading.Event()
+
+    def load():
+        started.set()
+        release.wait()
+        raise ValueError("failed")
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        leader = executor.submit(single_flight.do, "key", load)
+        started.wait()
+        follower = executor.submit(single_flight.do, "key", lambda: "other")
+
+        while single_flight.shared_calls < 1:
+            time.sleep(0.001)
+
+        release.set()
+
+        for future in [leader, follower]:
+            with pytest.raises(ValueError):
+                future.result()
+
+    assert single_flight.calls == {}
+
+
+def test_async_single_flight_shares_call():
+    single_flight = AsyncSingleFlight()
+    calls = 0
+
+    async def load():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return ["item"]
+
+    async def run():
+        results = await asyncio.gather(
+            *[single_flight.do("key", load) for _ in range(10)],
+            single_flight.do("other", load),
+        )
+
+        return results
+
+    results = asyncio.run(run())
+
+    assert calls == 2
+    assert single_flight.shared_calls == 9
+    assert all(result == ["item"] for result in results)
+    assert single_flight.calls == {}
+
+
+def test_async_single_flight_cancellation():
+    single_flight = AsyncSingleFlight()
+
+    async def load():
+        await asyncio.sleep(0.01)
+        return "value"
+
+    async def run():
+        leader = asyncio.ensure_future(single_flight.do("key", load))
+        follower = asyncio.ensure_future(single_flight.do("key", load))
+        await asyncio.sleep(0)
+        leader.cancel()
+
+        return await follower
+
+    assert asyncio.run(run()) == "value"
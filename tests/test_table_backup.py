@@ -0,0 +1,115 @@
+import boto3
+import gzip
+import pytest
+from decimal import Decimal
+from moto import mock_aws
+from unittest.mock import patch
+from botocore.exceptions import ClientError
+from boto3.dynamodb.types import Binary
+from test_dynamo_db_utils import create_table
+from aws_clients import get_dynamo_db_resource
+from app_release_repository import AppReleaseRepository, build_gsi_key_schemas
+from table_backup import (
+    deserialize_item,
+    export_table,
+    import_table,
+    iter_backup_items,
+    serialize_item,
+)
+
+
+def build_release(idx: int):
+    return {
+        "id": f"app {idx}",
+        "mdm": "SF01",
+        "mdm_key": {"release_id": idx, "tags": {"a", "b"}},
+        "version_name": f"1.{idx}.0",
+        "stage": "pilot",
+        "status": "pending",
+    }
+
+
+@pytest.fixture
+def app_release_repositories():
+    with mock_aws():
+        resource = boto3.resource("dynamodb", region_name="us-east-1")
+
+        for table_name in ["source_table", "target_table"]:
+            create_table(
+                table_name,
+                resource,
+                {"HASH": "id", "RANGE": "id_range"},
+                build_gsi_key_schemas(),
+            )
+
+        yield (
+            AppReleaseRepository(table_name="source_table"),
+            AppReleaseRepository(table_name="target_table"),
+        )
+
+
+def test_serialize_item():
+    item = {
+        "id": "app",
+        "count": Decimal("1.5"),
+        "payload": Binary(b"\x00\x01"),
+        "tags": {"a", "b"},
+        "nested": {"B": "not binary", "items": [1, None, True]},
+    }
+
+    line = serialize_item(item)
+
+    assert "\n" not in line
+    assert deserialize_item(line) == item
+
+
+@pytest.mark.parametrize("file_name", ["backup.jsonl", "backup.jsonl.gz"])
+def test_export_import_table(app_release_repositories, tmp_path, file_name):
+    source, target = app_release_repositories
+    source.insert_many([build_release(idx) for idx in range(30)], overwrite=True)
+    path = str(tmp_path / file_name)
+
+    assert export_table(source, path, total_segments=3) == 30
+
+    if file_name.endswith(".gz"):
+        with gzip.open(path, "rt") as file:
+            assert len(file.readlines()) == 30
+
+    assert import_table(target, path, batch_size=7) == (30, [])
+
+    # Os itens são restaurados sem alterar timestamps nem chaves
+    source_items = sorted(source.iter_scan(), key=lambda item: item["id"])
+    target_items = sorted(target.iter_scan(), key=lambda item: item["id"])
+    assert target_items == source_items
+    assert target.get_app("app 3", ["pending"])[0]["mdm_key"] == {
+        "release_id": 3,
+        "tags": {"a", "b"},
+    }
+
+
+def test_import_table_reports_errors(app_release_repositories, tmp_path):
+    source, target = app_release_repositories
+    source.insert_many([build_release(idx) for idx in range(5)], overwrite=True)
+    path = str(tmp_path / "backup.jsonl")
+    export_table(source, path)
+    resource = get_dynamo_db_resource()
+    batch_write_item = resource.batch_write_item
+
+    def mock_batch_write_item(RequestItems):
+        # O segundo lote é rejeitado; o primeiro já foi gravado
+        if mock.call_count == 2:
+            raise ClientError({"Error": {"Code": "ValidationException"}}, "Batch")
+
+        return batch_write_item(RequestItems=RequestItems)
+
+    with patch.object(
+        resource, "batch_write_item", side_effect=mock_batch_write_item
+    ) as mock:
+        imported, errors = import_table(target, path, batch_size=3)
+
+    assert imported == 3
+    assert [error["error"] for error in errors] == ["ValidationException"] * 2
+    assert len(list(iter_backup_items(path))) == 5
+
+    with pytest.raises(ValueError):
+        import_table(target, path, batch_size=0)
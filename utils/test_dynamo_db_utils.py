@@ -1,5 +1,6 @@
 import boto3
 from typing import Dict, List, Any
+from dynamo_db_utils import DynamoDBUtils
 
 
 def add_attribute_definitions(
@@ -38,6 +39,12 @@ def create_gsi_key_schemas(
     dynamodb_gsi_key_schemas: List[Dict[str, str]] = []
 
     for gsi_key_schema in gsi_key_schemas:
+        shard_attribute = DynamoDBUtils.get_shard_attribute(gsi_key_schema)
+
+        # Índices fragmentados usam o atributo de shard como hash
+        if shard_attribute:
+            gsi_key_schema = dict(gsi_key_schema, HASH=shard_attribute)
+
         dynamodb_gsi_key_schema: Dict[str, Any] = {
             "IndexName": gsi_key_schema["index_name"],
             "KeySchema": create_key_schema(gsi_key_schema, attribute_definitions),